@@ -0,0 +1,49 @@
+"""Benchmark for the time taken by ``import islpy``.
+
+Run as::
+
+    python benchmarks/bench_import.py [repeat]
+
+Each import happens in a fresh interpreter, using ``python -X importtime``.
+The best total is reported, along with the cumulative time of each module
+that the import of islpy pulls in, as measured in the best run.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+
+def import_times() -> list[tuple[str, int, int]]:
+    env = dict(os.environ)
+    # without cached bytecode, compiling the sources dominates the timings
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import islpy"],
+            env=env, capture_output=True, text=True, check=True)
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append((name.rstrip(), int(self_us), int(cumulative_us)))
+
+    return times
+
+
+def main(repeat: int) -> None:
+    # one import to warm up (and to write the bytecode caches)
+    import_times()
+    runs = [import_times() for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[-1][2])
+
+    for name, self_us, cumulative_us in best:
+        if cumulative_us >= 1000 or name.strip().startswith("islpy"):
+            print(f"{name:<48} {self_us/1e3:8.1f} ms {cumulative_us/1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
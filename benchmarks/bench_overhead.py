@@ -0,0 +1,498 @@
+"""Microbenchmarks for the per-call overhead of the islpy wrapper.
+
+Run as::
+
+    python benchmarks/bench_overhead.py [name ...]
+
+Each benchmark does very little work inside isl, so that the timings are
+dominated by the cost of crossing the wrapper (argument conversion, object
+creation and destruction, context reference counting and locking).
+"""
+
+from __future__ import annotations
+
+import io
+import pickle
+import sys
+import timeit
+from typing import TYPE_CHECKING
+
+import islpy as isl
+from islpy._monkeypatch import generic_reduce
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(f: Callable[[], Callable[[], object]]):
+    BENCHMARKS[f.__name__.removeprefix("bench_")] = f
+    return f
+
+
+# {{{ object lifetime
+
+@benchmark
+def bench_val_create():
+    ctx = isl.Context()
+
+    def run():
+        for i in range(1000):
+            isl.Val.int_from_si(ctx, i)
+
+    return run
+
+
+@benchmark
+def bench_aff_temporaries():
+    aff = isl.Aff("{ [i, j] -> [(2i + j)] }")
+    one = isl.Val.one(aff.get_ctx())
+
+    def run():
+        for _ in range(1000):
+            aff.add_constant_val(one).get_constant_val()
+
+    return run
+
+
+@benchmark
+def bench_basic_set_intersect():
+    # BasicSet.intersect is overloaded with the (deprecated) Set.intersect
+    bset = isl.BasicSet("{ [i] : 0 <= i < 10 }")
+    bset2 = isl.BasicSet("{ [i] : 5 <= i < 15 }")
+
+    def run():
+        for _ in range(1000):
+            bset.intersect(bset2)
+
+    return run
+
+
+@benchmark
+def bench_set_copy():
+    s = isl.Set("[n] -> { [i, j] : 0 <= i < n and 0 <= j <= i }")
+
+    def run():
+        for _ in range(1000):
+            s.get_space()
+            s.to_union_set()
+
+    return run
+
+# }}}
+
+
+# {{{ operators
+
+def _operator(op: Callable[[object, object], object], a: object, b: object):
+    def run():
+        for _ in range(1000):
+            op(a, b)
+
+    return run
+
+
+def _small_sets() -> tuple[isl.Set, isl.Set]:
+    return (isl.Set("{ [i] : 0 <= i < 10 }"), isl.Set("{ [i] : 5 <= i < 15 }"))
+
+
+def _small_affs() -> tuple[isl.PwAff, isl.PwAff]:
+    return (isl.PwAff("{ [i, j] -> [(2i + j)] }"), isl.PwAff("{ [i, j] -> [(i)] }"))
+
+
+@benchmark
+def bench_op_set_eq():
+    return _operator(lambda a, b: a == b, *_small_sets())
+
+
+@benchmark
+def bench_op_set_and():
+    return _operator(lambda a, b: a & b, *_small_sets())
+
+
+@benchmark
+def bench_op_set_or():
+    return _operator(lambda a, b: a | b, *_small_sets())
+
+
+@benchmark
+def bench_op_set_sub():
+    return _operator(lambda a, b: a - b, *_small_sets())
+
+
+@benchmark
+def bench_op_pw_aff_add():
+    return _operator(lambda a, b: a + b, *_small_affs())
+
+
+@benchmark
+def bench_op_pw_aff_add_int():
+    return _operator(lambda a, b: a + b, _small_affs()[0], 1)
+
+
+@benchmark
+def bench_op_pw_aff_mul():
+    return _operator(lambda a, b: a * b,
+            _small_affs()[0], isl.PwAff("{ [i, j] -> [(3)] }"))
+
+
+@benchmark
+def bench_op_val_bool():
+    val = isl.Val(5)
+
+    def run():
+        for _ in range(1000):
+            bool(val)
+
+    return run
+
+# }}}
+
+
+# {{{ printing
+
+@benchmark
+def bench_str_repeated():
+    s = isl.Set("[n] -> { [i, j] : 0 <= i < n and 0 <= j <= i }")
+
+    def run():
+        for _ in range(1000):
+            str(s)
+
+    return run
+
+
+@benchmark
+def bench_str_many():
+    sets = [isl.Set(f"[n] -> {{ [i, j] : 0 <= i < n + {k} and 0 <= j <= i }}")
+            for k in range(1000)]
+
+    def run():
+        isl.Printer.to_str(sets[0].get_ctx()).print_many(sets).get_str()
+
+    return run
+
+# }}}
+
+
+# {{{ consuming temporaries
+
+def _constraint_chain(consume_temporaries: bool):
+    ctx = isl.Context()
+    ctx.set_consume_temporaries(consume_temporaries)
+    space = isl.Space.create_from_names(ctx, set=["i", "j", "k"])
+    constraints = [
+        isl.Constraint.ineq_from_names(space, {1: 1000 - i, "i": 1, "j": i})
+        for i in range(200)]
+
+    def run():
+        bset = isl.BasicSet.universe(space)
+        for cns in constraints:
+            bset = bset.consume().add_constraint(cns) if consume_temporaries \
+                    else bset.add_constraint(cns)
+
+    return run
+
+
+@benchmark
+def bench_constraint_chain_copy():
+    return _constraint_chain(False)
+
+
+@benchmark
+def bench_constraint_chain_consume():
+    return _constraint_chain(True)
+
+# }}}
+
+
+# {{{ parsing
+
+def _parse_literal(cache_size: int):
+    ctx = isl.Context()
+    ctx.set_parse_cache_size(cache_size)
+
+    def run():
+        for _ in range(1000):
+            isl.Set("[n] -> { [i, j] : 0 <= i < n and 0 <= j <= i }", context=ctx)
+            isl.Map("{ [i, j] -> [i + 1, j - 1] }", context=ctx)
+
+    return run
+
+
+@benchmark
+def bench_parse_literal_uncached():
+    return _parse_literal(0)
+
+
+@benchmark
+def bench_parse_literal_cached():
+    return _parse_literal(256)
+
+
+def _parse_many(read_many: bool):
+    ctx = isl.Context()
+    ctx.set_parse_cache_size(0)
+    srcs = [f"[n] -> {{ [i, j] : 0 <= i < n + {k} and 0 <= j <= i }}"
+            for k in range(1000)]
+
+    def run():
+        if read_many:
+            isl.Set.read_many(srcs, context=ctx)
+        else:
+            [isl.Set(src, context=ctx) for src in srcs]
+
+    return run
+
+
+@benchmark
+def bench_parse_many_loop():
+    return _parse_many(False)
+
+
+@benchmark
+def bench_parse_many_read_many():
+    return _parse_many(True)
+
+# }}}
+
+
+# {{{ decomposition
+
+def _many_boxes(n: int) -> list[str]:
+    return [f"{10*k} <= i < {10*k + 5} and {k} <= j <= i" for k in range(n)]
+
+
+@benchmark
+def bench_get_basic_sets():
+    s = isl.Set("{ [i, j] : " + " or ".join(f"({b})" for b in _many_boxes(1000)) + " }")
+
+    def run():
+        s.get_basic_sets()
+
+    return run
+
+
+@benchmark
+def bench_get_constraints():
+    bset = isl.BasicSet("{ [i, j, k] : " + " and ".join(
+        f"{k}i + {k+1}j + {2*k+1}k <= {100*k + 1000}" for k in range(200)) + " }")
+
+    def run():
+        for _ in range(10):
+            bset.get_constraints()
+
+    return run
+
+
+@benchmark
+def bench_get_pieces():
+    pwaff = isl.PwAff("{ " + "; ".join(
+        f"[i, j] -> [(i + {k}j)] : {b}" for k, b in enumerate(_many_boxes(1000))
+        ) + " }")
+
+    def run():
+        pwaff.get_pieces()
+
+    return run
+
+# }}}
+
+
+# {{{ numpy interop
+
+def _points(native: bool):
+    s = isl.Set("{ [i, j] : 0 <= i < 100 and 0 <= j < 100 }")
+
+    def run():
+        if native:
+            s.points_array()
+        else:
+            points: list[list[int]] = []
+            s.foreach_point(lambda pnt: points.append([
+                pnt.get_coordinate_val(isl.dim_type.set, i).to_python()
+                for i in range(2)]))
+
+    return run
+
+
+@benchmark
+def bench_points_foreach():
+    return _points(False)
+
+
+@benchmark
+def bench_points_array():
+    return _points(True)
+
+
+def _constraint_matrices(native: bool):
+    bset = isl.BasicSet("[n, m] -> { [i, j, k] : 0 <= i < n and 0 <= j < m "
+            "and i <= k <= j + 10 and i + j + k <= n + m and exists a : i = 3a }")
+    labels: list[str | int] = [1, "n", "m", "i", "j", "k"]
+
+    def run():
+        if native:
+            bset.constraint_arrays()
+        else:
+            [[cns.get_coefficients_by_name().get(label, 0) for label in labels]
+             for cns in bset.get_constraints()]
+
+    return run
+
+
+@benchmark
+def bench_constraint_coefficients():
+    return _constraint_matrices(False)
+
+
+@benchmark
+def bench_constraint_arrays():
+    return _constraint_matrices(True)
+
+
+def _from_constraints(native: bool):
+    space = isl.Space.create_from_names(isl.DEFAULT_CONTEXT, set=["i", "j", "k"])
+    labels: list[str | int] = [1, "i", "j", "k"]
+    rows = [[100 - a, a % 3 - 1, a % 5 - 2, a % 7 - 3] for a in range(50)]
+
+    def run():
+        if native:
+            isl.BasicSet.from_constraint_arrays(space, [], rows)
+        else:
+            bset = isl.BasicSet.universe(space)
+            for row in rows:
+                bset = bset.add_constraint(isl.Constraint.ineq_from_names(
+                    space, dict(zip(labels, row, strict=True))))
+
+    return run
+
+
+@benchmark
+def bench_add_constraints():
+    return _from_constraints(False)
+
+
+@benchmark
+def bench_from_constraint_arrays():
+    return _from_constraints(True)
+
+
+def _mat_roundtrip(native: bool):
+    n = 30
+    rows = [[(i * j) % 7 - 3 for j in range(n)] for i in range(n)]
+
+    def run():
+        if native:
+            isl.Mat.from_numpy(rows).to_numpy()
+        else:
+            mat = isl.Mat.alloc(isl.DEFAULT_CONTEXT, n, n)
+            for i, row in enumerate(rows):
+                for j, entry in enumerate(row):
+                    mat = mat.set_element_val(i, j, entry)
+            [[mat.get_element_val(i, j).to_python() for j in range(n)]
+             for i in range(n)]
+
+    return run
+
+
+@benchmark
+def bench_mat_elementwise():
+    return _mat_roundtrip(False)
+
+
+@benchmark
+def bench_mat_numpy():
+    return _mat_roundtrip(True)
+
+
+def _contains(native: bool):
+    s = isl.Set("{ [i, j] : 0 <= i < 100 and 0 <= j <= i and exists a : i = 3a }")
+    coords = [[i, j] for i in range(-10, 110, 3) for j in range(-10, 110, 3)]
+
+    def run():
+        if native:
+            s.contains_points(coords)
+        else:
+            space = s.get_space()
+            for i, j in coords:
+                pnt = (isl.Point.zero(space)
+                       .set_coordinate_val(isl.dim_type.set, 0, i)
+                       .set_coordinate_val(isl.dim_type.set, 1, j))
+                pnt.to_set().is_subset(s)
+
+    return run
+
+
+@benchmark
+def bench_contains_points_loop():
+    return _contains(False)
+
+
+@benchmark
+def bench_contains_points():
+    return _contains(True)
+
+# }}}
+
+
+# {{{ pickling
+
+def _large_objects() -> dict[str, object]:
+    boxes = [f"{10*k} <= i < {10*k + 5} and {k} <= j <= i + n" for k in range(50)]
+    set_ = isl.Set("[n] -> { [i, j] : " + " or ".join(f"({b})" for b in boxes) + " }")
+    map_ = isl.Map(
+            "[n] -> { [i, j] -> [i + j, floor(i/3)] : "
+            + " or ".join(f"({b})" for b in boxes) + " }")
+    umap = isl.UnionMap("[n] -> { " + "; ".join(
+        f"S{k}[i, j] -> T{k}[i + {k}, j] : {b}" for k, b in enumerate(boxes)) + " }")
+    pwqp = isl.PwQPolynomial("[n] -> { " + "; ".join(
+        f"[i, j] -> (i^2 * j + {k} * floor(i/3) + n) : {b}"
+        for k, b in enumerate(boxes)) + " }")
+    return {"set": set_, "map": map_, "union_map": umap, "pw_qpolynomial": pwqp}
+
+
+def _pickle_round_trip(kind: str, binary: bool):
+    obj = _large_objects()[kind]
+    # pickle through the text format for comparison
+    dispatch_table = {} if binary else {type(obj): generic_reduce}
+
+    def run():
+        buf = io.BytesIO()
+        pickler = pickle.Pickler(buf)
+        pickler.dispatch_table = dispatch_table
+        pickler.dump(obj)
+        pickle.loads(buf.getvalue())
+
+    return run
+
+
+for _kind in ["set", "map", "union_map", "pw_qpolynomial"]:
+    for _binary in [True, False]:
+        def _bench(kind=_kind, binary=_binary):
+            return _pickle_round_trip(kind, binary)
+
+        BENCHMARKS[f"pickle_{_kind}_{'binary' if _binary else 'text'}"] = _bench
+
+# }}}
+
+
+def main(names: list[str]) -> None:
+    if not names:
+        names = list(BENCHMARKS)
+
+    for name in names:
+        run = BENCHMARKS[name]()
+        # one call to warm up
+        run()
+        timer = timeit.Timer(run)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        print(f"{name:<32} {best*1e3:10.3f} ms/iteration")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
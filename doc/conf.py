@@ -13,6 +13,7 @@ copyright = "2011-21, Andreas Kloeckner"
 ver_dic = {}
 with open("../islpy/version.py") as vfile:
     exec(compile(vfile.read(), "../islpy/version.py", "exec"), ver_dic)
+ver_dic = ver_dic["_version_info"]()
 
 version = ".".join(str(x) for x in ver_dic["VERSION"])
 # The full version, including alpha/beta/rc tags.
@@ -820,6 +820,9 @@ def get_callback(cb_name: str, cb: CallbackArgument):
     return """
         static %(ret_type)s %(cb_name)s(%(input_args)s)
         {
+            // Callbacks stored in, e.g., an AstBuild may be invoked from
+            // a call that released the GIL.
+            py::gil_scoped_acquire acquire_gil;
             py::object py_cb = py::borrow<py::object>(
                 (PyObject *) c_arg_user);
             try
@@ -891,6 +894,17 @@ def get_cb_type_sig(cb: CallbackArgument) -> str:
     return f"Callable[[{', '.join(arg_types)}], {ret_type}]"
 
 
+# Accessors for which releasing and reacquiring the GIL would cost more than
+# the call itself.
+CHEAP_METHOD_PREFIXES = ("get_", "has_", "dim", "copy")
+
+
+def releases_gil(meth: Method) -> bool:
+    # Callbacks call back into Python, so they need the GIL.
+    return (not any(isinstance(arg, CallbackArgument) for arg in meth.args)
+            and not meth.name.startswith(CHEAP_METHOD_PREFIXES))
+
+
 def write_wrapper(outf: TextIO, meth: Method):
     body: list[str] = []
     checks: list[str] = []
@@ -906,7 +920,33 @@ def write_wrapper(outf: TextIO, meth: Method):
     arg_names: list[str] = []
     arg_types: list[str] = []
 
-    checks.append("isl_ctx *islpy_ctx = nullptr;")
+    checks.extend([
+        "isl_ctx *islpy_ctx = nullptr;",
+        # Handed to the wrappers of newly-created objects, so that they need
+        # not look up their context's ctx_info.
+        "ctx_info *islpy_ctx_info = nullptr;",
+        ])
+
+    def lock_ctx(arg: Argument) -> None:
+        # Must happen before any isl calls involving the arguments, including
+        # the copies made for __isl_take arguments.
+        nonlocal have_ctx_lock
+
+        if arg.base_type == "isl_ctx":
+            checks.append(f"""
+                islpy_ctx = arg_{arg.name}.m_data;
+                """)
+        else:
+            checks.append(f"""
+                islpy_ctx = {arg.base_type}_get_ctx(arg_{arg.name}.m_data);
+                """)
+        checks.extend([
+            f"islpy_ctx_info = arg_{arg.name}.m_ctx_info;",
+            "ctx_lock islpy_ctx_lock(islpy_ctx_info);",
+            ])
+        have_ctx_lock = True
+
+    have_ctx_lock = False
 
     arg_idx = 0
     while arg_idx < len(meth.args):
@@ -1009,7 +1049,8 @@ def write_wrapper(outf: TextIO, meth: Method):
                     isl_val *tmp_ptr = isl_val_copy(arg_%(name)s->m_data);
                     if (!tmp_ptr)
                         throw isl::error("failed to copy arg %(name)s");
-                    unique_arg_%(name)s = std::unique_ptr<val>(new val(tmp_ptr));
+                    unique_arg_%(name)s = std::unique_ptr<val>(
+                        new val(tmp_ptr, arg_%(name)s->m_ctx_info));
                 }
                 catch (py::cast_error &err)
                 {
@@ -1025,7 +1066,8 @@ def write_wrapper(outf: TextIO, meth: Method):
                         if (!tmp_ptr)
                             throw isl::error("failed to create arg "
                                 "%(name)s from integer");
-                        unique_arg_%(name)s = std::unique_ptr<val>(new val(tmp_ptr));
+                        unique_arg_%(name)s = std::unique_ptr<val>(
+                            new val(tmp_ptr, islpy_ctx_info));
                     }
                 }
                 catch (py::cast_error &err)
@@ -1064,6 +1106,7 @@ def write_wrapper(outf: TextIO, meth: Method):
                         "name": arg.name,
                         "meth": f"{meth.cls}_{meth.name}",
                         "cls": arg_cls})
+                lock_ctx(arg)
                 passed_args.append(f"arg_{arg.name}.m_data")
                 post_call.append(f"arg_{arg.name}.invalidate();")
                 docs.append("..note::\n  {arg.name} is mutated in-place.\n\n")
@@ -1078,6 +1121,11 @@ def write_wrapper(outf: TextIO, meth: Method):
                         "passed invalid arg to isl_%(meth)s for %(name)s");
                     """ % {"name": arg.name, "meth": f"{meth.cls}_{meth.name}"})
 
+                # The first argument may be an enum, e.g. in
+                # isl_qpolynomial_fold_empty.
+                if not have_ctx_lock:
+                    lock_ctx(arg)
+
                 if arg.semantics is SEM_TAKE:
                     if arg_cls not in NON_COPYABLE:
                         input_args.append(
@@ -1085,13 +1133,17 @@ def write_wrapper(outf: TextIO, meth: Method):
                         checks.append("""
                             std::unique_ptr<%(cls)s> auto_arg_%(name)s;
                             {
-                                isl_%(cls)s *tmp_ptr =
-                                    isl_%(cls)s_copy(arg_%(name)s.m_data);
+                                bool consume = may_consume(arg_%(name)s);
+                                isl_%(cls)s *tmp_ptr = consume
+                                    ? arg_%(name)s.m_data
+                                    : isl_%(cls)s_copy(arg_%(name)s.m_data);
                                 if (!tmp_ptr)
                                     throw isl::error("failed to copy arg "
                                         "%(name)s on entry to %(meth)s");
                                 auto_arg_%(name)s = std::unique_ptr<%(cls)s>(
-                                    new %(cls)s(tmp_ptr));
+                                    new %(cls)s(tmp_ptr, arg_%(name)s.m_ctx_info));
+                                if (consume)
+                                    const_cast<%(cls)s &>(arg_%(name)s).invalidate();
                             }
                             """ % {
                                 "name": arg.name,
@@ -1111,16 +1163,12 @@ def write_wrapper(outf: TextIO, meth: Method):
                 else:
                     passed_args.append(f"arg_{arg.name}.m_data")
                     input_args.append(f"{arg_cls} const &arg_{arg.name}")
-
-            if arg_idx == 0:
-                if arg.base_type == "isl_ctx":
-                    checks.append(f"""
-                        islpy_ctx = arg_{arg.name}.m_data;
-                        """)
-                else:
-                    checks.append(f"""
-                        islpy_ctx = {arg.base_type}_get_ctx(arg_{arg.name}.m_data);
-                        """)
+                    if arg.base_type != "isl_ctx":
+                        # A consume() mark only applies to the next call,
+                        # even if that does not take the argument.
+                        checks.append(
+                                f"const_cast<{arg_cls} &>(arg_{arg.name})"
+                                ".m_consume = false;")
 
             if arg.name == "self":
                 arg_types.append(f"{arg.name}")
@@ -1151,7 +1199,7 @@ def write_wrapper(outf: TextIO, meth: Method):
                 if (ret_%(name)s)
                 {
                   py_ret_%(name)s = handle_from_new_ptr(
-                      new %(ret_cls)s(ret_%(name)s));
+                      new %(ret_cls)s(ret_%(name)s, islpy_ctx_info));
                 }
                 """ % {"name": arg.name, "ret_cls": ret_cls})
 
@@ -1177,6 +1225,14 @@ def write_wrapper(outf: TextIO, meth: Method):
         else:
             raise SignatureNotSupported(f"arg type {arg.base_type} {arg.ptr}")
 
+        if (isinstance(arg, Argument)
+                and arg.base_type.startswith("isl_")
+                and arg.ptr
+                and not have_ctx_lock):
+            raise AssertionError(
+                    f"{meth.c_name}: isl object {arg.name} used without "
+                    "holding the context lock")
+
         arg_idx += 1
 
     processed_return_type = f"{meth.return_base_type} {meth.return_ptr}".strip()
@@ -1184,14 +1240,27 @@ def write_wrapper(outf: TextIO, meth: Method):
     if meth.return_base_type == "void" and not meth.return_ptr:
         result_capture = ""
     else:
-        result_capture = f"{meth.return_base_type} {meth.return_ptr}result = "
+        body.append(f"{meth.return_base_type} {meth.return_ptr}result;")
+        result_capture = "result = "
 
     body = checks + body
 
     body.append("if (islpy_ctx) isl_ctx_reset_error(islpy_ctx);")
 
-    body.append("{}{}({});".format(
-        result_capture, meth.c_name, ", ".join(passed_args)))
+    call = "{}{}({});".format(
+        result_capture, meth.c_name, ", ".join(passed_args))
+
+    if have_ctx_lock and releases_gil(meth):
+        # Other threads may run Python code (or isl code on other contexts)
+        # meanwhile. The context lock keeps them off this context.
+        body.append(f"""
+            {{
+                py::gil_scoped_release release_gil;
+                {call}
+            }}
+            """)
+    else:
+        body.append(call)
 
     body += post_call
 
@@ -1297,7 +1366,9 @@ def write_wrapper(outf: TextIO, meth: Method):
                 raise Retry()
 
             processed_return_type = "py::object"
-            body.append(f"arg_{meth.args[0].name}.take_possession_of(result);")
+            body.append(
+                f"arg_{meth.args[0].name}"
+                ".take_possession_of(result, islpy_ctx_info);")
             body.append(f"return py_{meth.args[0].name};")
 
             ret_type = "Self"
@@ -1325,7 +1396,7 @@ def write_wrapper(outf: TextIO, meth: Method):
                 if (result)
                 {{
                     std::unique_ptr <isl::{ret_cls}>
-                        uptr_result(new {ret_cls}(result));
+                        uptr_result(new {ret_cls}(result, islpy_ctx_info));
                     return {isl_obj_ret_val};
                 }}
                 else
@@ -1444,6 +1515,36 @@ def write_exposer(
                    ', py::sig("def space(self) -> Space")'
                    ');\n')
 
+    if meth.name == "copy" and len(meth.args) == 1:
+        # isl objects are immutable values, so sharing the underlying object
+        # is as good as a deep copy (and keeps Id identity and user data).
+        outf.write(f'wrap_{wrap_class}.def('
+                   f'"__copy__", {func_name}'
+                   f', py::sig("def __copy__{type_sig}")'
+                   ');\n')
+        outf.write(f'wrap_{wrap_class}.def('
+                   f'"__deepcopy__", '
+                   f'[](isl::{wrap_class} const &self, py::handle memo)'
+                   f' {{ return {func_name}(self); }}'
+                   ', py::arg("memo")'
+                   ', py::sig("def __deepcopy__(self, memo: dict[int, object])'
+                   f' -> {type_sig.ret_type}")'
+                   ');\n')
+
+    if (meth.name == "is_equal" and not meth.is_static
+            and len(meth.args) == 2
+            and isinstance(meth.args[1], Argument)
+            and meth.args[1].base_type == meth.first_arg.base_type):
+        # native, for speed
+        outf.writelines(
+            f'wrap_{wrap_class}.def('
+            f'"{op_name}", isl::{op_func}<isl::{meth.cls}, {func_name}>'
+            ', py::arg("other"), py::is_operator()'
+            f', py::sig("def {op_name}(self, other: object) -> bool")'
+            ');\n'
+            for op_name, op_func in [
+                ("__eq__", "eq_operator"), ("__ne__", "ne_operator")])
+
     if meth.name in ["get_user", "get_name"]:
         outf.write(f'wrap_{wrap_class}.def_prop_ro('
                    f'"{meth.name[4:]}", {func_name}{args_str}'
@@ -1451,23 +1552,43 @@ def write_exposer(
 
     if meth.name == "read_from_str":
         assert meth.is_static
+        parse_args = (f"isl_{wrap_class}, isl_{meth.cls}_read_from_str, "
+                f"isl_{wrap_class}_copy, isl_{wrap_class}_free")
         outf.write(f'wrap_{wrap_class}.def("__init__",'
             f"[](isl::{wrap_class} *t, const char *s, isl::ctx *ctx_wrapper)"
             "{"
-            "    isl_ctx *ctx = nullptr;"
-            "    if (ctx_wrapper && ctx_wrapper->is_valid())"
-            "        ctx = ctx_wrapper->m_data;"
-            "    if (!ctx) ctx = isl::get_default_context();"
-            "    if (!ctx)"
-            f'        throw isl::error("from-string conversion of {meth.cls}: "'
-            f'                  "no context available");'
-            f"   isl_{wrap_class} *result = isl_{meth.cls}_read_from_str(ctx, s);"
+            "    isl::ctx_info *info = isl::ctx_info_or_default(ctx_wrapper,"
+            f'        "from-string conversion of {meth.cls}");'
+            "    isl::ctx_lock lock(info);"
+            f"   isl_{wrap_class} *result;"
+            "    {"
+            "        py::gil_scoped_release release_gil;"
+            f"       result = isl::parse_cached<{parse_args}>("
+            f'           info, "{meth.cls}", s);'
+            "    }"
             "    if (result)"
-            f"       new (t) isl::{wrap_class}(result);"
+            f"       new (t) isl::{wrap_class}(result, info);"
             "    else"
-            f'       isl::handle_isl_error(ctx, "isl_{meth.cls}_read_from_str");'
+            f'       isl::handle_isl_error(info->ctx, "isl_{meth.cls}_read_from_str");'
             '}, py::arg("s"), py::arg("context").none(true)=py::none());\n')
 
+        read_many_sig = ("(strings: collections.abc.Iterable[str], "
+                f"context: Context | None = None) -> list[{type_sig.ret_type}]")
+        outf.write(f'wrap_{wrap_class}.def_static("read_many",'
+            "[](py::handle strings, isl::ctx *ctx_wrapper)"
+            "{"
+            f"    return isl::read_many<isl::{wrap_class}, {parse_args}>("
+            f'        strings, ctx_wrapper, "{meth.cls}");'
+            '}, py::arg("strings"), py::arg("context").none(true)=py::none()'
+            f', py::sig("def read_many{read_many_sig}")'
+            f', "read_many{read_many_sig}\\n\\n"'
+            '"Parse each of *strings* in a single call, which releases the "'
+            '"GIL for its entire duration, and return a list of the "'
+            '"results. Failure to parse one of the strings raises "'
+            '":exc:`Error` with the index of that string.\\n\\n"'
+            '".. versionadded:: 2026.2"'
+            ');\n')
+
     # Handle auto-self-downcasts. These are deprecated.
     if not meth.is_static:
         for basic_cls in AUTO_DOWNCASTS.get(meth.cls, []):
@@ -1493,12 +1614,18 @@ def write_exposer(
                 f":class:`{to_py_class(basic_cls)}` to "
                 f":class:`{to_py_class(meth.cls)}`.")
             escaped_doc_str = downcast_doc_str.replace(newline, escaped_newline)
+            tgt_py_cls = to_py_class(meth.cls)
+            depr_msg = (f"{to_py_class(basic_cls)}.{py_name} "
+                f"with implicit conversion of self to {tgt_py_cls} is deprecated "
+                "and will stop working in 2026. "
+                f"Explicitly convert to {tgt_py_cls}, using .to_{meth.cls}().")
             outf.write(f"// automatic downcast to {meth.cls}\n")
             outf.write(f'wrap_{basic_cls}.def('
                        # Do not be tempted to pass 'arg_str' here, it will
                        # prevent implicit conversion.
                        # https://github.com/wjakob/nanobind/issues/1061
-                       f'"{py_name}", {func_name}'
+                       f'"{py_name}", '
+                       f'isl::deprecated_downcast({func_name}, "{depr_msg}")'
                        f', py::sig("def {py_name}{type_sig}")'
                        f', "{py_name}{type_sig}\\n{escaped_doc_str}"'
                        ');\n')
@@ -20,16 +20,49 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from collections.abc import Collection, Sequence
-from typing import Literal, TypeAlias, TypeVar, cast
+import io
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from functools import partial, update_wrapper
+from typing import IO, TYPE_CHECKING, Generic, Literal, TypeAlias, TypeVar, cast
+
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+    from islpy._pickler import Pickler
+    from islpy.version import VERSION, VERSION_TEXT
+
+    __version__: str
 
-from islpy.version import VERSION, VERSION_TEXT
 
+def __getattr__(name: str) -> object:
+    # The version is looked up lazily, see islpy.version.
+    if name in ("VERSION", "VERSION_TEXT", "__version__"):
+        from islpy import version
+        return getattr(version, "VERSION_TEXT" if name == "__version__" else name)
+    # Importing pickle takes a noticeable part of the time needed to import
+    # islpy.
+    if name == "Pickler":
+        from islpy._pickler import Pickler
+        return Pickler
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__version__ = VERSION_TEXT
 
 # {{{ name imports
 
+from islpy import _isl
 from islpy._isl import (
     AccessInfo,
     Aff,
@@ -120,7 +153,7 @@ from islpy._isl import (
 )
 
 # importing _monkeypatch has the side effect of actually monkeypatching
-from islpy._monkeypatch import _CHECK_DIM_TYPES, EXPR_CLASSES
+from islpy._monkeypatch import _CHECK_DIM_TYPES, EXPR_CLASSES, BasicT
 
 
 # }}}
@@ -137,6 +170,11 @@ Alignable: TypeAlias = (
 AlignableT = TypeVar("AlignableT", bound=Alignable)
 AlignableT2 = TypeVar("AlignableT2", bound=Alignable)
 
+CoefficientMapping: TypeAlias = (
+    Mapping[str | Literal[1], Val | int]
+    | Iterable[tuple[str | Literal[1], Val | int]]
+)
+
 # }}}
 
 
@@ -412,11 +450,527 @@ def affs_from_space(space: Space) -> dict[Literal[0] | str, PwAff]:
     return result
 
 
+# {{{ builders
+
+BuiltT = TypeVar("BuiltT", BasicSet, BasicMap, Aff)
+
+
+class _Builder(Generic[BuiltT]):
+    _obj: BuiltT | None
+
+    def __init__(self, obj: BuiltT) -> None:
+        # Take a reference of our own, so that the caller's object remains
+        # valid even though ours gets consumed.
+        self._obj = obj.copy()
+
+    def _pop(self) -> BuiltT:
+        if self._obj is None:
+            raise RuntimeError(
+                    f"{type(self).__name__}: build() was already called")
+        obj, self._obj = self._obj, None
+        return obj
+
+    def _take(self) -> BuiltT:
+        # for handing to isl without copying
+        return self._pop().consume()
+
+    def build(self) -> BuiltT:
+        """Return the object that was built. The builder may not be used
+        afterwards.
+        """
+        return self._pop()
+
+
+class _BasicBuilder(_Builder[BasicT]):
+    def __init__(self, obj: BasicT) -> None:
+        super().__init__(obj)
+        self._space: Space = obj.get_space()
+        self._name_to_dim: Mapping[str, tuple[dim_type, int]] | None = None
+
+    def add_constraint(self, constraint: Constraint) -> "Self":
+        self._obj = self._take().add_constraint(constraint)
+        return self
+
+    def add_constraints(self, constraints: Iterable[Constraint]) -> "Self":
+        obj = self._take()
+        for cns in constraints:
+            obj = obj.add_constraint(cns).consume()
+        self._obj = obj
+        return self
+
+    def _from_names(self,
+                cns: Constraint,
+                coefficients: CoefficientMapping,
+            ) -> Constraint:
+        if self._name_to_dim is None:
+            self._name_to_dim = self._space.get_var_dict()
+        return cns.set_coefficients_by_name(coefficients, self._name_to_dim)
+
+    def add_eq(self, coefficients: CoefficientMapping) -> "Self":
+        """Add the constraint ``const + coeff_1*var_1 + ... == 0``.
+
+        :param coefficients: a :class:`dict` or iterable of :class:`tuple`
+            instances mapping variable names to their coefficients.
+            The constant is set to the value of the key '1'.
+        """
+        return self.add_constraint(self._from_names(
+            Constraint.equality_alloc(self._space), coefficients))
+
+    def add_ineq(self, coefficients: CoefficientMapping) -> "Self":
+        """Add the constraint ``const + coeff_1*var_1 + ... >= 0``.
+
+        :param coefficients: see :meth:`add_eq`.
+        """
+        return self.add_constraint(self._from_names(
+            Constraint.inequality_alloc(self._space), coefficients))
+
+
+class BasicSetBuilder(_BasicBuilder[BasicSet]):
+    """Accumulates constraints into a :class:`BasicSet`.
+
+    Unlike repeated calls to :meth:`BasicSet.add_constraint`, which return a
+    new :class:`BasicSet` each time, the builder holds the only reference to
+    the set under construction, so that isl can add each constraint without
+    copying the constraints added so far.
+
+    Usage example::
+
+        bset = (isl.BasicSetBuilder(space)
+                .add_ineq({"i": 1})
+                .add_ineq({"n": 1, "i": -1, 1: -1})
+                .build())
+
+    .. automethod:: __init__
+    .. automethod:: add_constraint
+    .. automethod:: add_constraints
+    .. automethod:: add_eq
+    .. automethod:: add_ineq
+    .. automethod:: build
+
+    .. versionadded:: 2026.2
+    """
+
+    def __init__(self, space_or_bset: Space | BasicSet) -> None:
+        """
+        :param space_or_bset: If a :class:`Space`, start from the universe
+            of that space. Otherwise, add to (a copy of) the given set.
+        """
+        if isinstance(space_or_bset, Space):
+            space_or_bset = BasicSet.universe(space_or_bset)
+        super().__init__(space_or_bset)
+
+
+class BasicMapBuilder(_BasicBuilder[BasicMap]):
+    """Like :class:`BasicSetBuilder`, but for a :class:`BasicMap`.
+
+    .. automethod:: __init__
+    .. automethod:: add_constraint
+    .. automethod:: add_constraints
+    .. automethod:: add_eq
+    .. automethod:: add_ineq
+    .. automethod:: build
+
+    .. versionadded:: 2026.2
+    """
+
+    def __init__(self, space_or_bmap: Space | BasicMap) -> None:
+        """
+        :param space_or_bmap: If a :class:`Space`, start from the universe
+            of that space. Otherwise, add to (a copy of) the given map.
+        """
+        if isinstance(space_or_bmap, Space):
+            space_or_bmap = BasicMap.universe(space_or_bmap)
+        super().__init__(space_or_bmap)
+
+
+class AffBuilder(_Builder[Aff]):
+    """Sets the coefficients of an :class:`Aff` without copying it at each
+    step. See :class:`BasicSetBuilder`.
+
+    .. automethod:: __init__
+    .. automethod:: set_coefficients
+    .. automethod:: set_coefficients_by_name
+    .. automethod:: set_constant
+    .. automethod:: build
+
+    .. versionadded:: 2026.2
+    """
+
+    def __init__(self, space_or_aff: Space | LocalSpace | Aff) -> None:
+        """
+        :param space_or_aff: If a (local) space, start from the zero
+            expression on that space. Otherwise, modify (a copy of) the
+            given :class:`Aff`.
+        """
+        if isinstance(space_or_aff, Space):
+            space_or_aff = LocalSpace.from_space(space_or_aff)
+        if isinstance(space_or_aff, LocalSpace):
+            space_or_aff = Aff.zero_on_domain(space_or_aff)
+        super().__init__(space_or_aff)
+        self._name_to_dim: Mapping[str, tuple[dim_type, int]] | None = None
+
+    def set_coefficients(self,
+                dim_tp: dim_type,
+                args: Sequence[Val | int],
+            ) -> "Self":
+        """
+        :param args: coefficients for indices ``0..len(args)-1``
+            of *dim_tp*.
+        """
+        obj = self._take()
+        for i, coeff in enumerate(args):
+            obj = obj.set_coefficient_val(dim_tp, i, coeff).consume()
+        self._obj = obj
+        return self
+
+    def set_coefficients_by_name(self, coefficients: CoefficientMapping) -> "Self":
+        """
+        :param coefficients: a :class:`dict` or iterable of :class:`tuple`
+            instances mapping variable names to their coefficients.
+            The constant is set to the value of the key '1'.
+        """
+        obj = self._take()
+        if self._name_to_dim is None:
+            self._name_to_dim = obj.get_var_dict()
+        if isinstance(coefficients, Mapping):
+            coefficients = coefficients.items()
+
+        for name, coeff in coefficients:
+            if name == 1:
+                obj = obj.set_constant_val(coeff).consume()
+            else:
+                tp, idx = self._name_to_dim[name]
+                obj = obj.set_coefficient_val(tp, idx, coeff).consume()
+        self._obj = obj
+        return self
+
+    def set_constant(self, value: Val | int) -> "Self":
+        self._obj = self._take().set_constant_val(value)
+        return self
+
+# }}}
+
+
+# {{{ result caching
+
+#: The methods whose results are cached by :func:`enable_result_cache`.
+CACHED_METHODS: Mapping[type, tuple[str, ...]] = {
+    cls: tuple(name for name in (
+            "coalesce", "convex_hull", "affine_hull", "simple_hull",
+            "polyhedral_hull", "detect_equalities", "remove_redundancies",
+            "is_empty", "is_bounded", "is_single_valued", "is_injective",
+            "is_bijective", "lexmin", "lexmax", "dim_max", "dim_min",
+            ) if name in cls.__dict__)
+    for cls in (BasicSet, Set, BasicMap, Map, PwAff, UnionSet, UnionMap)
+}
+
+_RESULT_CACHE_ATTR = "_islpy_result_cache"
+_CACHEABLE_ARG_TYPES = (int, str, dim_type)
+
+
+class _ResultCache:
+    # The results are stored in a dict on each object (so that they go away
+    # with the object), this only keeps track of the order in which they
+    # were used.
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        # reentrant, since dropping an object while holding the lock runs
+        # _remove_object
+        self.lock = threading.RLock()
+        self.lru: OrderedDict[
+            tuple[int, str, tuple[object, ...]],
+            weakref.ref[object]] = OrderedDict()
+        # the keys in lru of each object, so that they can be removed when
+        # the object dies (before its id can be reused)
+        self.obj_keys: dict[
+            int,
+            tuple[weakref.ref[object],
+                  set[tuple[int, str, tuple[object, ...]]]]] = {}
+
+    def _remove_object(self, obj_id: int, obj_ref: weakref.ref[object]) -> None:
+        with self.lock:
+            entry = self.obj_keys.get(obj_id)
+            if entry is None or entry[0] is not obj_ref:
+                return
+            del self.obj_keys[obj_id]
+            for lru_key in entry[1]:
+                del self.lru[lru_key]
+
+    def get(self, obj: object, key: tuple[str, tuple[object, ...]]) -> object:
+        results = obj.__dict__.get(_RESULT_CACHE_ATTR)
+        if results is None:
+            raise KeyError(key)
+
+        result = results[key]
+        if not getattr(result, "_is_valid", lambda: True)():
+            # consumed by the caller
+            del results[key]
+            raise KeyError(key)
+
+        with self.lock:
+            lru_key = (id(obj), *key)
+            if lru_key in self.lru:
+                self.lru.move_to_end(lru_key)
+        return result
+
+    def add(self, obj: object, key: tuple[str, tuple[object, ...]],
+                result: object) -> None:
+        obj.__dict__.setdefault(_RESULT_CACHE_ATTR, {})[key] = result
+
+        with self.lock:
+            obj_id = id(obj)
+            entry = self.obj_keys.get(obj_id)
+            if entry is None:
+                entry = self.obj_keys[obj_id] = (
+                        weakref.ref(obj, partial(self._remove_object, obj_id)),
+                        set())
+
+            lru_key = (obj_id, *key)
+            self.lru[lru_key] = entry[0]
+            self.lru.move_to_end(lru_key)
+            entry[1].add(lru_key)
+
+            while len(self.lru) > self.max_entries:
+                (evicted_id, *evicted_key), obj_ref = self.lru.popitem(last=False)
+                keys = self.obj_keys[evicted_id][1]
+                keys.discard((evicted_id, *evicted_key))
+                if not keys:
+                    del self.obj_keys[evicted_id]
+
+                evicted_obj = obj_ref()
+                if evicted_obj is not None:
+                    evicted_obj.__dict__.get(_RESULT_CACHE_ATTR, {}).pop(
+                            tuple(evicted_key), None)
+
+
+_RESULT_CACHE: _ResultCache | None = None
+_UNCACHED_METHODS: dict[tuple[type, str], Callable[..., object]] = {}
+
+
+def _make_cached_method(name: str, method: Callable[..., object]):
+    def wrapper(self: object, *args: object, **kwargs: object) -> object:
+        cache = _RESULT_CACHE
+        # keyword arguments would need to be normalized for the key
+        if cache is None or kwargs or not all(
+                isinstance(arg, _CACHEABLE_ARG_TYPES) for arg in args):
+            return method(self, *args, **kwargs)
+
+        key = (name, args)
+        try:
+            return cache.get(self, key)
+        except KeyError:
+            pass
+
+        result = method(self, *args)
+        cache.add(self, key, result)
+        return result
+
+    return update_wrapper(wrapper, method)
+
+
+def enable_result_cache(max_entries: int = 10000) -> None:
+    """Cache the results of the methods in :data:`CACHED_METHODS`, which
+    only depend on the object they are called on (and on integer or
+    :class:`dim_type` arguments), so that asking the same question of the
+    same object repeatedly does not repeat the computation. Results are
+    stored with the object and are freed with it. In addition, at most
+    *max_entries* results are kept in total, evicting those that were
+    least recently used.
+
+    Calling this again changes *max_entries* and clears the cache.
+    To share results between objects that are equal but were created
+    separately, use :meth:`Context.intern`.
+
+    .. note::
+
+        Since cached results are shared between callers, do not pass them
+        to methods with :ref:`consume() <consuming-arguments>`. (If that
+        happens anyway, the result is recomputed on the next call.)
+
+    .. versionadded:: 2026.2
+    """
+    global _RESULT_CACHE
+    if _RESULT_CACHE is not None:
+        disable_result_cache()
+
+    for cls, names in CACHED_METHODS.items():
+        for name in names:
+            method = cls.__dict__[name]
+            _UNCACHED_METHODS[cls, name] = method
+            setattr(cls, name, _make_cached_method(name, method))
+
+    _RESULT_CACHE = _ResultCache(max_entries)
+
+
+def disable_result_cache() -> None:
+    """Undo :func:`enable_result_cache` and drop the cached results.
+
+    .. versionadded:: 2026.2
+    """
+    global _RESULT_CACHE
+    if _RESULT_CACHE is None:
+        return
+
+    cache = _RESULT_CACHE
+    _RESULT_CACHE = None
+
+    for (cls, name), method in _UNCACHED_METHODS.items():
+        setattr(cls, name, method)
+    _UNCACHED_METHODS.clear()
+
+    with cache.lock:
+        obj_refs = [obj_ref for obj_ref, _ in cache.obj_keys.values()]
+        cache.obj_keys.clear()
+        cache.lru.clear()
+        for obj_ref in obj_refs:
+            obj = obj_ref()
+            if obj is not None:
+                obj.__dict__.pop(_RESULT_CACHE_ATTR, None)
+
+# }}}
+
+
+# {{{ streaming input
+
+#: The classes that :func:`iter_read` can read.
+STREAM_READ_CLASSES: tuple[type, ...] = (
+    BasicSet, Set, Map, UnionSet, UnionMap, PwQPolynomial,
+    MultiAff, MultiVal, Val, Schedule)
+
+StreamReadT = TypeVar("StreamReadT",
+    BasicSet, Set, Map, UnionSet, UnionMap, PwQPolynomial,
+    MultiAff, MultiVal, Val, Schedule)
+
+
+_ITER_READ_CHUNK_SIZE = 1 << 16
+
+
+def _is_os_file(source: object) -> bool:
+    return (isinstance(source, io.FileIO)
+            or (isinstance(source, io.BufferedReader)
+                and isinstance(source.raw, io.FileIO)))
+
+
+def _feed_pipe(
+            source: IO[str] | IO[bytes],
+            fd: int,
+            errors: list[BaseException],
+        ) -> None:
+    # Runs in a separate thread, while isl reads from the other end.
+    try:
+        while chunk := source.read(_ITER_READ_CHUNK_SIZE):
+            view = memoryview(chunk.encode() if isinstance(chunk, str) else chunk)
+            while view:
+                view = view[os.write(fd, view):]
+    except BrokenPipeError:
+        # the reader was closed before the end of the input
+        pass
+    except BaseException as e:  # ruff:ignore[blind-except]
+        # re-raised by iter_read in the consuming thread
+        errors.append(e)
+    finally:
+        os.close(fd)
+
+
+def iter_read(
+            source: str | os.PathLike[str] | IO[str] | IO[bytes],
+            cls: type[StreamReadT],
+            context: Context | None = None,
+        ) -> Iterator[StreamReadT]:
+    """Yield the objects of type *cls* (one of :data:`STREAM_READ_CLASSES`)
+    that are stored in isl's text format in *source*, one after the other,
+    separated by whitespace and/or semicolons.
+
+    Objects are parsed one at a time by isl's stream parser as they are
+    requested, so that only the current object (and a buffer of bounded
+    size) needs to be held in memory. Paths and binary files opened with
+    ``"rb"`` are read by isl directly. Other file-like objects (such as text
+    files, :func:`gzip.open` files or :class:`io.StringIO`) are read in
+    chunks by a helper thread.
+
+    A file object is read from its current position. While and after
+    reading, its position is unspecified: it may have been advanced past
+    the objects that have been yielded so far (but not necessarily to the
+    end of the input), so it should be seeked before being used again. If
+    the iteration stops before the end of the input, the helper thread is
+    not waited for, and may continue with a call to ``read`` on the file
+    object that is already in progress.
+
+    :arg context: the context for the objects, by default
+        :data:`DEFAULT_CONTEXT`.
+    :raises Error: if an object cannot be parsed, with its index in the
+        message.
+
+    .. versionadded:: 2026.2
+    """
+    if cls not in STREAM_READ_CLASSES:
+        raise TypeError(f"cannot read objects of type '{cls.__name__}'")
+    if context is None:
+        context = DEFAULT_CONTEXT
+
+    reader = _isl._StreamReader(context, cls._base_name)
+    feeder: threading.Thread | None = None
+    feed_errors: list[BaseException] = []
+    at_end = False
+    try:
+        if isinstance(source, str | os.PathLike) or _is_os_file(source):
+            if isinstance(source, str | os.PathLike):
+                fd = os.open(source, os.O_RDONLY)
+            else:
+                pos = source.tell()
+                fd = os.dup(source.fileno())
+                try:
+                    os.lseek(fd, pos, os.SEEK_SET)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            # closes fd, even if it fails
+            reader.open_fd(fd)
+        else:
+            read_fd, write_fd = os.pipe()
+            try:
+                reader.open_fd(read_fd)
+            except BaseException:
+                os.close(write_fd)
+                raise
+            feeder = threading.Thread(
+                    target=_feed_pipe, args=(source, write_fd, feed_errors),
+                    daemon=True)
+            feeder.start()
+
+        while True:
+            try:
+                obj = reader.read_next()
+            except Error:
+                # likely caused by the input ending early
+                if feed_errors:
+                    raise feed_errors[0] from None
+                raise
+            if obj is None:
+                at_end = True
+                break
+            yield cast("StreamReadT", obj)
+
+        if feed_errors:
+            raise feed_errors[0]
+    finally:
+        reader.close()
+        # Otherwise, the helper thread may be blocked reading from source
+        # (for arbitrarily long). It stops once that returns, since the pipe
+        # has been closed.
+        if feeder is not None and at_end:
+            feeder.join()
+
+# }}}
+
+
 __all__ = (
     "VERSION",
     "VERSION_TEXT",
     "AccessInfo",
     "Aff",
+    "AffBuilder",
     "AffList",
     "AstBuild",
     "AstExpr",
@@ -425,8 +979,10 @@ __all__ = (
     "AstNodeList",
     "AstPrintOptions",
     "BasicMap",
+    "BasicMapBuilder",
     "BasicMapList",
     "BasicSet",
+    "BasicSetBuilder",
     "BasicSetList",
     "Cell",
     "Constraint",
@@ -447,6 +1003,7 @@ __all__ = (
     "MultiPwAff",
     "MultiUnionPwAff",
     "MultiVal",
+    "Pickler",
     "Point",
     "Printer",
     "PwAff",
@@ -1,7 +1,8 @@
-import os
-import re
+import operator
+import threading
+import weakref
 from collections.abc import Callable, Collection, Iterable, Mapping, Sequence
-from functools import update_wrapper
+from functools import partial
 from sys import intern
 from typing import (
     TYPE_CHECKING,
@@ -14,10 +15,14 @@ from typing import (
     TypeVar,
     cast,
 )
-from warnings import warn
 
 
 if TYPE_CHECKING:
+    import hashlib
+
+    import numpy as np
+    from numpy.typing import DTypeLike
+
     from islpy import _isl
 else:
     import sys
@@ -36,6 +41,26 @@ EXPR_CLASSES: tuple[type, ...] = tuple(cls for cls in ALL_CLASSES
 ARITH_CLASSES: tuple[type, ...] = (
     _isl.Aff, _isl.PwAff, _isl.QPolynomial, _isl.PwQPolynomial)
 
+# Classes pickled using the binary format, see src/wrapper/wrap_isl_binary.cpp.
+BINARY_PICKLE_CLASSES: tuple[type, ...] = (
+    _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map,
+    _isl.UnionSet, _isl.UnionMap,
+    _isl.Aff, _isl.QPolynomial, _isl.PwQPolynomial, _isl.Space)
+
+# Classes with stable_hash, see obj_stable_hash.
+STABLE_HASH_CLASSES: tuple[type, ...] = (
+    _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map,
+    _isl.UnionSet, _isl.UnionMap,
+    _isl.Aff, _isl.PwAff, _isl.QPolynomial, _isl.PwQPolynomial, _isl.Space)
+# Classes that can be passed to Context.intern, see context_intern.
+INTERN_CLASSES: tuple[type, ...] = (
+    _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map,
+    _isl.UnionSet, _isl.UnionMap,
+    _isl.Aff, _isl.PwAff, _isl.MultiPwAff)
+_COALESCE_CLASSES: tuple[type, ...] = (
+    _isl.Set, _isl.Map, _isl.UnionSet, _isl.UnionMap,
+    _isl.PwAff, _isl.PwQPolynomial)
+
 _CHECK_DIM_TYPES: tuple[_isl.dim_type, ...] = (
         _isl.dim_type.in_, _isl.dim_type.param, _isl.dim_type.set)
 
@@ -52,21 +77,18 @@ BasicT = TypeVar("BasicT", _isl.BasicSet, _isl.BasicMap)
 
 AffOrConstraintT = TypeVar("AffOrConstraintT", _isl.Aff, _isl.Constraint)
 AffLikeT = TypeVar("AffLikeT", _isl.Aff, _isl.PwAff)
-ExprLike: TypeAlias = _isl.Aff | _isl.PwAff | _isl.QPolynomial | _isl.PwQPolynomial
 ExprLikeT = TypeVar("ExprLikeT", _isl.Aff, _isl.PwAff,
                    _isl.QPolynomial, _isl.PwQPolynomial
                )
 SetLikeT = TypeVar("SetLikeT", bound=_isl.BasicSet | _isl.Set)
 
-SetOrBasic: TypeAlias = _isl.BasicSet | _isl.Set
-SetOrBasicT = TypeVar("SetOrBasicT", bound=SetOrBasic)
-
-MapOrBasic: TypeAlias = _isl.BasicMap | _isl.Map
-MapOrBasicT = TypeVar("MapOrBasicT", bound=MapOrBasic)
-
 SetOrMap: TypeAlias = _isl.BasicSet | _isl.Set | _isl.BasicMap | _isl.Map
 SetOrMapT = TypeVar("SetOrMapT", _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map)
 
+ConsumableT = TypeVar("ConsumableT",
+    _isl.Aff, _isl.Constraint,
+    _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map)
+
 HasDimNames: TypeAlias = (
     _isl.Space
     | _isl.Constraint
@@ -95,6 +117,9 @@ class IslObject(Protocol):
     def _wraps_same_instance_as(self, other: object) -> bool:
         ...
 
+    def _is_valid(self) -> bool:
+        ...
+
     _base_name: ClassVar[str]
 
 # }}}
@@ -167,6 +192,24 @@ def _read_from_str_wrapper(cls, context, s, dims_with_apostrophes):
     return cls_from_str
 
 
+def _read_from_binary_wrapper(context, data):
+    """A callable to reconstitute instances from the binary format for the
+    benefit of Python's ``__reduce__`` protocol.
+    """
+    return _isl._decode_binary(context, data)
+
+
+def _read_from_binary_parts(space, data):
+    """Like :func:`_read_from_binary_wrapper`, for objects encoded without
+    their space. See :class:`islpy.Pickler`.
+    """
+    return _isl._decode_binary_with_space(space, data)
+
+
+def _shared(obj):
+    return obj
+
+
 def dim_type_reduce(self: _isl.dim_type):
     return (_isl.dim_type, (int(self),))
 
@@ -179,6 +222,10 @@ def context_reduce(self: _isl.Context):
         return (_isl.Context, ())
 
 
+def id_reduce(self: _isl.Id):
+    return (_isl.Id, (self.name, self.user, self.get_ctx()))
+
+
 def context_eq(self: IslObject, other: object):
     return isinstance(other, _isl.Context) and self._wraps_same_instance_as(other)
 
@@ -187,6 +234,128 @@ def context_ne(self: object, other: object) -> bool:
     return not self.__eq__(other)
 
 
+# {{{ interning
+
+InternT = TypeVar("InternT",
+    _isl.BasicSet, _isl.Set, _isl.BasicMap, _isl.Map,
+    _isl.UnionSet, _isl.UnionMap,
+    _isl.Aff, _isl.PwAff, _isl.MultiPwAff)
+
+# Reentrant, since dropping a reference while holding the lock may run
+# _remove_interned.
+_INTERN_LOCK = threading.RLock()
+
+# Maps hash(ctx) (i.e. the address of the isl_ctx) to the intern table of
+# that context, which maps _intern_key(obj) to weak references to the
+# interned objects with that key. Tables (and entries) are removed once
+# they become empty, and the interned objects keep their context alive, so
+# a table never outlives its context.
+_INTERN_TABLES: dict[int, dict[tuple[object, ...], list[weakref.ref[object]]]] = {}
+
+
+def _intern_key(obj: InternT) -> tuple[object, ...]:
+    # get_hash and is_equal ignore the names of dimensions, which should
+    # however survive interning.
+    spaces: list[str] = []
+    if isinstance(obj, _isl.UnionSet):
+        obj.foreach_set(lambda s: spaces.append(str(s.get_space())))
+    elif isinstance(obj, _isl.UnionMap):
+        obj.foreach_map(lambda m: spaces.append(str(m.get_space())))
+    else:
+        spaces.append(str(obj.get_space()))
+
+    return (type(obj), hash(obj), tuple(sorted(spaces)))
+
+
+def _remove_interned(
+            ctx_key: int,
+            key: tuple[object, ...],
+            ref: weakref.ref[object]
+        ) -> None:
+    with _INTERN_LOCK:
+        table = _INTERN_TABLES.get(ctx_key)
+        if table is None:
+            return
+        bucket = table.get(key)
+        if bucket is None:
+            return
+
+        if ref in bucket:
+            bucket.remove(ref)
+        if not bucket:
+            del table[key]
+            if not table:
+                del _INTERN_TABLES[ctx_key]
+
+
+def _intern_is_equal(a: InternT, b: InternT) -> bool:
+    if isinstance(a, _isl.Aff):
+        # Aff.is_equal is that of PwAff, with a deprecated conversion.
+        return a.plain_is_equal(b)
+    return a.is_equal(b)
+
+
+def context_intern(self: _isl.Context, obj: InternT) -> InternT:
+    """Return a canonical instance of *obj*: the first object passed to
+    this method (and still alive) that is equal to *obj*, or else *obj*
+    itself. Equal objects may thereby share a single wrapper, along with
+    the state attached to it, such as cached results (see
+    :func:`islpy.enable_result_cache`).
+
+    Objects are equal if they are of the same type, have the same names
+    for their dimensions, and ``is_equal`` (``plain_is_equal`` for
+    :class:`Aff`) holds between them. The intern
+    table of each context holds its objects weakly, so interning does not
+    keep objects alive.
+
+    Supported are :class:`BasicSet`, :class:`Set`, :class:`BasicMap`,
+    :class:`Map`, :class:`UnionSet`, :class:`UnionMap`, :class:`Aff`,
+    :class:`PwAff` and :class:`MultiPwAff`.
+
+    .. note::
+
+        Interned objects are shared, so they must not be consumed (see
+        :ref:`consuming-arguments`). Interned objects that have been
+        consumed nonetheless are ignored.
+
+    .. versionadded:: 2026.2
+    """
+    if not isinstance(obj, INTERN_CLASSES):
+        raise TypeError(f"cannot intern objects of type '{type(obj).__name__}'")
+    if not self._wraps_same_instance_as(obj.get_ctx()):
+        raise ValueError("cannot intern an object of a different context")
+
+    ctx_key = hash(self)
+    key = _intern_key(obj)
+
+    # is_equal waits for the context lock, so it must not be called while
+    # holding _INTERN_LOCK: another thread holding the context lock (e.g. in
+    # a callback) may drop the last reference to an interned object and
+    # then wait for _INTERN_LOCK in _remove_interned. For the same reason,
+    # *seen* keeps the candidates alive until the lock has been released.
+    seen: list[InternT] = []
+    while True:
+        n_checked = len(seen)
+        with _INTERN_LOCK:
+            for ref in _INTERN_TABLES.get(ctx_key, {}).get(key, []):
+                other = ref()
+                if other is obj:
+                    return obj
+                if other is not None and not any(other is s for s in seen):
+                    seen.append(cast("InternT", other))
+
+            if len(seen) == n_checked:
+                _INTERN_TABLES.setdefault(ctx_key, {}).setdefault(key, []).append(
+                        weakref.ref(obj, partial(_remove_interned, ctx_key, key)))
+                return obj
+
+        for other in seen[n_checked:]:
+            if other._is_valid() and _intern_is_equal(other, obj):
+                return other
+
+# }}}
+
+
 def generic_reduce(self: HasSpace):
     ctx = self.get_ctx()
     prn = _isl.Printer.to_str(ctx)
@@ -194,25 +363,166 @@ def generic_reduce(self: HasSpace):
 
     # Reconstructing from string will remove apostrophes in dim names,
     # so keep track of dim names with apostrophes
-    dims_with_apostrophes = {
-        dname: pos for dname, pos in self.get_var_dict().items()
-        if "'" in dname}
+    if hasattr(self, "get_var_dict"):
+        dims_with_apostrophes = {
+            dname: pos for dname, pos in self.get_var_dict().items()
+            if "'" in dname}
+    else:
+        # e.g. Schedule, Val
+        dims_with_apostrophes = {}
 
     return (
         _read_from_str_wrapper,
         (type(self), ctx, prn.get_str(), dims_with_apostrophes))
 
 
+def binary_reduce(self: IslObject):
+    data = _isl._encode_binary(self)
+    if data is None:
+        # not representable in the binary format, e.g. rational sets
+        return generic_reduce(self)
+
+    return (_read_from_binary_wrapper, (self.get_ctx(), data))
+
+
+# Strings up to this length are kept on the object by generic_str, so that
+# converting the same object repeatedly does not print it again. (isl
+# objects are immutable, so the string does not go stale.)
+STR_CACHE_MAX_LENGTH = 4096
+
+_STR_CACHE_ATTR = "_islpy_str"
+
+
 def generic_str(self: IslObject) -> str:
+    result = self.__dict__.get(_STR_CACHE_ATTR)
+    if result is not None and self._is_valid():
+        return result
+
     prn = _isl.Printer.to_str(self.get_ctx())
     getattr(prn, f"print_{self._base_name}")(self)
-    return prn.get_str()
+    result = prn.get_str()
+
+    if len(result) <= STR_CACHE_MAX_LENGTH:
+        self.__dict__[_STR_CACHE_ATTR] = result
+    return result
 
 
 def generic_repr(self: IslObject) -> str:
-    prn = _isl.Printer.to_str(self.get_ctx())
-    getattr(prn, f"print_{self._base_name}")(self)
-    return f'{type(self).__name__}("{prn.get_str()}")'
+    return f'{type(self).__name__}("{generic_str(self)}")'
+
+
+def printer_print_many(
+            self: _isl.Printer,
+            objs: Iterable[IslObject],
+            separator: str = "\n",
+        ) -> _isl.Printer:
+    """Print each of *objs* (using the ``print_*`` method for its type),
+    separated by *separator*, and return *self*. Printing many objects into
+    one printer avoids the cost of creating a printer per object, e.g.::
+
+        text = isl.Printer.to_str(ctx).print_many(sets).get_str()
+
+    .. versionadded:: 2026.2
+    """
+    for i, obj in enumerate(objs):
+        if i:
+            self.print_str(separator)
+        getattr(self, f"print_{obj._base_name}")(obj)
+
+    return self
+
+
+# {{{ stable hashing
+
+def obj_stable_hash(self: IslObject) -> str:
+    """Return a hash of *self* (as a string of hexadecimal digits) that,
+    unlike :func:`hash`, is the same in every process, so that it can be
+    used as a key for persistent or distributed caches.
+
+    The hash only depends on the names of the tuples and dimensions
+    (not on the identity of :class:`Id` objects) and on the constraints
+    (or terms) of *self*, after normalizing it with ``coalesce()``.
+    The order in which isl stores constraints, pieces or the members of
+    unions does not matter. Since isl does not provide a fully canonical
+    form, equal objects constructed in different ways may still have
+    different hashes. Hashes may change between versions of isl.
+
+    .. versionadded:: 2026.2
+    """
+    if isinstance(self, _COALESCE_CLASSES):
+        self = self.coalesce()  # pyright: ignore[reportAttributeAccessIssue]
+
+    data = _isl._encode_canonical(self)  # pyright: ignore[reportCallIssue, reportArgumentType]
+    if data is None:
+        # not representable in the binary format, e.g. rational sets
+        data = f"{type(self).__name__}:{self}".encode()
+
+    import hashlib
+    return hashlib.sha256(data).hexdigest()
+
+
+def _update_schedule_node_hash(
+            h: "hashlib._Hash",
+            node: _isl.ScheduleNode
+        ) -> None:
+    nt = _isl.schedule_node_type
+    node_type = node.get_type()
+
+    parts: list[object]
+    if node_type == nt.band:
+        n_member = node.band_n_member()
+        parts = [
+            node.band_get_partial_schedule_union_map(),
+            node.band_get_permutable(),
+            [node.band_member_get_coincident(i) for i in range(n_member)],
+            [node.band_member_get_ast_loop_type(i).name
+             for i in range(n_member)],
+            node.band_get_ast_build_options(),
+            ]
+    elif node_type == nt.context:
+        parts = [node.context_get_context()]
+    elif node_type == nt.domain:
+        parts = [node.domain_get_domain()]
+    elif node_type == nt.expansion:
+        # the contraction is determined by the expansion
+        parts = [node.expansion_get_expansion()]
+    elif node_type == nt.extension:
+        parts = [node.extension_get_extension()]
+    elif node_type == nt.filter:
+        parts = [node.filter_get_filter()]
+    elif node_type == nt.guard:
+        parts = [node.guard_get_guard()]
+    elif node_type == nt.mark:
+        parts = [node.mark_get_id().name]
+    else:
+        parts = []
+
+    h.update(f"{node_type.name}:".encode())
+    for part in parts:
+        h.update(part.stable_hash().encode()
+                 if isinstance(part, STABLE_HASH_CLASSES)
+                 else repr(part).encode())
+        h.update(b";")
+
+    n_children = node.n_children()
+    h.update(f"{n_children}:".encode())
+    for i in range(n_children):
+        _update_schedule_node_hash(h, node.child(i))
+
+
+def schedule_stable_hash(self: _isl.Schedule) -> str:
+    """Like :meth:`Set.stable_hash`. The hash depends on the structure of
+    the schedule tree and on the stable hashes of the objects (such as
+    domains, filters and partial schedules) in its nodes.
+
+    .. versionadded:: 2026.2
+    """
+    import hashlib
+    h = hashlib.sha256()
+    _update_schedule_node_hash(h, self.get_root())
+    return h.hexdigest()
+
+# }}}
 
 
 def space_get_id_dict(
@@ -328,104 +638,13 @@ def space_create_from_names(
     return result
 
 
-def set_or(
-            self: _isl.Set,
-            other: _isl.Set | _isl.BasicSet,
-        ) -> _isl.Set:
-    try:
-        return self.union(other)
-    except TypeError:
-        return NotImplemented
-
-
-def bset_and(
-            self: _isl.BasicSet,
-            other: SetOrBasicT,
-        ) -> SetOrBasicT:
-    if isinstance(other, _isl.Set):
-        try:
-            return self.to_set().intersect(other)
-        except TypeError:
-            return NotImplemented
-    else:
-        try:
-            return self.intersect(other)
-        except TypeError:
-            return NotImplemented
-
-
-def set_and(
-            self: _isl.Set,
-            other: _isl.Set | _isl.BasicSet,
-        ) -> _isl.Set:
-    if isinstance(self, _isl.BasicSet):
-        self = self.to_set()
-    try:
-        return self.intersect(other)
-    except TypeError:
-        return NotImplemented
-
-
-def set_sub(
-            self: _isl.Set | _isl.BasicSet,
-            other: _isl.Set | _isl.BasicSet,
-        ) -> _isl.Set:
-    if isinstance(self, _isl.BasicSet):
-        self = self.to_set()
-    try:
-        return self.subtract(other)
-    except TypeError:
-        return NotImplemented
-
-
-def map_or(
-            self: _isl.Map | _isl.BasicMap,
-            other: _isl.Map | _isl.BasicMap,
-        ) -> _isl.Map:
-    if isinstance(self, _isl.BasicMap):
-        self = self.to_map()
-    try:
-        return self.union(other)
-    except TypeError:
-        return NotImplemented
-
-
-def bmap_and(
-            self: _isl.BasicMap,
-            other: MapOrBasicT,
-        ) -> MapOrBasicT:
-    if isinstance(other, _isl.Map):
-        try:
-            return self.to_map().intersect(other)
-        except TypeError:
-            return NotImplemented
-    else:
-        try:
-            return self.intersect(other)
-        except TypeError:
-            return NotImplemented
-
-
-def map_and(
-            self: _isl.Map,
-            other: _isl.Map | _isl.BasicMap,
-        ) -> _isl.Map:
-    try:
-        return self.intersect(other)
-    except TypeError:
-        return NotImplemented
-
-
-def map_sub(
-            self: _isl.Map | _isl.BasicMap,
-            other: _isl.Map | _isl.BasicMap,
-        ) -> _isl.Map:
-    if isinstance(self, _isl.BasicMap):
-        self = self.to_map()
-    try:
-        return self.subtract(other)
-    except TypeError:
-        return NotImplemented
+def _own(result: ConsumableT, orig: ConsumableT) -> ConsumableT:
+    """Mark the intermediate result *result* of a sequence of operations
+    on *orig* to be :ref:`consumed <consuming-arguments>` by the next one.
+    """
+    if result is orig:
+        return result
+    return result.consume()
 
 
 def obj_set_coefficients(
@@ -440,10 +659,11 @@ def obj_set_coefficients(
     .. versionchanged:: 2011.3
         New for :class:`Aff`
     """
+    result = self
     for i, coeff in enumerate(args):
-        self = self.set_coefficient_val(dim_tp, i, coeff)
+        result = _own(result, self).set_coefficient_val(dim_tp, i, coeff)
 
-    return self
+    return result
 
 
 def obj_set_coefficients_by_name(
@@ -471,15 +691,16 @@ def obj_set_coefficients_by_name(
     if name_to_dim is None:
         name_to_dim = obj_get_var_dict(self)
 
+    result = self
     for name, coeff in coeff_iterable:
         if name == 1:
-            self = self.set_constant_val(coeff)
+            result = _own(result, self).set_constant_val(coeff)
         else:
             assert name
             tp, idx = name_to_dim[name]
-            self = self.set_coefficient_val(tp, idx, coeff)
+            result = _own(result, self).set_coefficient_val(tp, idx, coeff)
 
-    return self
+    return result
 
 
 def obj_get_coefficients_by_name(
@@ -560,31 +781,6 @@ def ineq_from_names(
     return obj_set_coefficients_by_name(c, coefficients)
 
 
-def basic_obj_get_constraints(
-            self: _isl.BasicSet | _isl.BasicMap
-        ) -> list[_isl.Constraint]:
-    """Get a list of constraints."""
-    result: list[_isl.Constraint] = []
-    self.foreach_constraint(result.append)
-    return result
-
-
-def set_get_basic_sets(self: _isl.Set | _isl.BasicSet) -> list[_isl.BasicSet]:
-    """Get the list of :class:`BasicSet` instances in this :class:`Set`."""
-    result: list[_isl.BasicSet] = []
-    if isinstance(self, _isl.BasicSet):
-        self = self.to_set()
-    self.foreach_basic_set(result.append)
-    return result
-
-
-def map_get_basic_maps(self: _isl.Map) -> list[_isl.BasicMap]:
-    """Get the list of :class:`BasicMap` instances in this :class:`Map`."""
-    result: list[_isl.BasicMap] = []
-    self.foreach_basic_map(result.append)
-    return result
-
-
 def obj_get_id_dict(
             self: HasSpace,
             dimtype: _isl.dim_type | None = None
@@ -687,34 +883,6 @@ def obj_get_var_names_via_space(
             for i in range(space.dim(dimtype))]
 
 
-def pwaff_get_pieces(self: _isl.PwAff | _isl.Aff) -> list[tuple[_isl.Set, _isl.Aff]]:
-    if isinstance(self, _isl.Aff):
-        self = self.to_pw_aff()
-    result: list[tuple[_isl.Set, _isl.Aff]] = []
-
-    def append_tuple(s: _isl.Set, v: _isl.Aff):
-        result.append((s, v))
-
-    self.foreach_piece(append_tuple)
-    return result
-
-
-def pwqpolynomial_get_pieces(
-            self: _isl.PwQPolynomial
-        ) -> list[tuple[_isl.Set, _isl.QPolynomial]]:
-    """
-    :return: list of (:class:`Set`, :class:`QPolynomial`)
-    """
-
-    result: list[tuple[_isl.Set, _isl.QPolynomial]] = []
-
-    def append_tuple(s: _isl.Set, v: _isl.QPolynomial):
-        result.append((s, v))
-
-    self.foreach_piece(append_tuple)
-    return result
-
-
 def pw_get_aggregate_domain(self: _isl.PwAff | _isl.PwQPolynomial) -> _isl.Set:
     """
     :return: a :class:`Set` that is the union of the domains of all pieces
@@ -727,13 +895,6 @@ def pw_get_aggregate_domain(self: _isl.PwAff | _isl.PwQPolynomial) -> _isl.Set:
     return result
 
 
-def qpolynomial_get_terms(self: _isl.QPolynomial) -> list[_isl.Term]:
-    """Get the list of :class:`Term` instances in this :class:`QPolynomial`."""
-    result: list[_isl.Term] = []
-    self.foreach_term(result.append)
-    return result
-
-
 def pwqpolynomial_eval_with_dict(
             self: _isl.PwQPolynomial,
             value_dict: Mapping[str, int | _isl.Val]
@@ -753,6 +914,8 @@ def pwqpolynomial_eval_with_dict(
     return self.eval(pt).to_python()
 
 
+# Used by the arithmetic operators of Aff, PwAff, QPolynomial and
+# PwQPolynomial, which are implemented in src/wrapper/wrap_isl.hpp.
 def _number_to_expr_like(template: ExprLikeT, num: int | _isl.Val) -> ExprLikeT:
     number_aff = _isl.Aff.zero_on_domain(template.get_domain_space())
     number_aff = number_aff.set_constant_val(num)
@@ -784,43 +947,6 @@ def _number_to_expr_like(template: ExprLikeT, num: int | _isl.Val) -> ExprLikeT:
         raise TypeError("unexpected template type")
 
 
-def expr_like_add(self: ExprLikeT, other: ExprLikeT | int | _isl.Val) -> ExprLikeT:
-    if not isinstance(other, ExprLike):
-        other = _number_to_expr_like(self, other)
-
-    try:
-        return self.add(other)
-    except TypeError:
-        return NotImplemented
-
-
-def expr_like_sub(self: ExprLikeT, other: ExprLikeT | int | _isl.Val) -> ExprLikeT:
-    if not isinstance(other, ExprLike):
-        other = _number_to_expr_like(self, other)
-
-    try:
-        return self.sub(other)
-    except TypeError:
-        return NotImplemented
-
-
-def expr_like_rsub(self: ExprLikeT, other: ExprLikeT | int | _isl.Val) -> ExprLikeT:
-    if not isinstance(other, ExprLike):
-        other = _number_to_expr_like(self, other)
-
-    return -self + other
-
-
-def expr_like_mul(self: ExprLikeT, other: ExprLikeT | int | _isl.Val) -> ExprLikeT:
-    if not isinstance(other, ExprLike):
-        other = _number_to_expr_like(self, other)
-
-    try:
-        return self.mul(other)
-    except TypeError:
-        return NotImplemented
-
-
 def expr_like_floordiv(self: AffLikeT, other: _isl.Val) -> AffLikeT:
     return self.scale_down_val(other).floor()
 
@@ -829,10 +955,6 @@ def val_rsub(self: _isl.Val, other: _isl.Val) -> _isl.Val:
     return -self + other
 
 
-def val_bool(self: _isl.Val) -> bool:
-    return not self.is_zero()
-
-
 def val_repr(self: _isl.Val) -> str:
     return f'{type(self).__name__}("{self.to_str()}")'
 
@@ -858,8 +980,9 @@ def obj_ne(self: object, other: object) -> bool:
     return not self.__eq__(other)
 
 
+# Classes with a same-type is_equal have native comparison operators.
 for cls in ALL_CLASSES:
-    if hasattr(cls, "is_equal"):
+    if hasattr(cls, "is_equal") and "__eq__" not in cls.__dict__:
         cls.__eq__ = obj_eq
         cls.__ne__ = obj_ne
 
@@ -982,10 +1105,351 @@ def obj_add_constraints(obj: BasicT, constraints: Iterable[_isl.Constraint]) ->
     .. versionadded:: 2011.3
     """
 
+    result = obj
     for cns in constraints:
-        obj = obj.add_constraint(cns)
+        result = _own(result, obj).add_constraint(cns)
+
+    return result
+
+# }}}
+
+
+# {{{ numpy interop
+
+# NumPy is not a dependency of islpy. It is imported by the methods below,
+# see "NumPy Interoperability" in the documentation.
+
+def _int64_array_to_dtype(
+            array: "np.ndarray",
+            overflow: Sequence[tuple[int, int]],
+            dtype: "DTypeLike | None",
+        ) -> "np.ndarray":
+    """Convert an int64 *array* returned by :mod:`islpy._isl` to *dtype*.
+    *overflow* holds the flat indices and values of the entries that did not
+    fit into int64. If *dtype* is *None*, use int64 unless there are such
+    entries.
+    """
+    import numpy as np
+
+    if dtype is None:
+        dtype = object if overflow else np.int64
+    dtype = np.dtype(dtype)
+    if dtype == np.dtype(object):
+        result = array.astype(object)
+        for index, value in overflow:
+            result.flat[index] = value
+        return result
+
+    if overflow:
+        raise OverflowError(
+            f"integer {overflow[0][1]} does not fit into int64, "
+            "use dtype=object")
+    if dtype.kind in "iu" and array.size:
+        info = np.iinfo(dtype)
+        if array.min() < info.min or array.max() > info.max:
+            raise OverflowError(f"integers do not fit into {dtype}")
+
+    return array.astype(dtype, copy=False)
+
+
+def set_points_array(
+            self: _isl.Set | _isl.BasicSet,
+            dtype: "DTypeLike" = "int64",
+            max_points: int | None = None,
+        ) -> "np.ndarray":
+    """Return an array of shape ``(n_points, n_dims)`` of the integer points
+    in *self*, which must be bounded, in lexicographic order. The values of
+    the parameters (if any) must be fixed.
+
+    :arg dtype: the type of the entries. Use :class:`object` for coordinates
+        that may not fit into a machine integer.
+    :arg max_points: if given, raise :exc:`ValueError` instead of
+        enumerating sets with more than this number of points.
+
+    .. versionadded:: 2026.2
+    """
+    import numpy as np
+
+    points = _int64_array_to_dtype(*_isl._points_array(self, max_points), dtype)
+
+    # isl enumerates the points in no particular order
+    if len(points) > 1 and points.shape[1]:
+        if points.dtype == np.dtype(object):
+            order = sorted(range(len(points)), key=lambda i: tuple(points[i]))
+        else:
+            order = np.lexsort(points.T[::-1])
+        points = points[order]
+    return points
+
+
+def basic_obj_constraint_arrays(
+            self: _isl.BasicSet | _isl.BasicMap,
+            dtype: "DTypeLike" = "int64",
+        ) -> tuple["np.ndarray", "np.ndarray", Sequence[str | Literal[1] | None],
+                   "np.ndarray"]:
+    """Return a tuple ``(eq, ineq, column_labels, divs)`` describing the
+    constraints of *self* as dense matrices.
+
+    *eq* has a row for each equality constraint and *ineq* has one for each
+    inequality constraint, requiring the dot product of the row with the
+    vector of columns to be zero or non-negative, respectively.
+    *column_labels* holds the label of each column: ``1`` for the constant,
+    followed by the names of the parameters, of the (input and output, for
+    :class:`BasicMap`) dimensions, and *None* for each div.
+
+    *divs* has a row for each div. Its first column is a denominator, the
+    others hold the coefficients of a numerator, for the same columns as
+    *eq* and *ineq*. Div *k* is the floor of the numerator divided by the
+    denominator, where the numerator only refers to divs before *k*. Rows of
+    divs without a known definition are zero.
+
+    :arg dtype: the type of the entries of the arrays. Use :class:`object`
+        for coefficients that may not fit into a machine integer.
+
+    .. versionadded:: 2026.2
+    """
+    eq, ineq, divs = [
+            _int64_array_to_dtype(array, overflow, dtype)
+            for array, overflow in _isl._constraint_arrays(self)]
+
+    dim_types = ([_isl.dim_type.param, _isl.dim_type.in_, _isl.dim_type.out]
+                 if isinstance(self, _isl.BasicMap)
+                 else [_isl.dim_type.param, _isl.dim_type.set])
+    column_labels: list[str | Literal[1] | None] = [1]
+    for dt in dim_types:
+        column_labels.extend(self.get_var_names(dt))
+    column_labels.extend([None] * self.dim(_isl.dim_type.div))
+
+    return eq, ineq, column_labels, divs
+
+
+def _as_int_array_with_overflow(
+            values: object, what: str,
+        ) -> tuple["np.ndarray", Sequence[tuple[int, int]]]:
+    """Return an array of integers of *values* for :mod:`islpy._isl`, along
+    with the flat indices and values of the entries that do not fit into
+    int64 (which are zero in the array).
+    """
+    import numpy as np
+
+    array = np.asarray(values)
+    if array.dtype == np.dtype(object):
+        try:
+            flat = [operator.index(value) for value in array.flat]
+        except TypeError:
+            raise TypeError(f"{what}: expected integers") from None
+
+        info = np.iinfo(np.int64)
+        overflow = [(index, value) for index, value in enumerate(flat)
+                    if not info.min <= value <= info.max]
+        for index, _ in overflow:
+            flat[index] = 0
+        return np.array(flat, dtype=np.int64).reshape(array.shape), overflow
+
+    if array.dtype.kind not in "iu":
+        if array.size:
+            raise TypeError(f"{what}: expected integers, got {array.dtype}")
+        array = array.astype(np.int64)
+
+    return array, []
+
+
+def _as_int_array(values: object, what: str) -> "np.ndarray":
+    array, overflow = _as_int_array_with_overflow(values, what)
+    if overflow:
+        raise OverflowError(
+                f"{what}: integer {overflow[0][1]} does not fit into int64")
+
+    return array
+
+
+def _constraint_arrays_for_space(
+            space: _isl.Space,
+            eq: object,
+            ineq: object,
+        ) -> tuple["np.ndarray", "np.ndarray"]:
+    eq = _as_int_array(eq, "from_constraint_arrays")
+    ineq = _as_int_array(ineq, "from_constraint_arrays")
+
+    # an empty list has no columns
+    if eq.ndim == 2:
+        n_cols = eq.shape[1]
+    elif ineq.ndim == 2:
+        n_cols = ineq.shape[1]
+    else:
+        n_cols = 1 + space.dim(_isl.dim_type.all)
+    if eq.ndim == 1 and eq.size == 0:
+        eq = eq.reshape(0, n_cols)
+    if ineq.ndim == 1 and ineq.size == 0:
+        ineq = ineq.reshape(0, n_cols)
+
+    return eq, ineq
+
+
+def basic_set_from_constraint_arrays(
+            space: _isl.Space,
+            eq: object,
+            ineq: object,
+        ) -> _isl.BasicSet:
+    """Return a :class:`BasicSet` in *space* given by the equality
+    constraints *eq* and the inequality constraints *ineq*, in the format
+    returned by :meth:`BasicSet.constraint_arrays`. Columns beyond those of
+    the constant, the parameters and the set dimensions stand for
+    existentially quantified variables.
+
+    :arg eq: an array of integers with a row for each constraint. Arrays of
+        any integer dtype are used without conversion.
+    :arg ineq: like *eq*.
+
+    .. versionadded:: 2026.2
+    """
+    return _isl._basic_set_from_constraint_arrays(
+            space, *_constraint_arrays_for_space(space, eq, ineq))
+
+
+def basic_map_from_constraint_arrays(
+            space: _isl.Space,
+            eq: object,
+            ineq: object,
+        ) -> _isl.BasicMap:
+    """Return a :class:`BasicMap` in *space* given by the equality
+    constraints *eq* and the inequality constraints *ineq*, in the format
+    returned by :meth:`BasicMap.constraint_arrays`. Columns beyond those of
+    the constant, the parameters and the input and output dimensions stand
+    for existentially quantified variables.
+
+    :arg eq: an array of integers with a row for each constraint. Arrays of
+        any integer dtype are used without conversion.
+    :arg ineq: like *eq*.
+
+    .. versionadded:: 2026.2
+    """
+    return _isl._basic_map_from_constraint_arrays(
+            space, *_constraint_arrays_for_space(space, eq, ineq))
+
+
+def set_contains_points(
+            self: _isl.Set | _isl.BasicSet,
+            points: object,
+            params: Mapping[str, int] | Sequence[int] | None = None,
+        ) -> "np.ndarray":
+    """Return a boolean array indicating which of the *points* lie in
+    *self*.
+
+    :arg points: an array of integers of shape ``(n_points, n_dims)``. Arrays
+        of any integer dtype are used without conversion.
+    :arg params: the values of the parameters of *self* (if any), either as a
+        sequence in the order of the parameters or as a mapping from their
+        names.
+
+    .. versionadded:: 2026.2
+    """
+    points = _as_int_array(points, "contains_points")
+    if points.ndim == 1 and points.size == 0:
+        points = points.reshape(0, self.dim(_isl.dim_type.set))
+
+    n_params = self.dim(_isl.dim_type.param)
+    if params is None:
+        if n_params:
+            raise ValueError("contains_points: values of the parameters "
+                    "must be given")
+        param_array = None
+    else:
+        if isinstance(params, Mapping):
+            params = [params[name] for name in
+                      self.get_var_names_not_none(_isl.dim_type.param)]
+        param_array = _as_int_array(params, "contains_points")
+
+    return cast("np.ndarray",
+            _isl._contains_points(self, points, param_array))
+
+
+def obj_to_numpy(
+            self: _isl.Vec | _isl.Mat | _isl.MultiVal,
+            dtype: "DTypeLike | None" = None,
+        ) -> "np.ndarray":
+    """Return the entries of *self* as an array, of shape ``(n_rows, n_cols)``
+    for a :class:`Mat` or one-dimensional otherwise.
+
+    :arg dtype: the type of the entries. By default, use int64 if all entries
+        fit, and :class:`object` otherwise.
+
+    .. versionadded:: 2026.2
+    """
+    array, overflow = _isl._to_array(self)
+    if not isinstance(self, _isl.Mat):
+        array = array.reshape(-1)
+
+    return _int64_array_to_dtype(array, overflow, dtype)
+
+
+def obj_array(
+            self: _isl.Vec | _isl.Mat | _isl.MultiVal,
+            dtype: "DTypeLike | None" = None,
+            copy: bool | None = None,
+        ) -> "np.ndarray":
+    if copy is False:
+        raise ValueError(
+                f"{type(self).__name__} cannot be converted without a copy")
+
+    return obj_to_numpy(self, dtype)
+
+
+def vec_from_numpy(
+            values: object,
+            context: _isl.Context | None = None,
+        ) -> _isl.Vec:
+    """Return a :class:`Vec` of the integers in *values*. Unlike the
+    constructor, which takes arrays of integer dtypes, this accepts
+    anything that :func:`numpy.asarray` does, including arrays of
+    :class:`object` dtype with arbitrarily large integers.
+
+    .. versionadded:: 2026.2
+    """
+    array, overflow = _as_int_array_with_overflow(values, "Vec.from_numpy")
+    result = _isl.Vec(array, context)
+    for index, value in overflow:
+        result = result.set_element_val(index, _isl.Val(str(value), context))
+
+    return result
+
+
+def mat_from_numpy(
+            values: object,
+            context: _isl.Context | None = None,
+        ) -> _isl.Mat:
+    """Return a :class:`Mat` of the integers in *values*, see
+    :meth:`Vec.from_numpy`.
+
+    .. versionadded:: 2026.2
+    """
+    array, overflow = _as_int_array_with_overflow(values, "Mat.from_numpy")
+    result = _isl.Mat(array, context)
+    for index, value in overflow:
+        row, col = divmod(index, array.shape[1])
+        result = result.set_element_val(
+                row, col, _isl.Val(str(value), context))
+
+    return result
 
-    return obj
+
+def multi_val_from_numpy(
+            space: _isl.Space,
+            values: object,
+        ) -> _isl.MultiVal:
+    """Return a :class:`MultiVal` in *space* of the integers in *values*, see
+    :meth:`Vec.from_numpy`.
+
+    .. versionadded:: 2026.2
+    """
+    array, overflow = _as_int_array_with_overflow(
+            values, "MultiVal.from_numpy")
+    result = _isl.MultiVal(space, array)
+    for index, value in overflow:
+        result = result.set_val(
+                index, _isl.Val(str(value), space.get_ctx()))
+
+    return result
 
 # }}}
 
@@ -998,6 +1462,7 @@ def _add_functionality() -> None:
     _isl.Context.__reduce__ = context_reduce
     _isl.Context.__eq__ = context_eq
     _isl.Context.__ne__ = context_ne
+    _isl.Context.intern = context_intern
 
     # }}}
 
@@ -1007,6 +1472,19 @@ def _add_functionality() -> None:
         if hasattr(cls, "read_from_str"):
             cls.__reduce__ = generic_reduce
 
+    for cls in BINARY_PICKLE_CLASSES:
+        cls.__reduce__ = binary_reduce
+
+    _isl.Id.__reduce__ = id_reduce
+
+    # }}}
+
+    # {{{ stable hashing
+
+    for cls in STABLE_HASH_CLASSES:
+        cls.stable_hash = obj_stable_hash
+    _isl.Schedule.stable_hash = schedule_stable_hash
+
     # }}}
 
     # {{{ printing
@@ -1020,27 +1498,7 @@ def _add_functionality() -> None:
         if not hasattr(cls, "__hash__"):
             raise AssertionError(f"not hashable: {cls}")
 
-    # }}}
-
-    # {{{ Python set-like behavior
-
-    _isl.BasicSet.__and__ = bset_and
-    _isl.BasicSet.__rand__ = bset_and
-    _isl.Set.__and__ = set_and
-    _isl.Set.__rand__ = set_and
-    for cls in [_isl.BasicSet, _isl.Set]:
-        cls.__or__ = set_or
-        cls.__ror__ = set_or
-        cls.__sub__ = set_sub
-
-    _isl.BasicMap.__and__ = bmap_and
-    _isl.BasicMap.__rand__ = bmap_and
-    _isl.Map.__and__ = map_and
-    _isl.Map.__rand__ = map_and
-    for cls in [_isl.BasicMap, _isl.Map]:
-        cls.__or__ = map_or
-        cls.__ror__ = map_or
-        cls.__sub__ = map_sub
+    _isl.Printer.print_many = printer_print_many
 
     # }}}
 
@@ -1068,28 +1526,25 @@ def _add_functionality() -> None:
 
     # }}}
 
-    # {{{ BasicSet
-
-    _isl.BasicSet.get_constraints = basic_obj_get_constraints
-
-    # }}}
-
-    # {{{ BasicMap
-
-    _isl.BasicMap.get_constraints = basic_obj_get_constraints
-
-    # }}}
-
-    # {{{ Set
-
-    _isl.Set.get_basic_sets = set_get_basic_sets
-    _isl.BasicSet.get_basic_sets = set_get_basic_sets
-
-    # }}}
-
-    # {{{ Map
+    # {{{ numpy interop
 
-    _isl.Map.get_basic_maps = map_get_basic_maps
+    for cls in [_isl.BasicSet, _isl.Set]:
+        cls.points_array = set_points_array
+        cls.contains_points = set_contains_points
+
+    for cls in [_isl.BasicSet, _isl.BasicMap]:
+        cls.constraint_arrays = basic_obj_constraint_arrays
+    _isl.BasicSet.from_constraint_arrays = staticmethod(
+            basic_set_from_constraint_arrays)
+    _isl.BasicMap.from_constraint_arrays = staticmethod(
+            basic_map_from_constraint_arrays)
+
+    for cls in [_isl.Vec, _isl.Mat, _isl.MultiVal]:
+        cls.to_numpy = obj_to_numpy
+        cls.__array__ = obj_array
+    _isl.Vec.from_numpy = staticmethod(vec_from_numpy)
+    _isl.Mat.from_numpy = staticmethod(mat_from_numpy)
+    _isl.MultiVal.from_numpy = staticmethod(multi_val_from_numpy)
 
     # }}}
 
@@ -1114,28 +1569,17 @@ for cls in ALL_CLASSES:
 
     # {{{ piecewise
 
-    _isl.PwAff.get_pieces = pwaff_get_pieces
-    _isl.Aff.get_pieces = pwaff_get_pieces
     _isl.PwAff.get_aggregate_domain = pw_get_aggregate_domain
 
-    _isl.PwQPolynomial.get_pieces = pwqpolynomial_get_pieces
     _isl.PwQPolynomial.get_aggregate_domain = pw_get_aggregate_domain
 
     # }}}
 
-    _isl.QPolynomial.get_terms = qpolynomial_get_terms
-
     _isl.PwQPolynomial.eval_with_dict = pwqpolynomial_eval_with_dict
 
     # {{{ arithmetic
 
     for expr_like_class in ARITH_CLASSES:
-        expr_like_class.__add__ = expr_like_add
-        expr_like_class.__radd__ = expr_like_add
-        expr_like_class.__sub__ = expr_like_sub
-        expr_like_class.__rsub__ = expr_like_rsub
-        expr_like_class.__mul__ = expr_like_mul
-        expr_like_class.__rmul__ = expr_like_mul
         expr_like_class.__neg__ = expr_like_class.neg
 
     for qpoly_class in [_isl.QPolynomial, _isl.PwQPolynomial]:
@@ -1159,7 +1603,7 @@ for cls in ALL_CLASSES:
     val_cls.__rmul__ = val_cls.mul
     val_cls.__neg__ = val_cls.neg
     val_cls.__mod__ = val_cls.mod
-    val_cls.__bool__ = val_cls.__nonzero__ = val_bool
+    val_cls.__nonzero__ = val_cls.__bool__
 
     val_cls.__lt__ = val_cls.lt
     val_cls.__gt__ = val_cls.gt
@@ -1199,74 +1643,3 @@ for cls in ALL_CLASSES:
 
 
 _add_functionality()
-
-
-_DOWNCAST_RE = re.compile(
-          r"Downcast from :class:`([A-Za-z]+)` to :class:`([A-Za-z]+)`.")
-
-
-_TO_METHODS = {
-    "PwAff": "to_pw_aff",
-    "PwMultiAff": "to_pw_multi_aff",
-    "UnionPwAff": "to_union_pw_aff",
-    "UnionPwMultiAff": "to_union_pw_multi_aff",
-    "LocalSpace": "to_local_space",
-    "Set": "to_set",
-    "UnionSet": "to_union_set",
-    "Map": "to_map",
-    "UnionMap": "to_union_map",
-}
-
-
-def _depr_downcast_wrapper(
-            f: Callable[Concatenate[object, P], ResultT],
-        ) -> Callable[Concatenate[object, P], ResultT]:
-    doc = f.__doc__
-    assert doc is not None
-    m = _DOWNCAST_RE.search(doc)
-    assert m, doc
-    basic_cls_name = intern(m.group(1))
-    tgt_cls_name = m.group(2)
-
-    tgt_cls = cast("type", getattr(_isl, tgt_cls_name))
-    is_overload = "Overloaded function" in doc
-    msg = (f"{basic_cls_name}.{f.__name__} "
-            f"with implicit conversion of self to {tgt_cls_name} is deprecated "
-            "and will stop working in 2026. "
-            f"Explicitly convert to {tgt_cls_name}, "
-            f"using .{_TO_METHODS[tgt_cls_name]}().")
-
-    if is_overload:
-        def wrapper(self: object, *args: P.args, **kwargs: P.kwargs) -> ResultT:
-            # "Try to" detect bad invocations of, e.g., Set.union, which is
-            # an overload of normal union and UnionSet.union.
-            if (
-                    any(isinstance(arg, tgt_cls) for arg in args)
-                    or
-                    any(isinstance(arg, tgt_cls) for arg in kwargs.values())
-                    ):
-                warn(msg, DeprecationWarning, stacklevel=2)
-
-            return f(self, *args, **kwargs)
-    else:
-        def wrapper(self: object, *args: P.args, **kwargs: P.kwargs) -> ResultT:
-            warn(msg, DeprecationWarning, stacklevel=2)
-
-            return f(self, *args, **kwargs)
-    update_wrapper(wrapper, f)
-    return wrapper
-
-
-def _monkeypatch_self_downcast_deprecation():
-    for cls in ALL_CLASSES:
-        for attr_name in dir(cls):
-            val = cast("object", getattr(cls, attr_name))
-            doc = getattr(val, "__doc__", None)
-            if doc and "\nDowncast from " in doc:
-                setattr(cls, attr_name, _depr_downcast_wrapper(
-                        cast("Callable", val),  # pyright: ignore[reportMissingTypeArgument]
-                        ))
-
-
-if not os.environ.get("ISLPY_NO_DOWNCAST_DEPRECATION", None):
-    _monkeypatch_self_downcast_deprecation()
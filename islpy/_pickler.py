@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pickle
+
+from islpy import _isl
+from islpy._isl import Id, Space
+from islpy._monkeypatch import BINARY_PICKLE_CLASSES, _read_from_binary_parts, _shared
+
+
+class Pickler(pickle.Pickler):
+    """A :class:`pickle.Pickler` that writes each distinct :class:`Space`
+    and :class:`Id` only once per stream, no matter how many objects refer to
+    them. Objects that are pickled in the binary format (see :ref:`pickling`)
+    are written without their space, referring to the shared one instead.
+    This saves space and loading time when pickling many objects that live
+    in the same few spaces::
+
+        with open("sets.pkl", "wb") as outf:
+            isl.Pickler(outf).dump(sets)
+
+    No special support is needed for unpickling, use :func:`pickle.load`.
+
+    .. versionadded:: 2026.2
+    """
+
+    def __init__(self, file, protocol: int | None = None, **kwargs) -> None:
+        super().__init__(file, protocol, **kwargs)
+        # keyed by their binary encoding, since Space.is_equal ignores
+        # the names of (non-parameter) dimensions
+        self._spaces: dict[bytes, Space] = {}
+        # keyed like isl's own table of ids
+        self._ids: dict[tuple[str | None, int], Id] = {}
+
+    def reducer_override(self, obj: object):
+        tp = type(obj)
+        if tp is Id:
+            assert isinstance(obj, Id)
+            shared = self._ids.setdefault((obj.name, id(obj.user)), obj)
+        elif tp is Space:
+            assert isinstance(obj, Space)
+            data = _isl._encode_binary(obj)
+            assert data is not None
+            shared = self._spaces.setdefault(data, obj)
+        elif tp in BINARY_PICKLE_CLASSES:
+            parts = _isl._encode_binary_parts(obj)  # pyright: ignore[reportCallIssue, reportArgumentType]
+            if parts is None:
+                return NotImplemented
+            space, space_data, data = parts
+            return (_read_from_binary_parts,
+                    (self._spaces.setdefault(space_data, space), data))
+        else:
+            return NotImplemented
+
+        if shared is obj:
+            return NotImplemented
+        # let the pickle memo refer to the first instance
+        return (_shared, (shared,))
@@ -0,0 +1,432 @@
+"""
+On-disk memoization of expensive isl operations, so that their results
+survive process restarts::
+
+    import islpy as isl
+    from islpy.cache import memoize
+
+    @memoize
+    def schedule_for(domain: isl.UnionSet, validity: isl.UnionMap) -> isl.Schedule:
+        sc = isl.ScheduleConstraints.on_domain(domain).set_validity(validity)
+        return sc.compute_schedule()
+
+Results are stored in a directory (see :func:`get_default_cache`), keyed
+by the name of the operation and the arguments. isl objects among the
+arguments are identified by their :meth:`~islpy.Set.stable_hash`, so equal
+arguments built in different processes find the same entry. Results are
+written with :class:`islpy.Pickler` and loaded into the context of the
+arguments. Once the directory exceeds its size bound, the least recently
+used entries are removed.
+
+Dependence analysis cannot be memoized directly, since
+:class:`islpy.UnionAccessInfo` does not expose the relations it was built
+from and :class:`islpy.UnionFlow` cannot be pickled. Use
+:func:`compute_flow` instead, which takes the relations themselves.
+
+.. versionadded:: 2026.2
+
+.. autoclass:: DiskCache
+.. autofunction:: get_default_cache
+.. autofunction:: memoize
+.. autofunction:: stable_key
+.. autofunction:: compute_flow
+.. autoclass:: UnionFlowResult
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+from enum import Enum
+from functools import update_wrapper
+from typing import TYPE_CHECKING, ParamSpec, TypeVar, cast
+
+import islpy as isl
+from islpy import _isl
+from islpy.version import VERSION_TEXT
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping, Sequence
+
+
+P = ParamSpec("P")
+ResultT = TypeVar("ResultT")
+
+_SUFFIX = ".pkl"
+
+
+# {{{ keys
+
+def stable_key(obj: object) -> str:
+    """Return a string identifying *obj* that is the same in every process.
+
+    Supported are isl objects with a ``stable_hash`` method, :class:`islpy.Val`,
+    enumerations such as :class:`islpy.dim_type`, :class:`str`,
+    :class:`bytes`, :class:`int`, :class:`float`, :class:`bool`,
+    *None*, and tuples, lists and dictionaries of these.
+    :class:`islpy.Context` objects are ignored (i.e. map to the same key).
+
+    :raises TypeError: for other types.
+    """
+    if obj is None or isinstance(obj, bool | int | float | str | bytes):
+        return f"{type(obj).__name__}:{obj!r}"
+    if isinstance(obj, _isl.Context):
+        return "Context"
+    if isinstance(obj, _isl.Val):
+        return f"Val:{obj}"
+    if isinstance(obj, Enum):
+        return f"{type(obj).__name__}.{obj.name}"
+    if isinstance(obj, _isl.UnionAccessInfo):
+        raise TypeError("cannot compute a stable key for 'UnionAccessInfo', "
+                "use islpy.cache.compute_flow for dependence analysis")
+
+    stable_hash = getattr(obj, "stable_hash", None)
+    if stable_hash is not None:
+        return f"{type(obj).__name__}:{stable_hash()}"
+
+    if isinstance(obj, tuple | list):
+        return (f"{type(obj).__name__}("
+                + ",".join(stable_key(item) for item in obj) + ")")
+    if isinstance(obj, dict):
+        items = sorted(f"{stable_key(k)}={stable_key(v)}" for k, v in obj.items())
+        return "dict(" + ",".join(items) + ")"
+
+    raise TypeError(f"cannot compute a stable key for '{type(obj).__name__}'")
+
+
+def _find_context(objs: Sequence[object]) -> _isl.Context | None:
+    for obj in objs:
+        if isinstance(obj, _isl.Context):
+            return obj
+        get_ctx = getattr(obj, "get_ctx", None)
+        if get_ctx is not None:
+            return get_ctx()
+        if isinstance(obj, tuple | list):
+            ctx = _find_context(obj)
+            if ctx is not None:
+                return ctx
+
+    return None
+
+# }}}
+
+
+# {{{ pickling with contexts
+
+class _ResultPickler(isl.Pickler):
+    # Contexts are not stored, results are loaded into the context of the
+    # arguments instead.
+    def persistent_id(self, obj: object) -> str | None:
+        if isinstance(obj, _isl.Context):
+            return "context"
+        return None
+
+
+class _ResultUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, context: _isl.Context) -> None:
+        super().__init__(file)
+        self.context = context
+
+    def persistent_load(self, pid: object) -> object:
+        if pid == "context":
+            return self.context
+        raise pickle.UnpicklingError(f"unknown persistent id: {pid!r}")
+
+# }}}
+
+
+# {{{ disk cache
+
+class DiskCache:
+    """A directory of pickled results, bounded in size.
+
+    Entries are files named after their key. Reading an entry marks it as
+    recently used by updating its modification time, and once the total
+    size exceeds *max_size* (in bytes), the entries that were least recently
+    used are deleted until at most three quarters of *max_size* are used.
+    Several processes may share a cache directory, since entries are written
+    atomically and entries that disappear or cannot be read count as misses.
+    (To avoid scanning the directory on every write, each instance keeps
+    track of the size it has added since the last scan, so entries written
+    by other processes are only noticed at the next scan.)
+
+    .. automethod:: make_key
+    .. automethod:: get
+    .. automethod:: put
+    .. automethod:: clear
+    """
+
+    directory: str
+    max_size: int
+
+    def __init__(self, directory: str, max_size: int = 2**30) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        # (an upper bound of) the total size of the entries, None if unknown
+        self._size: int | None = None
+        os.makedirs(directory, exist_ok=True)
+
+    def make_key(self,
+                name: str,
+                args: Sequence[object] = (),
+                kwargs: Mapping[str, object] | None = None,
+            ) -> str:
+        """Return a key for the result of the operation *name* applied to
+        *args* and *kwargs*. See :func:`stable_key` for the supported types
+        of arguments. The key also depends on the versions of islpy and isl.
+        """
+        key = stable_key((VERSION_TEXT, _isl.isl_version(), name,
+                tuple(args), dict(kwargs or {})))
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str, context: _isl.Context | None = None) -> object:
+        """Return the entry stored under *key*, with isl objects in
+        *context* (by default :data:`islpy.DEFAULT_CONTEXT`).
+
+        :raises KeyError: if there is no such entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as inf:
+                data = inf.read()
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+        if context is None:
+            context = isl.DEFAULT_CONTEXT
+
+        try:
+            result = _ResultUnpickler(io.BytesIO(data), context).load()
+        except Exception:  # ruff:ignore[blind-except]
+            # e.g. truncated by a full disk, or referring to classes that
+            # no longer exist: discard
+            self._remove(path)
+            raise KeyError(key) from None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return result
+
+    def put(self, key: str, value: object) -> None:
+        """Store *value* under *key*, evicting entries if needed."""
+        buf = io.BytesIO()
+        _ResultPickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+
+        data = buf.getvalue()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as outf:
+                outf.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        if self._size is not None:
+            # overestimated if the entry replaced an existing one
+            self._size += len(data)
+        if self._size is None or self._size > self.max_size:
+            self._evict()
+
+    def clear(self) -> None:
+        """Delete all entries."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                self._remove(entry.path)
+        self._size = 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, str]] = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        if total_size > self.max_size:
+            # leave some room, so that the next writes do not immediately
+            # require another scan
+            target_size = self.max_size * 3 // 4
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total_size <= target_size:
+                    break
+                self._remove(path)
+                total_size -= size
+
+        self._size = total_size
+
+
+_DEFAULT_CACHE: DiskCache | None = None
+
+
+def get_default_cache() -> DiskCache:
+    """Return the :class:`DiskCache` used by :func:`memoize` by default.
+    Its directory is given by the environment variable
+    :envvar:`ISLPY_CACHE_DIR`, defaulting to ``islpy`` in the user's cache
+    directory (:envvar:`XDG_CACHE_HOME` or :file:`~/.cache`).
+    """
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        directory = os.environ.get("ISLPY_CACHE_DIR")
+        if directory is None:
+            directory = os.path.join(
+                os.environ.get("XDG_CACHE_HOME")
+                or os.path.join(os.path.expanduser("~"), ".cache"),
+                "islpy")
+        _DEFAULT_CACHE = DiskCache(directory)
+
+    return _DEFAULT_CACHE
+
+# }}}
+
+
+# {{{ memoize
+
+def memoize(
+            func: Callable[P, ResultT] | None = None,
+            *,
+            name: str | None = None,
+            cache: DiskCache | None = None,
+        ) -> Callable[P, ResultT]:
+    """Decorate *func* so that its results are stored in *cache*
+    (by default the one from :func:`get_default_cache`). May be used with
+    or without arguments (``@memoize`` or ``@memoize(name=...)``).
+
+    *func* must be a pure function of its arguments, which must be
+    supported by :func:`stable_key`. Its results must be picklable. Results
+    are returned in the context of the first isl object among the
+    arguments.
+
+    :arg name: identifies the operation in the cache. Defaults to the
+        qualified name of *func*. Use a new name (e.g. with a version
+        suffix) if the behavior of *func* changes.
+    """
+    if func is None:
+        return cast("Callable[P, ResultT]",
+                lambda f: memoize(f, name=name, cache=cache))
+
+    op_name = name or f"{func.__module__}.{func.__qualname__}"
+
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> ResultT:
+        used_cache = cache if cache is not None else get_default_cache()
+        key = used_cache.make_key(op_name, args, kwargs)
+        try:
+            return cast("ResultT", used_cache.get(
+                key, _find_context([*args, *kwargs.values()])))
+        except KeyError:
+            pass
+
+        result = func(*args, **kwargs)
+        used_cache.put(key, result)
+        return result
+
+    return update_wrapper(wrapper, func)
+
+# }}}
+
+
+# {{{ dependence analysis
+
+class UnionFlowResult:
+    """The dependences computed by :func:`compute_flow`. Unlike
+    :class:`islpy.UnionFlow`, whose getters it provides, it can be pickled.
+
+    .. automethod:: get_must_dependence
+    .. automethod:: get_may_dependence
+    .. automethod:: get_full_must_dependence
+    .. automethod:: get_full_may_dependence
+    .. automethod:: get_must_no_source
+    .. automethod:: get_may_no_source
+    """
+
+    def __init__(self, flow: isl.UnionFlow) -> None:
+        self._must_dependence = flow.get_must_dependence()
+        self._may_dependence = flow.get_may_dependence()
+        self._full_must_dependence = flow.get_full_must_dependence()
+        self._full_may_dependence = flow.get_full_may_dependence()
+        self._must_no_source = flow.get_must_no_source()
+        self._may_no_source = flow.get_may_no_source()
+
+    def get_must_dependence(self) -> isl.UnionMap:
+        return self._must_dependence
+
+    def get_may_dependence(self) -> isl.UnionMap:
+        return self._may_dependence
+
+    def get_full_must_dependence(self) -> isl.UnionMap:
+        return self._full_must_dependence
+
+    def get_full_may_dependence(self) -> isl.UnionMap:
+        return self._full_may_dependence
+
+    def get_must_no_source(self) -> isl.UnionMap:
+        return self._must_no_source
+
+    def get_may_no_source(self) -> isl.UnionMap:
+        return self._may_no_source
+
+
+def _compute_flow(
+            sink: isl.UnionMap,
+            schedule: isl.Schedule | isl.UnionMap,
+            must_source: isl.UnionMap | None,
+            may_source: isl.UnionMap | None,
+            kill: isl.UnionMap | None,
+        ) -> UnionFlowResult:
+    access = isl.UnionAccessInfo.from_sink(sink)
+    if must_source is not None:
+        access = access.set_must_source(must_source)
+    if may_source is not None:
+        access = access.set_may_source(may_source)
+    if kill is not None:
+        access = access.set_kill(kill)
+    if isinstance(schedule, isl.Schedule):
+        access = access.set_schedule(schedule)
+    else:
+        access = access.set_schedule_map(schedule)
+
+    return UnionFlowResult(access.compute_flow())
+
+
+def compute_flow(
+            sink: isl.UnionMap,
+            schedule: isl.Schedule | isl.UnionMap,
+            *,
+            must_source: isl.UnionMap | None = None,
+            may_source: isl.UnionMap | None = None,
+            kill: isl.UnionMap | None = None,
+            cache: DiskCache | None = None,
+        ) -> UnionFlowResult:
+    """Perform dependence analysis like
+    :meth:`islpy.UnionAccessInfo.compute_flow` on the access info built from
+    *sink*, the sources, *kill* and *schedule* (a :class:`islpy.Schedule` or
+    a schedule map), memoized in *cache* as by :func:`memoize`.
+    """
+    return memoize(_compute_flow, name="islpy.cache.compute_flow", cache=cache)(
+            sink, schedule, must_source, may_source, kill)
+
+# }}}
+
+# vim: foldmethod=marker
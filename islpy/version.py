@@ -1,11 +1,34 @@
 from __future__ import annotations
 
-import re
-from importlib import metadata
+from typing import TYPE_CHECKING
 
 
-VERSION_TEXT = metadata.version("islpy")
-_match = re.match(r"^([0-9.]+)([a-z0-9]*?)$", VERSION_TEXT)
-assert _match is not None
-VERSION_STATUS = _match.group(2)
-VERSION = tuple(int(nr) for nr in _match.group(1).split("."))
+if TYPE_CHECKING:
+    VERSION_TEXT: str
+    VERSION_STATUS: str
+    VERSION: tuple[int, ...]
+
+
+def _version_info() -> dict[str, object]:
+    import re
+    from importlib import metadata
+
+    version_text = metadata.version("islpy")
+    match = re.match(r"^([0-9.]+)([a-z0-9]*?)$", version_text)
+    assert match is not None
+    return {
+        "VERSION_TEXT": version_text,
+        "VERSION_STATUS": match.group(2),
+        "VERSION": tuple(int(nr) for nr in match.group(1).split(".")),
+        }
+
+
+def __getattr__(name: str) -> object:
+    # Importing importlib.metadata takes longer than importing the rest of
+    # islpy, so the version is only looked up once it is needed.
+    if name not in ("VERSION_TEXT", "VERSION_STATUS", "VERSION"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    info = _version_info()
+    globals().update(info)
+    return info[name]
@@ -3,10 +3,51 @@
 void islpy_expose_part1(py::module_ &m);
 void islpy_expose_part2(py::module_ &m);
 void islpy_expose_part3(py::module_ &m);
+void islpy_expose_binary(py::module_ &m);
+void islpy_expose_stream(py::module_ &m);
+void islpy_expose_numpy(py::module_ &m);
 
 namespace isl
 {
   ctx_use_map_t ctx_use_map;
+  std::mutex ctx_use_map_mutex;
+
+  ctx_info *ref_ctx(isl_ctx *data)
+  {
+    std::lock_guard<std::mutex> map_guard(ctx_use_map_mutex);
+
+    ctx_use_map_t::iterator it(ctx_use_map.find(data));
+    ctx_info *info;
+    if (it == ctx_use_map.end())
+    {
+      info = new ctx_info(data);
+      ctx_use_map[data] = info;
+    }
+    else
+      info = it->second;
+
+    return ref_ctx(info);
+  }
+
+  void release_ctx(isl_ctx *ctx, ctx_info *info)
+  {
+    {
+      std::lock_guard<std::mutex> map_guard(ctx_use_map_mutex);
+
+      // Between the count dropping to zero and us getting here, another
+      // thread may have looked up (and referenced) *info* again, or even
+      // already released it itself.
+      ctx_use_map_t::iterator it(ctx_use_map.find(ctx));
+      if (it == ctx_use_map.end() || it->second != info
+          || info->refcount.load() != 0)
+        return;
+
+      ctx_use_map.erase(it);
+    }
+
+    delete info;
+    isl_ctx_free(ctx);
+  }
 
   [[noreturn]] void handle_isl_error(isl_ctx *ctx, std::string const &func_name)
   {
@@ -31,17 +72,61 @@ namespace isl
     throw isl::error(errmsg);
   }
 
+  ctx_info *get_default_ctx_info()
+  {
+    // The islpy module is never unloaded, so its dictionary is looked up
+    // only once and (deliberately) never released. Threads racing here
+    // look up the same dictionary.
+    static std::atomic<PyObject *> islpy_dict(nullptr);
+    static std::atomic<PyObject *> default_context_name(nullptr);
+
+    PyObject *dict = islpy_dict.load(std::memory_order_acquire);
+    if (!dict)
+    {
+      py::module_ mod = py::module_::import_("islpy");
+      dict = PyModule_GetDict(mod.ptr());
+      Py_INCREF(dict);
+      default_context_name.store(PyUnicode_InternFromString("DEFAULT_CONTEXT"));
+      islpy_dict.store(dict, std::memory_order_release);
+    }
+
+    // Looked up on every call, since DEFAULT_CONTEXT may be reassigned.
+    PyObject *ctx_py = PyObject_GetItem(dict, default_context_name.load());
+    if (!ctx_py)
+    {
+      PyErr_Clear();
+      return nullptr;
+    }
+    py::object ctx_obj = py::steal(ctx_py);
+
+    isl::ctx *ctx_wrapper;
+    if (ctx_obj.is_none() || !py::try_cast<isl::ctx *>(ctx_obj, ctx_wrapper)
+        || !ctx_wrapper || !ctx_wrapper->is_valid())
+      return nullptr;
+    return ctx_wrapper->m_ctx_info;
+  }
+
   isl_ctx *get_default_context()
   {
-    py::module_ mod = py::module_::import_("islpy");
-    py::object ctx_py = mod.attr("DEFAULT_CONTEXT");
-    if (!ctx_py.is_none())
+    ctx_info *info = get_default_ctx_info();
+    return info ? info->ctx : nullptr;
+  }
+
+  py::object number_to_expr_like(py::handle self, py::handle num)
+  {
+    // Like the module dictionary above, looked up once and never released.
+    static std::atomic<PyObject *> convert(nullptr);
+
+    PyObject *func = convert.load(std::memory_order_acquire);
+    if (!func)
     {
-      isl::ctx *ctx_wrapper = py::cast<isl::ctx *>(ctx_py);
-      if (ctx_wrapper->is_valid())
-        return ctx_wrapper->m_data;
+      py::object func_obj = py::module_::import_("islpy._monkeypatch")
+        .attr("_number_to_expr_like");
+      func = func_obj.release().ptr();
+      convert.store(func, std::memory_order_release);
     }
-    return nullptr;
+
+    return py::borrow(func)(self, num);
   }
 
   // bogus, unused, just in service of type annotation
@@ -232,6 +317,9 @@ NB_MODULE(_isl, m)
   islpy_expose_part1(m);
   islpy_expose_part2(m);
   islpy_expose_part3(m);
+  islpy_expose_binary(m);
+  islpy_expose_stream(m);
+  islpy_expose_numpy(m);
 
   py::implicitly_convertible<isl::basic_set, isl::union_set>();
 
@@ -29,10 +29,18 @@
 #include <barvinok/isl.h>
 #endif
 
+#include <atomic>
+#include <cstdlib>
+#include <cstring>
 #include <iostream>
+#include <list>
 #include <stdexcept>
+#include <string_view>
 #include <unordered_map>
+#include <utility>
+#include <vector>
 #include <memory>
+#include <mutex>
 #include <string>
 #include <nanobind/nanobind.h>
 
@@ -56,52 +64,263 @@ namespace isl
 
   struct ctx;
 
-  typedef std::unordered_map<isl_ctx *, unsigned> ctx_use_map_t;
+  // Objects parsed from strings by the constructors of the wrapper classes,
+  // keyed by the isl type and the string, so that parsing the same string
+  // repeatedly only copies (i.e. references) the cached object. Holds at
+  // most *capacity* objects, discarding the least recently used ones.
+  // Only to be used while holding the lock of the context.
+  class parse_cache
+  {
+    public:
+      typedef void (*free_func_t)(void *);
+
+      // Objects parsed from longer strings are not cached, so that the
+      // memory held by the cache is bounded along with the number of
+      // entries.
+      static const size_t max_string_length = 4096;
+
+    private:
+      struct entry
+      {
+        std::string key;
+        void *obj;
+        free_func_t free_func;
+      };
+
+      // Most recently used first.
+      std::list<entry> m_entries;
+      std::unordered_map<std::string_view, std::list<entry>::iterator> m_index;
+      size_t m_capacity;
+
+      static std::string make_key(const char *type_name, const char *s)
+      {
+        std::string key(type_name);
+        key += ':';
+        key += s;
+        return key;
+      }
+
+      void shrink_to(size_t size)
+      {
+        while (m_entries.size() > size)
+        {
+          entry &last = m_entries.back();
+          m_index.erase(last.key);
+          last.free_func(last.obj);
+          m_entries.pop_back();
+        }
+      }
+
+    public:
+      parse_cache(size_t capacity)
+      : m_capacity(capacity)
+      { }
+
+      parse_cache(parse_cache const &) = delete;
+      parse_cache &operator=(parse_cache const &) = delete;
+
+      ~parse_cache()
+      {
+        shrink_to(0);
+      }
+
+      size_t capacity() const
+      {
+        return m_capacity;
+      }
+
+      // Whether objects parsed from *s* are cached.
+      bool caches(const char *s) const
+      {
+        return m_capacity
+          && strnlen(s, max_string_length + 1) <= max_string_length;
+      }
+
+      void set_capacity(size_t capacity)
+      {
+        m_capacity = capacity;
+        shrink_to(capacity);
+      }
+
+      // Returns the cached object, which still belongs to the cache, or
+      // nullptr.
+      void *get(const char *type_name, const char *s)
+      {
+        if (m_entries.empty() || !caches(s))
+          return nullptr;
+
+        auto it = m_index.find(make_key(type_name, s));
+        if (it == m_index.end())
+          return nullptr;
+
+        m_entries.splice(m_entries.begin(), m_entries, it->second);
+        return it->second->obj;
+      }
+
+      // Takes ownership of *obj*, which is freed using *free_func* once
+      // it is discarded.
+      void put(const char *type_name, const char *s, void *obj,
+          free_func_t free_func)
+      {
+        if (!caches(s))
+        {
+          free_func(obj);
+          return;
+        }
+        std::string key = make_key(type_name, s);
+        if (m_index.count(key))
+        {
+          free_func(obj);
+          return;
+        }
+
+        m_entries.push_front(entry{std::move(key), obj, free_func});
+        m_index.emplace(m_entries.front().key, m_entries.begin());
+        shrink_to(m_capacity);
+      }
+  };
+
+  // One per live isl_ctx. Every wrapper object holds a reference to the
+  // ctx_info of its context (see m_ctx_info) and the context is freed once
+  // the last one goes away. Code that already has a wrapper at hand passes
+  // its ctx_info along, so that the lookup in ctx_use_map (by isl_ctx
+  // pointer) is only needed when that is not possible, e.g. in callbacks.
+  struct ctx_info
+  {
+    isl_ctx *ctx;
+    std::atomic<unsigned> refcount;
+
+    // isl is not thread-safe. All calls into isl involving objects of a
+    // given context must hold this lock. See ctx_lock below.
+    std::recursive_mutex mutex;
+
+    // Whether __isl_take arguments that are unique temporaries may be
+    // handed to isl without copying them. See may_consume below.
+    std::atomic<bool> consume_temporaries;
+
+    parse_cache parsed;
+
+    ctx_info(isl_ctx *data)
+    : ctx(data), refcount(0), consume_temporaries(false), parsed(256)
+    { }
+  };
+
+  typedef std::unordered_map<isl_ctx *, ctx_info *> ctx_use_map_t;
   extern ctx_use_map_t ctx_use_map;
 
-  inline void ref_ctx(isl_ctx *data)
+  // Wrappers may be created and destroyed concurrently in free-threaded
+  // Python, or while another thread holds a context lock.
+  extern std::mutex ctx_use_map_mutex;
+
+  // Looks up (or creates) the ctx_info for *data* and references it.
+  ctx_info *ref_ctx(isl_ctx *data);
+
+  // Called once the reference count of *info* has dropped to zero.
+  void release_ctx(isl_ctx *ctx, ctx_info *info);
+
+  inline ctx_info *ref_ctx(ctx_info *info)
   {
-    ctx_use_map_t::iterator it(ctx_use_map.find(data));
-    if (it == ctx_use_map.end())
-      ctx_use_map[data] = 1;
-    else
-      (it->second)++;
+    info->refcount.fetch_add(1, std::memory_order_relaxed);
+    return info;
   }
 
-  inline void unref_ctx(isl_ctx *ctx)
+  inline void unref_ctx(ctx_info *info)
   {
-    ctx_use_map[ctx] -= 1;
-    if (ctx_use_map[ctx] == 0)
-      isl_ctx_free(ctx);
+    // *info* may be gone once the count is decremented.
+    isl_ctx *ctx = info->ctx;
+    if (info->refcount.fetch_sub(1, std::memory_order_acq_rel) == 1)
+      release_ctx(ctx, info);
   }
 
+  // The ctx_info of islpy.DEFAULT_CONTEXT, or nullptr if there is none.
+  // Must be called while holding the GIL.
+  ctx_info *get_default_ctx_info();
+
+  // Acquires the lock of an isl context for the lifetime of the object.
+  // Must be constructed while holding the GIL (or, in free-threaded Python,
+  // while attached to the interpreter). If the context is busy in another
+  // thread (which may have released the GIL while working in isl), the GIL
+  // is released while waiting for the lock, to avoid deadlock.
+  class ctx_lock
+  {
+    private:
+      ctx_info *m_info;
+
+      void acquire()
+      {
+        if (!m_info->mutex.try_lock())
+        {
+          py::gil_scoped_release release_gil;
+          m_info->mutex.lock();
+        }
+      }
+
+    public:
+      ctx_lock(ctx_info *info)
+      : m_info(nullptr)
+      {
+        if (info)
+        {
+          m_info = ref_ctx(info);
+          acquire();
+        }
+      }
+
+      ctx_lock(isl_ctx *ctx)
+      : m_info(nullptr)
+      {
+        if (ctx)
+        {
+          m_info = ref_ctx(ctx);
+          acquire();
+        }
+      }
+
+      ctx_lock(ctx_lock const &) = delete;
+      ctx_lock &operator=(ctx_lock const &) = delete;
+
+      ~ctx_lock()
+      {
+        if (m_info)
+        {
+          m_info->mutex.unlock();
+          unref_ctx(m_info);
+        }
+      }
+  };
+
 #define WRAP_CLASS(name) \
   struct name { WRAP_CLASS_CONTENT(name) }
 
 #define MAKE_CAST_CTOR(name, from_type, cast_func) \
       name(from_type const &data) \
-      : m_data(nullptr) \
+      : m_data(nullptr), m_ctx_info(nullptr), m_consume(false) \
       { \
+        ctx_lock lock(data.m_ctx_info); \
         isl_##from_type *copy = isl_##from_type##_copy(data.m_data); \
         if (!copy) \
           throw error("isl_" #from_type "_copy failed"); \
-        m_data = cast_func(copy); \
-        if (!m_data) \
+        isl_##name *result = cast_func(copy); \
+        if (!result) \
           throw error(#cast_func " failed"); \
         \
-        ref_ctx(get_ctx()); \
+        take_possession_of(result, data.m_ctx_info); \
       }
 
 #define WRAP_CLASS_CONTENT(name) \
     public: \
       isl_##name        *m_data; \
+      ctx_info          *m_ctx_info; \
+      /* set by consume(), see may_consume */ \
+      bool              m_consume; \
       \
-      name(isl_##name *data) \
-      : m_data(nullptr) \
+      /* If known, pass the ctx_info of data's context as info. */ \
+      name(isl_##name *data, ctx_info *info=nullptr) \
+      : m_data(nullptr), m_ctx_info(nullptr), m_consume(false) \
       /* passing nullptr is allowed to create a (temporarily invalid) */ \
       /* instance */ \
       { \
-        take_possession_of(data); \
+        take_possession_of(data, info); \
       } \
       \
       isl_ctx *get_ctx() \
@@ -113,8 +332,10 @@ namespace isl
       { \
         if (m_data) \
         { \
-          unref_ctx(get_ctx()); \
+          unref_ctx(m_ctx_info); \
           m_data = nullptr; \
+          m_ctx_info = nullptr; \
+          m_consume = false; \
         } \
       } \
       \
@@ -132,19 +353,32 @@ namespace isl
       { \
         if (m_data) \
         { \
-          unref_ctx(get_ctx()); \
-          isl_##name##_free(m_data); \
+          { \
+            ctx_lock lock(m_ctx_info); \
+            isl_##name##_free(m_data); \
+          } \
+          unref_ctx(m_ctx_info); \
           m_data = nullptr; \
+          m_ctx_info = nullptr; \
+          m_consume = false; \
         } \
       } \
       \
-      void take_possession_of(isl_##name *data) \
+      void take_possession_of(isl_##name *data, ctx_info *info=nullptr) \
       { \
+        if (data) \
+        { \
+          /* reference first, info may belong to the current instance */ \
+          if (info) \
+            ref_ctx(info); \
+          else \
+            info = ref_ctx(isl_##name##_get_ctx(data)); \
+        } \
         free_instance(); \
         if (data) \
         { \
           m_data = data; \
-          ref_ctx(get_ctx()); \
+          m_ctx_info = info; \
         } \
       } \
 
@@ -152,12 +386,12 @@ namespace isl
   {
     public:
       isl_ctx           *m_data;
+      ctx_info          *m_ctx_info;
 
-      ctx(isl_ctx *data)
-      : m_data(data)
-      {
-        ref_ctx(data);
-      }
+      ctx(isl_ctx *data, ctx_info *info=nullptr)
+      : m_data(data),
+      m_ctx_info(info ? ref_ctx(info) : ref_ctx(data))
+      { }
 
       bool is_valid() const
       {
@@ -166,14 +400,15 @@ namespace isl
 
       ~ctx()
       {
-        unref_ctx(m_data);
+        unref_ctx(m_ctx_info);
       }
 
       void reset_instance(ctx &other)
       {
-        ref_ctx(other.m_data);
-        unref_ctx(m_data);
+        ref_ctx(other.m_ctx_info);
+        unref_ctx(m_ctx_info);
         m_data = other.m_data;
+        m_ctx_info = other.m_ctx_info;
       }
 
       bool wraps_same_instance_as(ctx const &other)
@@ -182,6 +417,165 @@ namespace isl
       }
   };
 
+  // The ctx_info of *ctx_wrapper* if given, or else that of
+  // islpy.DEFAULT_CONTEXT. Throws if there is neither.
+  inline ctx_info *ctx_info_or_default(ctx *ctx_wrapper, const char *what)
+  {
+    ctx_info *info = nullptr;
+    if (ctx_wrapper && ctx_wrapper->is_valid())
+      info = ctx_wrapper->m_ctx_info;
+    if (!info)
+      info = get_default_ctx_info();
+    if (!info)
+      throw isl::error(std::string(what) + ": no context available");
+    return info;
+  }
+
+  // Parses *s* with *Read*, or copies the result of an earlier call from
+  // the parse cache of *info*. Must be called while holding the lock of
+  // the context, but does not need the GIL. Returns nullptr on failure.
+  template <class T, T *(*Read)(isl_ctx *, const char *),
+           T *(*Copy)(T *), T *(*Free)(T *)>
+  T *parse_cached(ctx_info *info, const char *type_name, const char *s)
+  {
+    T *result = (T *) info->parsed.get(type_name, s);
+    if (result)
+      return Copy(result);
+
+    result = Read(info->ctx, s);
+    if (result && info->parsed.caches(s))
+      info->parsed.put(type_name, s, Copy(result),
+          [](void *obj) { Free((T *) obj); });
+    return result;
+  }
+
+  // Parses each string of the iterable *strings* (see parse_cached) in a
+  // single call without the GIL and returns a list of the results. If a
+  // string cannot be parsed, the error message includes its index.
+  template <class Wrapper, class T, T *(*Read)(isl_ctx *, const char *),
+           T *(*Copy)(T *), T *(*Free)(T *)>
+  py::list read_many(py::handle strings, ctx *ctx_wrapper,
+      const char *type_name)
+  {
+    std::string func_name = std::string("isl_") + type_name + "_read_from_str";
+    if (PyUnicode_Check(strings.ptr()))
+      throw py::type_error("read_many: expected an iterable of strings, "
+          "not a single string");
+
+    std::vector<std::string> sources;
+    for (py::handle item : strings)
+    {
+      Py_ssize_t size;
+      const char *data = PyUnicode_Check(item.ptr())
+        ? PyUnicode_AsUTF8AndSize(item.ptr(), &size) : nullptr;
+      if (!data)
+      {
+        PyErr_Clear();
+        throw py::type_error(("read_many: item "
+              + std::to_string(sources.size()) + " is not a string").c_str());
+      }
+      sources.emplace_back(data, size);
+    }
+
+    ctx_info *info = ctx_info_or_default(ctx_wrapper, func_name.c_str());
+    std::vector<T *> results(sources.size(), nullptr);
+    {
+      ctx_lock lock(info);
+      size_t failed = sources.size();
+      {
+        py::gil_scoped_release release_gil;
+        for (size_t i = 0; i < sources.size(); ++i)
+        {
+          results[i] = parse_cached<T, Read, Copy, Free>(
+              info, type_name, sources[i].c_str());
+          if (!results[i])
+          {
+            failed = i;
+            break;
+          }
+        }
+      }
+
+      if (failed < sources.size())
+      {
+        for (T *result : results)
+          if (result)
+            Free(result);
+
+        try
+        {
+          handle_isl_error(info->ctx, func_name);
+        }
+        catch (isl::error &e)
+        {
+          throw isl::error("string at index " + std::to_string(failed)
+              + ": " + e.what());
+        }
+      }
+    }
+
+    py::list py_results;
+    for (size_t i = 0; i < results.size(); ++i)
+    {
+      T *result = results[i];
+      results[i] = nullptr;
+      try
+      {
+        py_results.append(handle_from_new_ptr(new Wrapper(result, info)));
+      }
+      catch (...)
+      {
+        for (T *rest : results)
+          if (rest)
+            Free(rest);
+        throw;
+      }
+    }
+    return py_results;
+  }
+
+  // Whether *obj* is only referenced by the evaluation stack of the calling
+  // Python frame, i.e. it is a temporary that will be discarded after the
+  // call.
+  inline bool is_unique_temporary(PyObject *obj)
+  {
+#if PY_VERSION_HEX >= 0x030E0000
+    // Locals may be borrowed by the stack as of 3.14, so the reference
+    // count alone is not conclusive.
+    return PyUnstable_Object_IsUniqueReferencedTemporary(obj);
+#elif defined(Py_GIL_DISABLED)
+    return false;
+#else
+    // Not conclusive either: objects passed from C code or only held by
+    // a C container also have a reference count of one, see the warning
+    // in the documentation of Context.set_consume_temporaries.
+    return Py_REFCNT(obj) == 1;
+#endif
+  }
+
+  // Whether the __isl_take argument *arg* may be handed to isl without
+  // making a copy, invalidating it. This is the case if it was marked by
+  // consume(), or if it is a unique temporary and this was enabled for its
+  // context.
+  template <class T>
+  inline bool may_consume(T const &arg)
+  {
+    if (arg.m_consume)
+      return true;
+    if (!arg.m_ctx_info->consume_temporaries.load(std::memory_order_relaxed))
+      return false;
+
+    PyObject *py_arg;
+    {
+      py::object found = py::find(&arg);
+      if (!found.is_valid())
+        return false;
+      // borrowed from here on, the caller keeps it alive
+      py_arg = found.ptr();
+    }
+    return is_unique_temporary(py_arg);
+  }
+
   // matches order in gen_wrap.py
 
   // {{{ part 1
@@ -329,17 +723,351 @@ namespace isl
 
   inline void my_decref(void *user)
   {
+    // isl may free an Id while the GIL is released.
+    py::gil_scoped_acquire acquire_gil;
     Py_DECREF((PyObject *) user);
   }
+
+  // {{{ automatic downcasts
+
+  // Methods of, e.g., Set are also available on BasicSet, by converting
+  // self to a Set. This is deprecated, see AUTO_DOWNCASTS in gen_wrap.py.
+  // Since the overloads that need the conversion come last, calls that do
+  // not need it are not slowed down by the warning.
+  inline void warn_deprecated_downcast(const char *msg)
+  {
+    static const bool enabled = []()
+    {
+      const char *disable = std::getenv("ISLPY_NO_DOWNCAST_DEPRECATION");
+      return !(disable && *disable);
+    }();
+
+    if (enabled && PyErr_WarnEx(PyExc_DeprecationWarning, msg, 1) < 0)
+      throw py::python_error();
+  }
+
+  // Wraps *func* (the implementation of the method of the non-basic class)
+  // to issue the deprecation warning *msg* before calling it.
+  template <class Ret, class... Args>
+  auto deprecated_downcast(Ret (*func)(Args...), const char *msg)
+  {
+    return [func, msg](Args... args) -> Ret
+    {
+      warn_deprecated_downcast(msg);
+      return func(std::forward<Args>(args)...);
+    };
+  }
+
+  // }}}
+
+  // {{{ operators
+
+  // Marks the intermediate result *obj* (which nothing else refers to) to
+  // be handed to isl instead of a copy of it.
+  template <class T>
+  T const &intermediate(py::handle obj)
+  {
+    T &result = py::cast<T &>(obj);
+    result.m_consume = true;
+    return result;
+  }
+
+  template <class T, bool (*IsEqual)(T const &, T const &)>
+  bool eq_operator(T const &self, T const &other)
+  {
+    if (self.is_valid() && other.is_valid()
+        && self.m_ctx_info != other.m_ctx_info)
+      PYTHON_ERROR(AssertionError,
+          "Equality-comparing two objects from different ISL Contexts "
+          "will likely lead to entertaining (but never useful) results. "
+          "In particular, Spaces with matching names will no longer be "
+          "equal.");
+
+    return IsEqual(self, other);
+  }
+
+  template <class T, bool (*IsEqual)(T const &, T const &)>
+  bool ne_operator(T const &self, T const &other)
+  {
+    return !eq_operator<T, IsEqual>(self, other);
+  }
+
+  // Converts the int or Val *num* to the type of the expression *self*,
+  // see _number_to_expr_like in islpy/_monkeypatch.py.
+  py::object number_to_expr_like(py::handle self, py::handle num);
+
+  // -self + other
+  template <class T,
+           py::object (*Add)(T const &, T const &),
+           py::object (*Neg)(T const &)>
+  py::object rsub_operator(T const &self, T const &other)
+  {
+    return Add(intermediate<T>(Neg(self)), other);
+  }
+
+  // Applies *Op* to the expression *self* and *num*, an int or a Val.
+  template <class T, py::object (*Op)(T const &, T const &), class Number>
+  py::object number_operator(py::handle self, Number num)
+  {
+    py::object other = number_to_expr_like(self, py::handle(num));
+    return Op(py::cast<T const &>(self), intermediate<T>(other));
+  }
+
+  template <class T, py::object (*Op)(T const &, T const &)>
+  void def_arith_operator(py::class_<T> &cls, const char *name,
+      std::string const &py_name)
+  {
+    std::string prefix = "def " + std::string(name) + "(self, other: ";
+    cls.def(name, Op, py::arg("other"), py::is_operator(),
+        py::sig((prefix + py_name + ") -> " + py_name).c_str()));
+    // Typed separately, so that expressions that need an implicit
+    // conversion (e.g. PwAff - Aff) still find the overload above.
+    cls.def(name, number_operator<T, Op, py::int_>,
+        py::arg("other"), py::is_operator(),
+        py::sig((prefix + "int) -> " + py_name).c_str()));
+    cls.def(name, number_operator<T, Op, py::handle_t<val>>,
+        py::arg("other"), py::is_operator(),
+        py::sig((prefix + "Val) -> " + py_name).c_str()));
+  }
+
+  // Defines +, - and * for the expression type *T* (Aff, PwAff, ...),
+  // whose other operand may also be an int or a Val.
+  template <class T,
+           py::object (*Add)(T const &, T const &),
+           py::object (*Sub)(T const &, T const &),
+           py::object (*Mul)(T const &, T const &),
+           py::object (*Neg)(T const &)>
+  void def_arith_operators(py::class_<T> &cls, std::string const &py_name)
+  {
+    def_arith_operator<T, Add>(cls, "__add__", py_name);
+    def_arith_operator<T, Add>(cls, "__radd__", py_name);
+    def_arith_operator<T, Sub>(cls, "__sub__", py_name);
+    def_arith_operator<T, rsub_operator<T, Add, Neg>>(cls, "__rsub__", py_name);
+    def_arith_operator<T, Mul>(cls, "__mul__", py_name);
+    def_arith_operator<T, Mul>(cls, "__rmul__", py_name);
+  }
+
+  // }}}
+
+  // {{{ list builders
+
+  // These return the objects visited by an isl foreach function (e.g.
+  // isl_set_foreach_basic_set) as a list, without calling back into Python
+  // for each of them as the generated foreach_* wrappers do. The objects
+  // are collected while holding the context lock (but not the GIL), and
+  // wrapped afterwards.
+
+  template <class T, T *(*Free)(T *)>
+  isl_stat collect_object(T *obj, void *user)
+  {
+    // called from isl, must not throw
+    try
+    {
+      static_cast<std::vector<T *> *>(user)->push_back(obj);
+      return isl_stat_ok;
+    }
+    catch (...)
+    {
+      Free(obj);
+      return isl_stat_error;
+    }
+  }
+
+  template <class T, T *(*Free)(T *)>
+  isl_stat collect_piece(isl_set *set, T *obj, void *user)
+  {
+    // called from isl, must not throw
+    try
+    {
+      static_cast<std::vector<std::pair<isl_set *, T *>> *>(user)
+        ->emplace_back(set, obj);
+      return isl_stat_ok;
+    }
+    catch (...)
+    {
+      isl_set_free(set);
+      Free(obj);
+      return isl_stat_error;
+    }
+  }
+
+  // Calls *foreach* on the isl object of *self* with *callback*, which
+  // appends to *objects*. Frees the objects collected so far if that fails.
+  template <class Self, class Collected, class Callback>
+  void collect(
+      isl_stat (*foreach)(decltype(Self::m_data), Callback, void *),
+      Self const &self, Callback callback, std::vector<Collected> &objects,
+      void (*free_collected)(Collected const &), const char *func_name)
+  {
+    if (!self.is_valid())
+      throw isl::error(
+          std::string("passed invalid arg to ") + func_name + " for self");
+
+    ctx_info *info = self.m_ctx_info;
+    ctx_lock lock(info);
+    isl_ctx_reset_error(info->ctx);
+    isl_stat status;
+    {
+      py::gil_scoped_release release_gil;
+      status = foreach(self.m_data, callback, &objects);
+    }
+
+    if (status == isl_stat_error)
+    {
+      for (Collected const &obj : objects)
+        free_collected(obj);
+      handle_isl_error(info->ctx, func_name);
+    }
+  }
+
+  template <class Wrapper, class T>
+  py::object wrap_collected(T *&obj, ctx_info *info)
+  {
+    std::unique_ptr<Wrapper> wrapper(new Wrapper(obj, info));
+    // owned by the wrapper from here on
+    obj = nullptr;
+    return handle_from_new_ptr(wrapper.release());
+  }
+
+  // The list of *Wrapper*s of the objects visited by *Foreach*.
+  template <class Wrapper, class T, T *(*Free)(T *), class Self,
+           isl_stat (*Foreach)(decltype(Self::m_data),
+             isl_stat (*)(T *, void *), void *)>
+  py::list foreach_list(Self const &self, const char *func_name)
+  {
+    std::vector<T *> objects;
+    collect(Foreach, self, collect_object<T, Free>, objects,
+        +[](T *const &obj) { Free(obj); }, func_name);
+
+    ctx_info *info = self.m_ctx_info;
+    py::list result;
+    try
+    {
+      for (T *&obj : objects)
+        result.append(wrap_collected<Wrapper>(obj, info));
+    }
+    catch (...)
+    {
+      ctx_lock lock(info);
+      for (T *obj : objects)
+        if (obj)
+          Free(obj);
+      throw;
+    }
+    return result;
+  }
+
+  // The list of (Set, *Wrapper*) tuples of the pieces visited by *Foreach*.
+  template <class Wrapper, class T, T *(*Free)(T *), class Self,
+           isl_stat (*Foreach)(decltype(Self::m_data),
+             isl_stat (*)(isl_set *, T *, void *), void *)>
+  py::list foreach_piece_list(Self const &self, const char *func_name)
+  {
+    std::vector<std::pair<isl_set *, T *>> pieces;
+    collect(Foreach, self, collect_piece<T, Free>, pieces,
+        +[](std::pair<isl_set *, T *> const &piece)
+        {
+          isl_set_free(piece.first);
+          Free(piece.second);
+        }, func_name);
+
+    ctx_info *info = self.m_ctx_info;
+    py::list result;
+    try
+    {
+      for (auto &[set, obj] : pieces)
+      {
+        py::object py_set = wrap_collected<isl::set>(set, info);
+        result.append(
+            py::make_tuple(py_set, wrap_collected<Wrapper>(obj, info)));
+      }
+    }
+    catch (...)
+    {
+      ctx_lock lock(info);
+      for (auto &[set, obj] : pieces)
+      {
+        if (set)
+          isl_set_free(set);
+        if (obj)
+          Free(obj);
+      }
+      throw;
+    }
+    return result;
+  }
+
+  // }}}
 }
 
 
+namespace islpy
+{
+  // {{{ owned isl pointers
+
+  // For isl objects that are not (yet) owned by a wrapper, e.g.
+  // owned<isl_set>.
+
+  inline void free_isl(isl_val *p) { isl_val_free(p); }
+  inline void free_isl(isl_space *p) { isl_space_free(p); }
+  inline void free_isl(isl_mat *p) { isl_mat_free(p); }
+  inline void free_isl(isl_basic_map *p) { isl_basic_map_free(p); }
+  inline void free_isl(isl_basic_set *p) { isl_basic_set_free(p); }
+  inline void free_isl(isl_map *p) { isl_map_free(p); }
+  inline void free_isl(isl_set *p) { isl_set_free(p); }
+  inline void free_isl(isl_union_map *p) { isl_union_map_free(p); }
+  inline void free_isl(isl_union_set *p) { isl_union_set_free(p); }
+  inline void free_isl(isl_local_space *p) { isl_local_space_free(p); }
+  inline void free_isl(isl_aff *p) { isl_aff_free(p); }
+  inline void free_isl(isl_qpolynomial *p) { isl_qpolynomial_free(p); }
+  inline void free_isl(isl_pw_qpolynomial *p) { isl_pw_qpolynomial_free(p); }
+  inline void free_isl(isl_term *p) { isl_term_free(p); }
+  inline void free_isl(isl_point *p) { isl_point_free(p); }
+
+  struct isl_deleter
+  {
+    template <class T>
+    void operator()(T *p) const
+    {
+      free_isl(p);
+    }
+  };
+
+  template <class T>
+  using owned = std::unique_ptr<T, isl_deleter>;
+
+  // }}}
+
+  // {{{ constructors from arrays, see wrap_isl_numpy.cpp
+
+  void init_vec_from_array(isl::vec *t, py::handle values,
+      isl::ctx *ctx_wrapper);
+  void init_mat_from_array(isl::mat *t, py::handle values,
+      isl::ctx *ctx_wrapper);
+  void init_multi_val_from_array(isl::multi_val *t, isl::space const &space,
+      py::handle values);
+
+  // }}}
+}
+
 
 
 
 #define MAKE_WRAP(name, py_name) \
-  py::class_<isl::name> wrap_##name(m, #py_name, py::dynamic_attr()); \
+  py::class_<isl::name> wrap_##name(m, #py_name, py::dynamic_attr(), \
+      py::is_weak_referenceable()); \
   wrap_##name.def("_is_valid", &isl::name::is_valid); \
+  wrap_##name.def("consume", \
+      [](py::object self) \
+      { \
+        py::cast<isl::name &>(self).m_consume = true; \
+        return self; \
+      }, \
+      py::sig("def consume(self) -> Self"), \
+      "consume(self) -> Self\n\n" \
+      "Mark *self* to be handed to (and thereby invalidated by) the " \
+      "next method to which it is passed as an argument, instead of a " \
+      "copy of it. See :ref:`consuming-arguments`."); \
   wrap_##name.attr("_base_name") = #name; \
   wrap_##name.attr("_isl_name") = "isl_"#name; \
 
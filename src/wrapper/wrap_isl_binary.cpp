@@ -0,0 +1,1527 @@
+#include "wrap_isl.hpp"
+
+#include <algorithm>
+#include <vector>
+
+// {{{ binary encoding of isl objects
+//
+// A compact encoding used for pickling, which (unlike the text format) can be
+// decoded without running isl's parser. Objects are encoded by their
+// constraint matrices (for sets and maps) and terms (for quasi-polynomials).
+//
+// Layout, versioned by format_version below:
+//
+//   object    := "ISLB" version:u8 kind:u8 space body
+//              | "ISLB" version:u8 (kind | 0x80):u8 body
+//
+// where, in the second form, the space is passed separately to the decoder.
+// This allows sharing spaces between objects, see islpy.Pickler.
+//
+//   uint      := unsigned LEB128
+//   int       := uint of (|v| << 1) | (v < 0), arbitrarily large
+//   rational  := numerator:int denominator:uint
+//   name      := 0 | 1 length:uint bytes
+//
+//   space     := 0 params                      (parameter space)
+//              | 1 params tuple                (set space)
+//              | 2 params tuple tuple          (map space)
+//   params    := n:uint name*n
+//   tuple     := flags:u8 [tuple_name:bytes if flags & 1]
+//                (tuple tuple if flags & 2, i.e. a wrapped map space,
+//                 otherwise n:uint name*n)
+//
+//   basic     := n_div:uint n_eq:uint n_ineq:uint row*(n_eq+n_ineq)
+//                where each row has one int per constant, parameter,
+//                (input,) set/output and div column
+//   set       := n:uint basic*n         (same for maps)
+//
+//   divs      := n:uint expr*n          (expr k may only refer to divs < k)
+//   expr      := rational for each constant, parameter, set and div column,
+//                representing a sum in which each div k stands for
+//                floor(expr_k)
+//   qpoly     := divs n_terms:uint term*n_terms
+//   term      := coefficient:rational exponent:uint for each parameter,
+//                set and div column
+//
+// The spaces and bodies of the object kinds are:
+//
+//   basic_set, basic_map        the space, basic
+//   set, map                    the space, set
+//   union_set, union_map        the parameter space, n:uint (space set)*n
+//   aff                         the domain space, divs expr
+//   qpolynomial                 the domain space, qpoly
+//   pw_qpolynomial              the domain space, n:uint (set qpoly)*n
+//   space                       the space itself, empty
+//   pw_aff                      the domain space, n:uint (set divs expr)*n
+//
+// Canonical encodings (used by stable_hash) list unordered items such as
+// constraints, basic sets and pieces in sorted order.
+//
+// Rational sets and maps as well as NaN or infinite values are not
+// supported, those need to use the text format.
+//
+// Since decoding may run on untrusted or corrupted data (e.g. from
+// islpy.cache), the decoder rejects data for which it would do work out of
+// proportion to its length:
+//
+//   - counts must not exceed the amount of remaining data, taking into
+//     account the minimum size of each counted item,
+//   - a basic set or map may have at most as many divs as constraints,
+//   - tuples may be nested at most max_tuple_depth deep,
+//   - each term of a quasi-polynomial has degree at most max_term_degree,
+//     and the degrees of all terms add up to at most degree_budget of the
+//     length of the data.
+//
+// The encoder returns None for objects exceeding these bounds, so that
+// they are written in the text format instead.
+
+namespace islpy
+{
+  namespace
+  {
+    const char magic[] = "ISLB";
+    const unsigned char format_version = 1;
+
+    enum object_kind: unsigned char
+    {
+      kind_basic_set = 1,
+      kind_set,
+      kind_basic_map,
+      kind_map,
+      kind_union_set,
+      kind_union_map,
+      kind_aff,
+      kind_qpolynomial,
+      kind_pw_qpolynomial,
+      kind_space,
+      // Only for canonical encodings (see writer::put_unordered), which
+      // are not decoded.
+      kind_pw_aff,
+
+      // flag: the space is not part of the data, see decode
+      kind_external_space = 0x80,
+    };
+
+    enum space_kind: unsigned char
+    {
+      space_params = 0,
+      space_set,
+      space_map,
+    };
+
+    const unsigned char tuple_has_name = 1;
+    const unsigned char tuple_is_wrapped = 2;
+
+    // decoding bounds, see above
+    const unsigned max_tuple_depth = 64;
+    const unsigned max_term_degree = 64;
+
+    uint64_t degree_budget(size_t size)
+    {
+      return max_term_degree + 4 * uint64_t(size);
+    }
+
+    // thrown by the encoder for objects that it cannot represent
+    struct unsupported { };
+
+    // {{{ writer
+
+    class writer
+    {
+      private:
+        isl_ctx *m_ctx;
+        bool m_canonical;
+        std::string m_buf;
+        // the sum of the degrees of the terms written so far
+        uint64_t m_degree = 0;
+
+        template <class T>
+        T *check(T *p, const char *func_name)
+        {
+          if (!p)
+            isl::handle_isl_error(m_ctx, func_name);
+          return p;
+        }
+
+        unsigned check_size(isl_size n, const char *func_name)
+        {
+          if (n < 0)
+            isl::handle_isl_error(m_ctx, func_name);
+          return (unsigned) n;
+        }
+
+        bool check_bool(isl_bool b, const char *func_name)
+        {
+          if (b < 0)
+            isl::handle_isl_error(m_ctx, func_name);
+          return b;
+        }
+
+        // LEB128 of a little-endian multi-word unsigned number
+        void put_uint_words(std::vector<uint64_t> &words)
+        {
+          while (true)
+          {
+            unsigned char byte = words[0] & 0x7f;
+
+            // shift right by 7
+            for (size_t i = 0; i < words.size(); ++i)
+            {
+              words[i] >>= 7;
+              if (i + 1 < words.size())
+                words[i] |= words[i + 1] << 57;
+            }
+            while (words.size() > 1 && words.back() == 0)
+              words.pop_back();
+
+            if (words.size() == 1 && words[0] == 0)
+            {
+              put_u8(byte);
+              return;
+            }
+            put_u8(byte | 0x80);
+          }
+        }
+
+      public:
+        writer(isl_ctx *ctx, bool canonical=false)
+        : m_ctx(ctx), m_canonical(canonical)
+        { }
+
+        // Writes the items put by put_item(w, i) for i in [0, n). In
+        // canonical mode, they are written in sorted order so that the
+        // result does not depend on the order in which isl stores them.
+        template <class F>
+        void put_unordered(size_t n, F put_item)
+        {
+          if (!m_canonical)
+          {
+            for (size_t i = 0; i < n; ++i)
+              put_item(*this, i);
+            return;
+          }
+
+          std::vector<std::string> items;
+          for (size_t i = 0; i < n; ++i)
+          {
+            writer item_w(m_ctx, true);
+            put_item(item_w, i);
+            m_degree += item_w.m_degree;
+            items.push_back(std::move(item_w.m_buf));
+          }
+          std::sort(items.begin(), items.end());
+          for (auto const &item: items)
+            m_buf += item;
+        }
+
+        std::string const &data() const
+        {
+          return m_buf;
+        }
+
+        // Throws unsupported if the data written so far could not be
+        // decoded within the bounds checked by the reader.
+        void check_bounds() const
+        {
+          if (m_degree > degree_budget(m_buf.size()))
+            throw unsupported();
+        }
+
+        void put_u8(unsigned char c)
+        {
+          m_buf.push_back((char) c);
+        }
+
+        void put_uint(uint64_t v)
+        {
+          while (v >= 0x80)
+          {
+            put_u8((v & 0x7f) | 0x80);
+            v >>= 7;
+          }
+          put_u8((unsigned char) v);
+        }
+
+        void put_name(const char *s)
+        {
+          if (!s)
+          {
+            put_u8(0);
+            return;
+          }
+          put_u8(1);
+          size_t len = strlen(s);
+          put_uint(len);
+          m_buf.append(s, len);
+        }
+
+        // *v* must be an integer.
+        void put_int(isl_val *v)
+        {
+          int sign = isl_val_sgn(v);
+          if (sign == 0)
+          {
+            put_u8(0);
+            return;
+          }
+
+          size_t n_words = check_size(isl_val_n_abs_num_chunks(v, 8),
+              "isl_val_n_abs_num_chunks");
+          std::vector<uint64_t> words(n_words + 1, 0);
+          if (isl_val_get_abs_num_chunks(v, 8, words.data()) < 0)
+            isl::handle_isl_error(m_ctx, "isl_val_get_abs_num_chunks");
+
+          if (n_words == 1 && words[0] < (uint64_t(1) << 63))
+          {
+            put_uint((words[0] << 1) | (sign < 0));
+            return;
+          }
+
+          // shift left by 1, insert the sign
+          for (size_t i = n_words; i > 0; --i)
+            words[i] = (words[i] << 1) | (words[i - 1] >> 63);
+          words[0] = (words[0] << 1) | (sign < 0);
+          if (words.back() == 0)
+            words.pop_back();
+          put_uint_words(words);
+        }
+
+        void put_rational(isl_val *v)
+        {
+          if (!isl_val_is_rat(v))
+            throw unsupported();
+
+          owned<isl_val> den(check(isl_val_get_den_val(v), "isl_val_get_den_val"));
+          owned<isl_val> num(check(isl_val_mul(isl_val_copy(v),
+                  isl_val_copy(den.get())), "isl_val_mul"));
+          put_int(num.get());
+          put_int(den.get());
+        }
+
+        // {{{ spaces
+
+        void put_params(isl_space *space)
+        {
+          unsigned n = check_size(isl_space_dim(space, isl_dim_param),
+              "isl_space_dim");
+          put_uint(n);
+          for (unsigned i = 0; i < n; ++i)
+            put_name(isl_space_get_dim_name(space, isl_dim_param, i));
+        }
+
+        // *space* must be a set space.
+        void put_tuple(isl_space *space, unsigned depth=0)
+        {
+          if (depth > max_tuple_depth)
+            throw unsupported();
+
+          bool has_name = check_bool(
+              isl_space_has_tuple_name(space, isl_dim_set),
+              "isl_space_has_tuple_name");
+          bool is_wrapped = check_bool(
+              isl_space_is_wrapping(space), "isl_space_is_wrapping");
+
+          put_u8((has_name ? tuple_has_name : 0)
+              | (is_wrapped ? tuple_is_wrapped : 0));
+          if (has_name)
+            put_name(isl_space_get_tuple_name(space, isl_dim_set));
+
+          if (is_wrapped)
+          {
+            owned<isl_space> map_space(check(
+                  isl_space_unwrap(isl_space_copy(space)), "isl_space_unwrap"));
+            put_map_tuples(map_space.get(), depth + 1);
+          }
+          else
+          {
+            unsigned n = check_size(isl_space_dim(space, isl_dim_set),
+                "isl_space_dim");
+            put_uint(n);
+            for (unsigned i = 0; i < n; ++i)
+              put_name(isl_space_get_dim_name(space, isl_dim_set, i));
+          }
+        }
+
+        void put_map_tuples(isl_space *space, unsigned depth=0)
+        {
+          owned<isl_space> domain(check(
+                isl_space_domain(isl_space_copy(space)), "isl_space_domain"));
+          owned<isl_space> range(check(
+                isl_space_range(isl_space_copy(space)), "isl_space_range"));
+          put_tuple(domain.get(), depth);
+          put_tuple(range.get(), depth);
+        }
+
+        void put_space(isl_space *space)
+        {
+          if (check_bool(isl_space_is_params(space), "isl_space_is_params"))
+          {
+            put_u8(space_params);
+            put_params(space);
+          }
+          else if (check_bool(isl_space_is_set(space), "isl_space_is_set"))
+          {
+            put_u8(space_set);
+            put_params(space);
+            put_tuple(space);
+          }
+          else
+          {
+            put_u8(space_map);
+            put_params(space);
+            put_map_tuples(space);
+          }
+        }
+
+        // }}}
+
+        // {{{ sets and maps
+
+        void put_rows(isl_mat *mat)
+        {
+          unsigned n_row = check_size(isl_mat_rows(mat), "isl_mat_rows");
+          unsigned n_col = check_size(isl_mat_cols(mat), "isl_mat_cols");
+          put_unordered(n_row, [&](writer &w, size_t i)
+              {
+                for (unsigned j = 0; j < n_col; ++j)
+                {
+                  owned<isl_val> v(check(isl_mat_get_element_val(mat, i, j),
+                      "isl_mat_get_element_val"));
+                  w.put_int(v.get());
+                }
+              });
+        }
+
+        void put_counts(unsigned n_div, isl_mat *eq, isl_mat *ineq)
+        {
+          unsigned n_eq = check_size(isl_mat_rows(eq), "isl_mat_rows");
+          unsigned n_ineq = check_size(isl_mat_rows(ineq), "isl_mat_rows");
+          if (n_div > n_eq + n_ineq)
+            throw unsupported();
+
+          put_uint(n_div);
+          put_uint(n_eq);
+          put_uint(n_ineq);
+        }
+
+        void put_basic(isl_basic_map *bmap)
+        {
+          if (check_bool(isl_basic_map_is_rational(bmap),
+                "isl_basic_map_is_rational"))
+            throw unsupported();
+
+          owned<isl_mat> eq(check(isl_basic_map_equalities_matrix(bmap,
+                  isl_dim_cst, isl_dim_param, isl_dim_in, isl_dim_out,
+                  isl_dim_div), "isl_basic_map_equalities_matrix"));
+          owned<isl_mat> ineq(check(isl_basic_map_inequalities_matrix(bmap,
+                  isl_dim_cst, isl_dim_param, isl_dim_in, isl_dim_out,
+                  isl_dim_div), "isl_basic_map_inequalities_matrix"));
+
+          put_counts(check_size(isl_basic_map_dim(bmap, isl_dim_div),
+                "isl_basic_map_dim"), eq.get(), ineq.get());
+          put_rows(eq.get());
+          put_rows(ineq.get());
+        }
+
+        void put_basic(isl_basic_set *bset)
+        {
+          if (isl_basic_set_is_rational(bset))
+            throw unsupported();
+
+          owned<isl_mat> eq(check(isl_basic_set_equalities_matrix(bset,
+                  isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div),
+                "isl_basic_set_equalities_matrix"));
+          owned<isl_mat> ineq(check(isl_basic_set_inequalities_matrix(bset,
+                  isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div),
+                "isl_basic_set_inequalities_matrix"));
+
+          put_counts(check_size(isl_basic_set_dim(bset, isl_dim_div),
+                "isl_basic_set_dim"), eq.get(), ineq.get());
+          put_rows(eq.get());
+          put_rows(ineq.get());
+        }
+
+        template <class Basic>
+        static isl_stat collect_basic(Basic *basic, void *user)
+        {
+          static_cast<std::vector<owned<Basic>> *>(user)->emplace_back(basic);
+          return isl_stat_ok;
+        }
+
+        void put_set(isl_set *set)
+        {
+          std::vector<owned<isl_basic_set>> basics;
+          if (isl_set_foreach_basic_set(set, collect_basic<isl_basic_set>,
+                &basics) < 0)
+            isl::handle_isl_error(m_ctx, "isl_set_foreach_basic_set");
+          put_uint(basics.size());
+          put_unordered(basics.size(), [&](writer &w, size_t i)
+              { w.put_basic(basics[i].get()); });
+        }
+
+        void put_map(isl_map *map)
+        {
+          std::vector<owned<isl_basic_map>> basics;
+          if (isl_map_foreach_basic_map(map, collect_basic<isl_basic_map>,
+                &basics) < 0)
+            isl::handle_isl_error(m_ctx, "isl_map_foreach_basic_map");
+          put_uint(basics.size());
+          put_unordered(basics.size(), [&](writer &w, size_t i)
+              { w.put_basic(basics[i].get()); });
+        }
+
+        // }}}
+
+        // {{{ expressions
+
+        // *aff* is an expression in terms of the first *n_div* divs
+        // of its local space.
+        void put_expr(isl_aff *aff, unsigned n_param, unsigned n_in,
+            unsigned n_div)
+        {
+          owned<isl_val> v(check(isl_aff_get_constant_val(aff),
+                "isl_aff_get_constant_val"));
+          put_rational(v.get());
+
+          const isl_dim_type types[] = {isl_dim_param, isl_dim_in, isl_dim_div};
+          const unsigned counts[] = {n_param, n_in, n_div};
+          for (int t = 0; t < 3; ++t)
+            for (unsigned i = 0; i < counts[t]; ++i)
+            {
+              v.reset(check(isl_aff_get_coefficient_val(aff, types[t], i),
+                    "isl_aff_get_coefficient_val"));
+              put_rational(v.get());
+            }
+        }
+
+        // Writes the divs of the local space of *aff*.
+        void put_divs(isl_aff *aff, unsigned n_param, unsigned n_in)
+        {
+          unsigned n_div = check_size(isl_aff_dim(aff, isl_dim_div),
+              "isl_aff_dim");
+          put_uint(n_div);
+          for (unsigned k = 0; k < n_div; ++k)
+          {
+            owned<isl_aff> div(check(isl_aff_get_div(aff, k),
+                  "isl_aff_get_div"));
+            put_expr(div.get(), n_param, n_in, k);
+          }
+        }
+
+        void put_aff(isl_aff *aff)
+        {
+          if (check_bool(isl_aff_is_nan(aff), "isl_aff_is_nan"))
+            throw unsupported();
+
+          unsigned n_param = check_size(isl_aff_dim(aff, isl_dim_param),
+              "isl_aff_dim");
+          unsigned n_in = check_size(isl_aff_dim(aff, isl_dim_in),
+              "isl_aff_dim");
+          put_divs(aff, n_param, n_in);
+          put_expr(aff, n_param, n_in,
+              check_size(isl_aff_dim(aff, isl_dim_div), "isl_aff_dim"));
+        }
+
+        static isl_stat collect_term(isl_term *term, void *user)
+        {
+          static_cast<std::vector<owned<isl_term>> *>(user)->emplace_back(term);
+          return isl_stat_ok;
+        }
+
+        void put_qpolynomial(isl_qpolynomial *qp)
+        {
+          if (check_bool(isl_qpolynomial_is_nan(qp), "isl_qpolynomial_is_nan")
+              || check_bool(isl_qpolynomial_is_infty(qp),
+                "isl_qpolynomial_is_infty")
+              || check_bool(isl_qpolynomial_is_neginfty(qp),
+                "isl_qpolynomial_is_neginfty"))
+            throw unsupported();
+
+          std::vector<owned<isl_term>> terms;
+          if (isl_qpolynomial_foreach_term(qp, collect_term, &terms) < 0)
+            isl::handle_isl_error(m_ctx, "isl_qpolynomial_foreach_term");
+
+          // All terms share the divs of the quasi-polynomial.
+          unsigned n_param = check_size(
+              isl_qpolynomial_dim(qp, isl_dim_param), "isl_qpolynomial_dim");
+          unsigned n_in = check_size(
+              isl_qpolynomial_dim(qp, isl_dim_in), "isl_qpolynomial_dim");
+          unsigned n_div = 0;
+          if (terms.empty())
+            put_uint(0);
+          else
+          {
+            isl_term *term = terms[0].get();
+            n_div = check_size(isl_term_dim(term, isl_dim_div), "isl_term_dim");
+            put_uint(n_div);
+            for (unsigned k = 0; k < n_div; ++k)
+            {
+              owned<isl_aff> div(check(isl_term_get_div(term, k),
+                    "isl_term_get_div"));
+              put_expr(div.get(), n_param, n_in, k);
+            }
+          }
+
+          put_uint(terms.size());
+          put_unordered(terms.size(), [&](writer &w, size_t i_term)
+              {
+                isl_term *term = terms[i_term].get();
+                owned<isl_val> coeff(check(
+                      isl_term_get_coefficient_val(term),
+                      "isl_term_get_coefficient_val"));
+                w.put_rational(coeff.get());
+
+                const isl_dim_type types[] = {
+                  isl_dim_param, isl_dim_set, isl_dim_div};
+                const unsigned counts[] = {n_param, n_in, n_div};
+                uint64_t degree = 0;
+                for (int t = 0; t < 3; ++t)
+                  for (unsigned i = 0; i < counts[t]; ++i)
+                  {
+                    unsigned exp = check_size(
+                        isl_term_get_exp(term, types[t], i),
+                        "isl_term_get_exp");
+                    degree += exp;
+                    w.put_uint(exp);
+                  }
+                if (degree > max_term_degree)
+                  throw unsupported();
+                w.m_degree += degree;
+              });
+        }
+
+        // }}}
+    };
+
+    // }}}
+
+    // {{{ reader
+
+    class reader
+    {
+      private:
+        isl_ctx *m_ctx;
+        const unsigned char *m_pos, *m_end;
+        // the sum of the degrees of the terms that may still be read
+        uint64_t m_degree_budget;
+
+        [[noreturn]] void fail(const char *what)
+        {
+          throw isl::error(std::string("invalid binary data: ") + what);
+        }
+
+        template <class T>
+        T *check(T *p, const char *func_name)
+        {
+          if (!p)
+            isl::handle_isl_error(m_ctx, func_name);
+          return p;
+        }
+
+        // Reads an int into *words* (little-endian, magnitude) and returns
+        // whether it is negative.
+        bool get_int_words(std::vector<uint64_t> &words)
+        {
+          words.assign(1, 0);
+          unsigned bit = 0;
+          while (true)
+          {
+            unsigned char byte = get_u8();
+            uint64_t bits = byte & 0x7f;
+            unsigned word = bit / 64, shift = bit % 64;
+            if (word >= words.size())
+              words.push_back(0);
+            words[word] |= bits << shift;
+            if (shift > 57)
+            {
+              if (word + 1 >= words.size())
+                words.push_back(0);
+              words[word + 1] |= bits >> (64 - shift);
+            }
+            bit += 7;
+            if (!(byte & 0x80))
+              break;
+          }
+
+          bool negative = words[0] & 1;
+          for (size_t i = 0; i < words.size(); ++i)
+          {
+            words[i] >>= 1;
+            if (i + 1 < words.size())
+              words[i] |= words[i + 1] << 63;
+          }
+          while (words.size() > 1 && words.back() == 0)
+            words.pop_back();
+          return negative;
+        }
+
+      public:
+        reader(isl_ctx *ctx, const char *data, size_t size)
+        : m_ctx(ctx),
+        m_pos((const unsigned char *) data),
+        m_end((const unsigned char *) data + size),
+        m_degree_budget(degree_budget(size))
+        { }
+
+        bool at_end() const
+        {
+          return m_pos == m_end;
+        }
+
+        unsigned char get_u8()
+        {
+          if (m_pos == m_end)
+            fail("unexpected end of data");
+          return *m_pos++;
+        }
+
+        uint64_t get_uint()
+        {
+          uint64_t result = 0;
+          for (unsigned shift = 0; ; shift += 7)
+          {
+            if (shift > 63)
+              fail("integer too large");
+            unsigned char byte = get_u8();
+            result |= uint64_t(byte & 0x7f) << shift;
+            if (!(byte & 0x80))
+              return result;
+          }
+        }
+
+        // Counts are bounded by the amount of remaining data, so that
+        // corrupted data cannot trigger huge allocations. If given, each
+        // item takes at least *item_size* bytes.
+        unsigned get_count(size_t item_size=0)
+        {
+          uint64_t n = get_uint();
+          uint64_t remaining = m_end - m_pos;
+          if (item_size ? n > remaining / item_size : n > remaining + 1)
+            fail("count too large");
+          return (unsigned) n;
+        }
+
+        bool get_name(std::string &result)
+        {
+          unsigned char present = get_u8();
+          if (!present)
+            return false;
+          uint64_t len = get_uint();
+          if (len > uint64_t(m_end - m_pos))
+            fail("unexpected end of data");
+          result.assign((const char *) m_pos, len);
+          m_pos += len;
+          return true;
+        }
+
+        // Returns true and sets *small* if the value fits into a long,
+        // otherwise sets *big*.
+        bool get_int(long &small, owned<isl_val> &big)
+        {
+          std::vector<uint64_t> words;
+          bool negative = get_int_words(words);
+          if (words.size() == 1 && words[0] <= (uint64_t) LONG_MAX)
+          {
+            small = negative ? -(long) words[0] : (long) words[0];
+            return true;
+          }
+
+          big.reset(check(isl_val_int_from_chunks(m_ctx, words.size(), 8,
+                  words.data()), "isl_val_int_from_chunks"));
+          if (negative)
+            big.reset(check(isl_val_neg(big.release()), "isl_val_neg"));
+          return false;
+        }
+
+        isl_val *get_int_val()
+        {
+          long small;
+          owned<isl_val> big;
+          if (get_int(small, big))
+            return check(isl_val_int_from_si(m_ctx, small),
+                "isl_val_int_from_si");
+          return big.release();
+        }
+
+        isl_val *get_rational()
+        {
+          owned<isl_val> num(get_int_val());
+          owned<isl_val> den(get_int_val());
+          if (isl_val_is_one(den.get()))
+            return num.release();
+          if (!isl_val_is_pos(den.get()))
+            fail("invalid denominator");
+          return check(isl_val_div(num.release(), den.release()),
+              "isl_val_div");
+        }
+
+        // {{{ spaces
+
+        isl_space *get_params()
+        {
+          unsigned n = get_count();
+          owned<isl_space> space(check(isl_space_params_alloc(m_ctx, n),
+                "isl_space_params_alloc"));
+          std::string name;
+          for (unsigned i = 0; i < n; ++i)
+            if (get_name(name))
+              space.reset(check(isl_space_set_dim_name(space.release(),
+                      isl_dim_param, i, name.c_str()),
+                    "isl_space_set_dim_name"));
+          return space.release();
+        }
+
+        // Returns a set space with the parameters of *params*.
+        isl_space *get_tuple(isl_space *params, unsigned depth=0)
+        {
+          if (depth > max_tuple_depth)
+            fail("tuples nested too deeply");
+
+          unsigned char flags = get_u8();
+          std::string tuple_name;
+          if (flags & tuple_has_name)
+            if (!get_name(tuple_name))
+              fail("missing tuple name");
+
+          owned<isl_space> space;
+          if (flags & tuple_is_wrapped)
+            space.reset(check(isl_space_wrap(get_map_tuples(params, depth + 1)),
+                  "isl_space_wrap"));
+          else
+          {
+            unsigned n = get_count();
+            space.reset(check(isl_space_add_dims(
+                    isl_space_set_from_params(isl_space_copy(params)),
+                    isl_dim_set, n), "isl_space_add_dims"));
+            std::string name;
+            for (unsigned i = 0; i < n; ++i)
+              if (get_name(name))
+                space.reset(check(isl_space_set_dim_name(space.release(),
+                        isl_dim_set, i, name.c_str()),
+                      "isl_space_set_dim_name"));
+          }
+
+          if (flags & tuple_has_name)
+            space.reset(check(isl_space_set_tuple_name(space.release(),
+                    isl_dim_set, tuple_name.c_str()),
+                  "isl_space_set_tuple_name"));
+          return space.release();
+        }
+
+        isl_space *get_map_tuples(isl_space *params, unsigned depth=0)
+        {
+          owned<isl_space> domain(get_tuple(params, depth));
+          owned<isl_space> range(get_tuple(params, depth));
+          return check(isl_space_map_from_domain_and_range(
+                domain.release(), range.release()),
+              "isl_space_map_from_domain_and_range");
+        }
+
+        isl_space *get_space()
+        {
+          unsigned char kind = get_u8();
+          owned<isl_space> params(get_params());
+          switch (kind)
+          {
+            case space_params:
+              return params.release();
+            case space_set:
+              return get_tuple(params.get());
+            case space_map:
+              return get_map_tuples(params.get());
+            default:
+              fail("unknown space kind");
+          }
+        }
+
+        // }}}
+
+        // {{{ sets and maps
+
+        isl_mat *get_rows(unsigned n_row, unsigned n_col)
+        {
+          // each element takes at least one byte
+          if (n_row && n_col > uint64_t(m_end - m_pos) / n_row)
+            fail("count too large");
+
+          owned<isl_mat> mat(check(isl_mat_alloc(m_ctx, n_row, n_col),
+                "isl_mat_alloc"));
+          for (unsigned i = 0; i < n_row; ++i)
+            for (unsigned j = 0; j < n_col; ++j)
+            {
+              long small;
+              owned<isl_val> big;
+              if (get_int(small, big))
+                mat.reset(check(isl_mat_set_element_si(mat.release(),
+                        i, j, small), "isl_mat_set_element_si"));
+              else
+                mat.reset(check(isl_mat_set_element_val(mat.release(),
+                        i, j, big.release()), "isl_mat_set_element_val"));
+            }
+          return mat.release();
+        }
+
+        isl_basic_map *get_basic_map(isl_space *space)
+        {
+          unsigned n_param = isl_space_dim(space, isl_dim_param);
+          unsigned n_in = isl_space_dim(space, isl_dim_in);
+          unsigned n_out = isl_space_dim(space, isl_dim_out);
+          unsigned n_div = get_count();
+          unsigned n_eq = get_count();
+          unsigned n_ineq = get_count();
+          if (n_div > uint64_t(n_eq) + n_ineq)
+            fail("more divs than constraints");
+          unsigned n_col = 1 + n_param + n_in + n_out + n_div;
+
+          owned<isl_mat> eq(get_rows(n_eq, n_col));
+          owned<isl_mat> ineq(get_rows(n_ineq, n_col));
+          // Divs become existentially quantified variables, their
+          // definitions are recovered from the constraints defining them.
+          return check(isl_basic_map_from_constraint_matrices(
+                isl_space_copy(space), eq.release(), ineq.release(),
+                isl_dim_cst, isl_dim_param, isl_dim_in, isl_dim_out,
+                isl_dim_div), "isl_basic_map_from_constraint_matrices");
+        }
+
+        isl_basic_set *get_basic_set(isl_space *space)
+        {
+          unsigned n_param = isl_space_dim(space, isl_dim_param);
+          unsigned n_set = isl_space_dim(space, isl_dim_set);
+          unsigned n_div = get_count();
+          unsigned n_eq = get_count();
+          unsigned n_ineq = get_count();
+          if (n_div > uint64_t(n_eq) + n_ineq)
+            fail("more divs than constraints");
+          unsigned n_col = 1 + n_param + n_set + n_div;
+
+          owned<isl_mat> eq(get_rows(n_eq, n_col));
+          owned<isl_mat> ineq(get_rows(n_ineq, n_col));
+          return check(isl_basic_set_from_constraint_matrices(
+                isl_space_copy(space), eq.release(), ineq.release(),
+                isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div),
+              "isl_basic_set_from_constraint_matrices");
+        }
+
+        // The result of combining the pieces [begin, end) with *combine*,
+        // balanced to avoid quadratic cost.
+        template <class T, class F>
+        static T *combine_balanced(std::vector<owned<T>> &pieces,
+            size_t begin, size_t end, F combine)
+        {
+          if (end - begin == 1)
+            return pieces[begin].release();
+          size_t mid = begin + (end - begin) / 2;
+          owned<T> left(combine_balanced(pieces, begin, mid, combine));
+          owned<T> right(combine_balanced(pieces, mid, end, combine));
+          return combine(left.release(), right.release());
+        }
+
+        isl_set *get_set(isl_space *space)
+        {
+          unsigned n = get_count();
+          if (n == 0)
+            return check(isl_set_empty(isl_space_copy(space)), "isl_set_empty");
+
+          std::vector<owned<isl_set>> pieces;
+          for (unsigned i = 0; i < n; ++i)
+            pieces.emplace_back(check(isl_set_from_basic_set(
+                    get_basic_set(space)), "isl_set_from_basic_set"));
+          return check(combine_balanced(pieces, 0, n, isl_set_union_disjoint),
+              "isl_set_union_disjoint");
+        }
+
+        isl_map *get_map(isl_space *space)
+        {
+          unsigned n = get_count();
+          if (n == 0)
+            return check(isl_map_empty(isl_space_copy(space)), "isl_map_empty");
+
+          std::vector<owned<isl_map>> pieces;
+          for (unsigned i = 0; i < n; ++i)
+            pieces.emplace_back(check(isl_map_from_basic_map(
+                    get_basic_map(space)), "isl_map_from_basic_map"));
+          return check(combine_balanced(pieces, 0, n, isl_map_union_disjoint),
+              "isl_map_union_disjoint");
+        }
+
+        // }}}
+
+        // {{{ expressions
+
+        // *domain* is a set space, *divs* are floor(expr) for the
+        // previously read divs.
+        isl_aff *get_expr(isl_space *domain,
+            std::vector<owned<isl_aff>> const &divs, size_t n_div)
+        {
+          owned<isl_aff> aff(check(isl_aff_zero_on_domain(
+                  isl_local_space_from_space(isl_space_copy(domain))),
+                "isl_aff_zero_on_domain"));
+
+          owned<isl_val> v(get_rational());
+          aff.reset(check(isl_aff_set_constant_val(aff.release(), v.release()),
+                "isl_aff_set_constant_val"));
+
+          const isl_dim_type types[] = {isl_dim_param, isl_dim_in};
+          for (isl_dim_type type: types)
+          {
+            unsigned n = isl_space_dim(domain,
+                type == isl_dim_in ? isl_dim_set : type);
+            for (unsigned i = 0; i < n; ++i)
+            {
+              v.reset(get_rational());
+              if (!isl_val_is_zero(v.get()))
+                aff.reset(check(isl_aff_set_coefficient_val(aff.release(),
+                        type, i, v.release()), "isl_aff_set_coefficient_val"));
+            }
+          }
+
+          for (size_t k = 0; k < n_div; ++k)
+          {
+            v.reset(get_rational());
+            if (!isl_val_is_zero(v.get()))
+              aff.reset(check(isl_aff_add(aff.release(),
+                      check(isl_aff_scale_val(isl_aff_copy(divs[k].get()),
+                          v.release()), "isl_aff_scale_val")),
+                    "isl_aff_add"));
+          }
+          return aff.release();
+        }
+
+        void get_divs(isl_space *domain, std::vector<owned<isl_aff>> &divs)
+        {
+          unsigned n_div = get_count();
+          for (unsigned k = 0; k < n_div; ++k)
+            divs.emplace_back(check(isl_aff_floor(get_expr(domain, divs, k)),
+                  "isl_aff_floor"));
+        }
+
+        isl_aff *get_aff(isl_space *domain)
+        {
+          std::vector<owned<isl_aff>> divs;
+          get_divs(domain, divs);
+          return get_expr(domain, divs, divs.size());
+        }
+
+        isl_qpolynomial *get_qpolynomial(isl_space *domain)
+        {
+          std::vector<owned<isl_aff>> divs;
+          get_divs(domain, divs);
+
+          std::vector<owned<isl_qpolynomial>> div_qps;
+          for (auto &div: divs)
+            div_qps.emplace_back(check(isl_qpolynomial_from_aff(
+                    isl_aff_copy(div.get())), "isl_qpolynomial_from_aff"));
+
+          owned<isl_qpolynomial> result(check(isl_qpolynomial_zero_on_domain(
+                  isl_space_copy(domain)), "isl_qpolynomial_zero_on_domain"));
+
+          unsigned n_param = isl_space_dim(domain, isl_dim_param);
+          unsigned n_set = isl_space_dim(domain, isl_dim_set);
+          // a coefficient of at least two bytes and one byte per exponent
+          unsigned n_term = get_count(2 + n_param + n_set + divs.size());
+          for (unsigned t = 0; t < n_term; ++t)
+          {
+            uint64_t degree = 0;
+            auto get_exp = [&]()
+            {
+              uint64_t exp = get_uint();
+              if (exp > max_term_degree - degree || exp > m_degree_budget)
+                fail("degree too large");
+              degree += exp;
+              m_degree_budget -= exp;
+              return (unsigned) exp;
+            };
+
+            owned<isl_qpolynomial> term(check(isl_qpolynomial_val_on_domain(
+                    isl_space_copy(domain), get_rational()),
+                  "isl_qpolynomial_val_on_domain"));
+
+            auto mul_pow = [&](isl_qpolynomial *factor, unsigned exp)
+            {
+              term.reset(check(isl_qpolynomial_mul(term.release(),
+                      check(isl_qpolynomial_pow(factor, exp),
+                        "isl_qpolynomial_pow")),
+                    "isl_qpolynomial_mul"));
+            };
+
+            const isl_dim_type types[] = {isl_dim_param, isl_dim_set};
+            const unsigned counts[] = {n_param, n_set};
+            for (int i_type = 0; i_type < 2; ++i_type)
+              for (unsigned i = 0; i < counts[i_type]; ++i)
+              {
+                unsigned exp = get_exp();
+                if (exp)
+                  mul_pow(check(isl_qpolynomial_var_on_domain(
+                          isl_space_copy(domain), types[i_type], i),
+                        "isl_qpolynomial_var_on_domain"), exp);
+              }
+            for (auto &div_qp: div_qps)
+            {
+              unsigned exp = get_exp();
+              if (exp)
+                mul_pow(isl_qpolynomial_copy(div_qp.get()), exp);
+            }
+
+            result.reset(check(isl_qpolynomial_add(
+                    result.release(), term.release()), "isl_qpolynomial_add"));
+          }
+          return result.release();
+        }
+
+        // }}}
+    };
+
+    // }}}
+
+    // {{{ encode
+
+    std::string header(object_kind kind)
+    {
+      std::string result(magic, 4);
+      result.push_back((char) format_version);
+      result.push_back((char) kind);
+      return result;
+    }
+
+    template <class T>
+    isl_stat collect(T *obj, void *user)
+    {
+      static_cast<std::vector<owned<T>> *>(user)->emplace_back(obj);
+      return isl_stat_ok;
+    }
+
+    // {{{ object spaces
+
+    // The space that is written before the body of each kind of object.
+
+    isl_space *object_space(isl_space *space)
+    { return isl_space_copy(space); }
+    isl_space *object_space(isl_basic_set *bset)
+    { return isl_basic_set_get_space(bset); }
+    isl_space *object_space(isl_basic_map *bmap)
+    { return isl_basic_map_get_space(bmap); }
+    isl_space *object_space(isl_set *set)
+    { return isl_set_get_space(set); }
+    isl_space *object_space(isl_map *map)
+    { return isl_map_get_space(map); }
+    isl_space *object_space(isl_union_set *uset)
+    { return isl_union_set_get_space(uset); }
+    isl_space *object_space(isl_union_map *umap)
+    { return isl_union_map_get_space(umap); }
+    isl_space *object_space(isl_aff *aff)
+    { return isl_aff_get_domain_space(aff); }
+    isl_space *object_space(isl_qpolynomial *qp)
+    { return isl_qpolynomial_get_domain_space(qp); }
+    isl_space *object_space(isl_pw_qpolynomial *pwqp)
+    { return isl_pw_qpolynomial_get_domain_space(pwqp); }
+    isl_space *object_space(isl_pw_aff *pwaff)
+    { return isl_pw_aff_get_domain_space(pwaff); }
+
+    // }}}
+
+    // {{{ object bodies
+
+    void put_body(writer &w, isl_space *space)
+    { }
+
+    void put_body(writer &w, isl_basic_set *bset)
+    {
+      w.put_basic(bset);
+    }
+
+    void put_body(writer &w, isl_basic_map *bmap)
+    {
+      w.put_basic(bmap);
+    }
+
+    void put_body(writer &w, isl_set *set)
+    {
+      w.put_set(set);
+    }
+
+    void put_body(writer &w, isl_map *map)
+    {
+      w.put_map(map);
+    }
+
+    void put_body(writer &w, isl_union_set *uset)
+    {
+      std::vector<owned<isl_set>> sets;
+      if (isl_union_set_foreach_set(uset, collect<isl_set>, &sets) < 0)
+        isl::handle_isl_error(isl_union_set_get_ctx(uset),
+            "isl_union_set_foreach_set");
+      w.put_uint(sets.size());
+      w.put_unordered(sets.size(), [&](writer &item_w, size_t i)
+          {
+            owned<isl_space> space(isl_set_get_space(sets[i].get()));
+            item_w.put_space(space.get());
+            item_w.put_set(sets[i].get());
+          });
+    }
+
+    void put_body(writer &w, isl_union_map *umap)
+    {
+      std::vector<owned<isl_map>> maps;
+      if (isl_union_map_foreach_map(umap, collect<isl_map>, &maps) < 0)
+        isl::handle_isl_error(isl_union_map_get_ctx(umap),
+            "isl_union_map_foreach_map");
+      w.put_uint(maps.size());
+      w.put_unordered(maps.size(), [&](writer &item_w, size_t i)
+          {
+            owned<isl_space> space(isl_map_get_space(maps[i].get()));
+            item_w.put_space(space.get());
+            item_w.put_map(maps[i].get());
+          });
+    }
+
+    void put_body(writer &w, isl_aff *aff)
+    {
+      w.put_aff(aff);
+    }
+
+    void put_body(writer &w, isl_qpolynomial *qp)
+    {
+      w.put_qpolynomial(qp);
+    }
+
+    isl_stat collect_qpolynomial_piece(isl_set *set, isl_qpolynomial *qp,
+        void *user)
+    {
+      auto pieces = static_cast<std::vector<
+        std::pair<owned<isl_set>, owned<isl_qpolynomial>>> *>(user);
+      pieces->emplace_back(owned<isl_set>(set), owned<isl_qpolynomial>(qp));
+      return isl_stat_ok;
+    }
+
+    void put_body(writer &w, isl_pw_qpolynomial *pwqp)
+    {
+      std::vector<std::pair<owned<isl_set>, owned<isl_qpolynomial>>> pieces;
+      if (isl_pw_qpolynomial_foreach_piece(pwqp,
+            collect_qpolynomial_piece, &pieces) < 0)
+        isl::handle_isl_error(isl_pw_qpolynomial_get_ctx(pwqp),
+            "isl_pw_qpolynomial_foreach_piece");
+      w.put_uint(pieces.size());
+      w.put_unordered(pieces.size(), [&](writer &item_w, size_t i)
+          {
+            item_w.put_set(pieces[i].first.get());
+            item_w.put_qpolynomial(pieces[i].second.get());
+          });
+    }
+
+    isl_stat collect_aff_piece(isl_set *set, isl_aff *aff, void *user)
+    {
+      auto pieces = static_cast<std::vector<
+        std::pair<owned<isl_set>, owned<isl_aff>>> *>(user);
+      pieces->emplace_back(owned<isl_set>(set), owned<isl_aff>(aff));
+      return isl_stat_ok;
+    }
+
+    // only used for canonical encodings, see object_kind
+    void put_body(writer &w, isl_pw_aff *pwaff)
+    {
+      std::vector<std::pair<owned<isl_set>, owned<isl_aff>>> pieces;
+      if (isl_pw_aff_foreach_piece(pwaff, collect_aff_piece, &pieces) < 0)
+        isl::handle_isl_error(isl_pw_aff_get_ctx(pwaff),
+            "isl_pw_aff_foreach_piece");
+      w.put_uint(pieces.size());
+      w.put_unordered(pieces.size(), [&](writer &item_w, size_t i)
+          {
+            item_w.put_set(pieces[i].first.get());
+            item_w.put_aff(pieces[i].second.get());
+          });
+    }
+
+    // }}}
+
+    py::bytes to_bytes(std::string const &header, writer const &w)
+    {
+      std::string result = header + w.data();
+      return py::bytes(result.data(), result.size());
+    }
+
+    // See writer::put_unordered for *canonical*.
+    template <class Wrapper>
+    py::object encode(Wrapper const &obj, object_kind kind,
+        bool canonical=false)
+    {
+      if (!obj.is_valid())
+        throw isl::error("passed invalid object to binary encoding");
+
+      isl::ctx_lock lock(obj.m_ctx_info);
+      writer w(obj.m_ctx_info->ctx, canonical);
+      try
+      {
+        py::gil_scoped_release release_gil;
+        owned<isl_space> space(object_space(obj.m_data));
+        if (!space)
+          isl::handle_isl_error(obj.m_ctx_info->ctx, "get_space");
+        w.put_space(space.get());
+        put_body(w, obj.m_data);
+        w.check_bounds();
+      }
+      catch (unsupported &)
+      {
+        return py::none();
+      }
+
+      return to_bytes(header(kind), w);
+    }
+
+    // Returns a tuple (space, encoded space, encoded body), where the
+    // body is encoded without its space, see decode below.
+    template <class Wrapper>
+    py::object encode_parts(Wrapper const &obj, object_kind kind)
+    {
+      if (!obj.is_valid())
+        throw isl::error("passed invalid object to binary encoding");
+
+      isl::ctx_lock lock(obj.m_ctx_info);
+      writer space_w(obj.m_ctx_info->ctx), body_w(obj.m_ctx_info->ctx);
+      owned<isl_space> space;
+      try
+      {
+        py::gil_scoped_release release_gil;
+        space.reset(object_space(obj.m_data));
+        if (!space)
+          isl::handle_isl_error(obj.m_ctx_info->ctx, "get_space");
+        space_w.put_space(space.get());
+        put_body(body_w, obj.m_data);
+        space_w.check_bounds();
+        body_w.check_bounds();
+      }
+      catch (unsupported &)
+      {
+        return py::none();
+      }
+
+      py::object py_space = handle_from_new_ptr(
+          new isl::space(space.release(), obj.m_ctx_info));
+      return py::make_tuple(
+          py_space,
+          to_bytes(header(kind_space), space_w),
+          to_bytes(header(object_kind(kind | kind_external_space)), body_w));
+    }
+
+    // }}}
+
+    // {{{ decode
+
+    template <class Wrapper, class T>
+    py::object wrap(T *result, isl::ctx_info *info)
+    {
+      return handle_from_new_ptr(new Wrapper(result, info));
+    }
+
+    // If *external_space* is given, *data* must have been encoded without
+    // its space (see encode_parts) and *external_space* is used instead.
+    py::object decode(isl::ctx_info *info, py::bytes data,
+        isl_space *external_space)
+    {
+      const char *buf = data.c_str();
+      size_t size = data.size();
+      if (size < 6 || memcmp(buf, magic, 4) != 0)
+        throw isl::error("invalid binary data: bad header");
+      if ((unsigned char) buf[4] != format_version)
+        throw isl::error("unsupported binary format version "
+            + std::to_string((unsigned char) buf[4]));
+      unsigned char kind_byte = buf[5];
+      if (bool(kind_byte & kind_external_space) != bool(external_space))
+        throw isl::error(external_space
+            ? "invalid binary data: space passed for data containing a space"
+            : "invalid binary data: space required");
+      object_kind kind = (object_kind) (kind_byte & ~kind_external_space);
+
+      isl::ctx_lock lock(info);
+      isl_ctx *ctx = info->ctx;
+      reader r(ctx, buf + 6, size - 6);
+
+      // The objects are only wrapped once the GIL is back.
+      owned<isl_space> space;
+      owned<isl_basic_set> bset;
+      owned<isl_set> set;
+      owned<isl_basic_map> bmap;
+      owned<isl_map> map;
+      owned<isl_union_set> uset;
+      owned<isl_union_map> umap;
+      owned<isl_aff> aff;
+      owned<isl_qpolynomial> qp;
+      owned<isl_pw_qpolynomial> pwqp;
+
+      {
+        py::gil_scoped_release release_gil;
+        space.reset(external_space
+            ? isl_space_copy(external_space) : r.get_space());
+        if (!space)
+          isl::handle_isl_error(ctx, "isl_space_copy");
+
+        switch (kind)
+        {
+          case kind_basic_set:
+            bset.reset(r.get_basic_set(space.get()));
+            break;
+          case kind_set:
+            set.reset(r.get_set(space.get()));
+            break;
+          case kind_basic_map:
+            bmap.reset(r.get_basic_map(space.get()));
+            break;
+          case kind_map:
+            map.reset(r.get_map(space.get()));
+            break;
+          case kind_union_set:
+          case kind_union_map:
+            {
+              unsigned n = r.get_count();
+              if (kind == kind_union_set)
+              {
+                uset.reset(isl_union_set_empty(isl_space_copy(space.get())));
+                for (unsigned i = 0; i < n && uset; ++i)
+                {
+                  owned<isl_space> set_space(r.get_space());
+                  uset.reset(isl_union_set_add_set(uset.release(),
+                        r.get_set(set_space.get())));
+                }
+                if (!uset)
+                  isl::handle_isl_error(ctx, "isl_union_set_add_set");
+              }
+              else
+              {
+                umap.reset(isl_union_map_empty(isl_space_copy(space.get())));
+                for (unsigned i = 0; i < n && umap; ++i)
+                {
+                  owned<isl_space> map_space(r.get_space());
+                  umap.reset(isl_union_map_add_map(umap.release(),
+                        r.get_map(map_space.get())));
+                }
+                if (!umap)
+                  isl::handle_isl_error(ctx, "isl_union_map_add_map");
+              }
+              break;
+            }
+          case kind_aff:
+            aff.reset(r.get_aff(space.get()));
+            break;
+          case kind_qpolynomial:
+            qp.reset(r.get_qpolynomial(space.get()));
+            break;
+          case kind_pw_qpolynomial:
+            {
+              unsigned n = r.get_count();
+              pwqp.reset(isl_pw_qpolynomial_zero(isl_space_add_dims(
+                      isl_space_from_domain(isl_space_copy(space.get())),
+                      isl_dim_out, 1)));
+              for (unsigned i = 0; i < n && pwqp; ++i)
+              {
+                isl_set *piece_set = r.get_set(space.get());
+                isl_qpolynomial *piece_qp;
+                try
+                {
+                  piece_qp = r.get_qpolynomial(space.get());
+                }
+                catch (...)
+                {
+                  isl_set_free(piece_set);
+                  throw;
+                }
+                pwqp.reset(isl_pw_qpolynomial_add_disjoint(pwqp.release(),
+                      isl_pw_qpolynomial_alloc(piece_set, piece_qp)));
+              }
+              if (!pwqp)
+                isl::handle_isl_error(ctx,
+                    "isl_pw_qpolynomial_add_disjoint");
+              break;
+            }
+          case kind_space:
+            break;
+          default:
+            throw isl::error("invalid binary data: unknown object kind");
+        }
+
+        if (!r.at_end())
+          throw isl::error("invalid binary data: trailing data");
+      }
+
+      if (bset) return wrap<isl::basic_set>(bset.release(), info);
+      if (set) return wrap<isl::set>(set.release(), info);
+      if (bmap) return wrap<isl::basic_map>(bmap.release(), info);
+      if (map) return wrap<isl::map>(map.release(), info);
+      if (uset) return wrap<isl::union_set>(uset.release(), info);
+      if (umap) return wrap<isl::union_map>(umap.release(), info);
+      if (aff) return wrap<isl::aff>(aff.release(), info);
+      if (qp) return wrap<isl::qpolynomial>(qp.release(), info);
+      if (pwqp) return wrap<isl::pw_qpolynomial>(pwqp.release(), info);
+      return wrap<isl::space>(space.release(), info);
+    }
+
+    // }}}
+  }
+}
+
+// }}}
+
+void islpy_expose_binary(py::module_ &m)
+{
+#define EXPOSE_ENCODE_CANONICAL(name, py_name) \
+  m.def("_encode_canonical", \
+      [](isl::name const &obj) \
+      { return islpy::encode(obj, islpy::kind_##name, true); }, \
+      py::arg("obj"), \
+      py::sig("def _encode_canonical(obj: " #py_name ") -> bytes | None"));
+
+#define EXPOSE_ENCODE(name, py_name) \
+  m.def("_encode_binary", \
+      [](isl::name const &obj) \
+      { return islpy::encode(obj, islpy::kind_##name); }, \
+      py::arg("obj"), \
+      py::sig("def _encode_binary(obj: " #py_name ") -> bytes | None")); \
+  m.def("_encode_binary_parts", \
+      [](isl::name const &obj) \
+      { return islpy::encode_parts(obj, islpy::kind_##name); }, \
+      py::arg("obj"), \
+      py::sig("def _encode_binary_parts(obj: " #py_name ") " \
+        "-> tuple[Space, bytes, bytes] | None")); \
+  EXPOSE_ENCODE_CANONICAL(name, py_name);
+
+  EXPOSE_ENCODE(basic_set, BasicSet);
+  EXPOSE_ENCODE(set, Set);
+  EXPOSE_ENCODE(basic_map, BasicMap);
+  EXPOSE_ENCODE(map, Map);
+  EXPOSE_ENCODE(union_set, UnionSet);
+  EXPOSE_ENCODE(union_map, UnionMap);
+  EXPOSE_ENCODE(aff, Aff);
+  EXPOSE_ENCODE(qpolynomial, QPolynomial);
+  EXPOSE_ENCODE(pw_qpolynomial, PwQPolynomial);
+
+#undef EXPOSE_ENCODE
+
+  m.def("_encode_binary",
+      [](isl::space const &obj)
+      { return islpy::encode(obj, islpy::kind_space); },
+      py::arg("obj"),
+      py::sig("def _encode_binary(obj: Space) -> bytes | None"));
+  EXPOSE_ENCODE_CANONICAL(space, Space);
+  EXPOSE_ENCODE_CANONICAL(pw_aff, PwAff);
+
+#undef EXPOSE_ENCODE_CANONICAL
+
+  m.def("_decode_binary",
+      [](isl::ctx const &ctx, py::bytes data)
+      { return islpy::decode(ctx.m_ctx_info, data, nullptr); },
+      py::arg("context"), py::arg("data"),
+      py::sig("def _decode_binary(context: Context, data: bytes) -> "
+        "BasicSet | Set | BasicMap | Map | UnionSet | UnionMap | Aff "
+        "| QPolynomial | PwQPolynomial | Space"));
+  m.def("_decode_binary_with_space",
+      [](isl::space const &space, py::bytes data)
+      {
+        if (!space.is_valid())
+          throw isl::error("passed invalid space to binary decoding");
+        return islpy::decode(space.m_ctx_info, data, space.m_data);
+      },
+      py::arg("space"), py::arg("data"),
+      py::sig("def _decode_binary_with_space(space: Space, data: bytes) -> "
+        "BasicSet | Set | BasicMap | Map | UnionSet | UnionMap | Aff "
+        "| QPolynomial | PwQPolynomial"));
+}
+
+// vim: foldmethod=marker
@@ -0,0 +1,1113 @@
+#include "wrap_isl.hpp"
+
+#include <nanobind/ndarray.h>
+#include <nanobind/stl/optional.h>
+#include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <limits>
+#include <optional>
+
+// {{{ NumPy interoperability
+//
+// Backs the NumPy-based methods added in islpy/_monkeypatch.py (see
+// "NumPy Interoperability" in the documentation). Integers are exchanged
+// as int64 arrays. Values that do not fit are returned separately (see
+// int64_matrix) and turned into Python ints, for arrays of object dtype.
+// NumPy is only imported once an array is created.
+
+namespace islpy
+{
+  // {{{ conversions
+
+  // A NumPy array of shape *shape* that takes over *data*.
+  template <class T>
+  py::object numpy_array(std::vector<T> &&data,
+      std::initializer_list<size_t> shape,
+      py::dlpack::dtype dtype = py::dtype<T>())
+  {
+    auto *owned_data = new std::vector<T>(std::move(data));
+    py::capsule owner(owned_data, [](void *p) noexcept
+        {
+          delete static_cast<std::vector<T> *>(p);
+        });
+    // NumPy would not accept a null pointer, even for an empty array
+    owned_data->reserve(1);
+    return py::ndarray<py::numpy>(
+        owned_data->data(), shape, owner, {}, dtype).cast();
+  }
+
+  isl_val *val_from_int64(isl_ctx *ctx, int64_t value)
+  {
+    if (value >= std::numeric_limits<long>::min()
+        && value <= std::numeric_limits<long>::max())
+      return isl_val_int_from_si(ctx, long(value));
+
+    uint64_t abs = value < 0 ? 0 - uint64_t(value) : uint64_t(value);
+    isl_val *result = isl_val_int_from_chunks(ctx, 1, sizeof(abs), &abs);
+    return value < 0 ? isl_val_neg(result) : result;
+  }
+
+  // Stores the integer *v* in *result* if it fits.
+  bool int64_from_val(isl_val *v, int64_t &result)
+  {
+    isl_size n_chunks = isl_val_n_abs_num_chunks(v, sizeof(uint64_t));
+    if (n_chunks < 0 || n_chunks > 1)
+      return false;
+
+    uint64_t abs = 0;
+    if (n_chunks && isl_val_get_abs_num_chunks(v, sizeof(uint64_t), &abs) < 0)
+      return false;
+
+    const uint64_t max = std::numeric_limits<int64_t>::max();
+    if (isl_val_is_neg(v))
+    {
+      if (abs > max + 1)
+        return false;
+      // avoids overflowing for the smallest value
+      result = -int64_t(abs - 1) - 1;
+    }
+    else
+    {
+      if (abs > max)
+        return false;
+      result = int64_t(abs);
+    }
+    return true;
+  }
+
+  // A matrix of integers under construction, in row-major order. Entries
+  // that do not fit into int64 are stored as strings.
+  struct int64_matrix
+  {
+    size_t n_rows;
+    size_t n_cols;
+    std::vector<int64_t> entries;
+    std::vector<std::pair<size_t, std::string>> overflow;
+
+    int64_matrix(size_t cols)
+    : n_rows(0), n_cols(cols)
+    { }
+
+    // Appends the integer *v* to the current row, see end_row.
+    void append(isl_val *v)
+    {
+      int64_t value;
+      if (int64_from_val(v, value))
+      {
+        entries.push_back(value);
+        return;
+      }
+
+      char *str = isl_val_to_str(v);
+      if (!str)
+        throw isl::error("isl_val_to_str failed");
+      std::string s(str);
+      free(str);
+      overflow.emplace_back(entries.size(), std::move(s));
+      entries.push_back(0);
+    }
+
+    void end_row()
+    {
+      ++n_rows;
+    }
+
+    // Returns (array, overflow), where *overflow* is a list of tuples of
+    // the flat index of each entry that does not fit into *array* (which
+    // has 0 there) and its value as a Python int. Must be called while
+    // holding the GIL.
+    py::tuple to_python()
+    {
+      py::object array = numpy_array(std::move(entries), {n_rows, n_cols});
+
+      py::list py_overflow;
+      for (auto const &[index, value] : overflow)
+      {
+        py::object py_value = py::steal(
+            PyLong_FromString(value.c_str(), nullptr, 10));
+        if (!py_value.is_valid())
+          throw py::python_error();
+        py_overflow.append(py::make_tuple(index, py_value));
+      }
+
+      return py::make_tuple(array, py_overflow);
+    }
+  };
+
+  typedef py::ndarray<py::device::cpu, py::ro> any_array;
+
+  // Reads the entries of a one- or two-dimensional array of any integer
+  // dtype, so that NumPy arrays need not be converted to int64 first.
+  class int_array_reader
+  {
+    private:
+      const char *m_data;
+      py::dlpack::dtype m_dtype;
+      size_t m_shape[2];
+      int64_t m_strides[2];
+
+      // Stores the entry at (i, j) in *result* if it fits into int64, or
+      // else in *big* (only for uint64).
+      bool read(size_t i, size_t j, int64_t &result, uint64_t &big) const
+      {
+        const char *p = m_data + i*m_strides[0] + j*m_strides[1];
+        if (m_dtype.code == (uint8_t) py::dlpack::dtype_code::Int)
+        {
+          switch (m_dtype.bits)
+          {
+            case 8: result = *(const int8_t *) p; break;
+            case 16: result = *(const int16_t *) p; break;
+            case 32: result = *(const int32_t *) p; break;
+            default: result = *(const int64_t *) p; break;
+          }
+          return true;
+        }
+
+        switch (m_dtype.bits)
+        {
+          case 8: big = *(const uint8_t *) p; break;
+          case 16: big = *(const uint16_t *) p; break;
+          case 32: big = *(const uint32_t *) p; break;
+          default: big = *(const uint64_t *) p; break;
+        }
+        if (big > uint64_t(std::numeric_limits<int64_t>::max()))
+          return false;
+        result = int64_t(big);
+        return true;
+      }
+
+    public:
+      int_array_reader(any_array const &array, size_t ndim, const char *what)
+      : m_data(static_cast<const char *>(array.data())),
+      m_dtype(array.dtype())
+      {
+        bool is_int = m_dtype.lanes == 1
+          && (m_dtype.code == (uint8_t) py::dlpack::dtype_code::Int
+              || m_dtype.code == (uint8_t) py::dlpack::dtype_code::UInt)
+          && (m_dtype.bits == 8 || m_dtype.bits == 16
+              || m_dtype.bits == 32 || m_dtype.bits == 64);
+        if (!is_int)
+          throw py::type_error(
+              (std::string(what) + ": expected an array of integers").c_str());
+        if (array.ndim() != ndim)
+          throw py::value_error((std::string(what) + ": expected an array "
+                "with " + std::to_string(ndim) + " dimension(s)").c_str());
+
+        for (size_t i = 0; i < 2; ++i)
+        {
+          m_shape[i] = i < ndim ? array.shape(i) : 1;
+          m_strides[i] = i < ndim ? array.stride(i) * (m_dtype.bits / 8) : 0;
+        }
+      }
+
+      size_t shape(size_t i) const
+      {
+        return m_shape[i];
+      }
+
+      // Stores the entry at (i, j) in *result* if it fits into int64.
+      bool get(size_t i, size_t j, int64_t &result) const
+      {
+        uint64_t big;
+        return read(i, j, result, big);
+      }
+
+      // The entry at (i, j) as a value of *ctx*.
+      isl_val *get_val(isl_ctx *ctx, size_t i, size_t j) const
+      {
+        int64_t value;
+        uint64_t big;
+        if (read(i, j, value, big))
+          return val_from_int64(ctx, value);
+        return isl_val_int_from_chunks(ctx, 1, sizeof(big), &big);
+      }
+  };
+
+  // }}}
+
+  // {{{ vec, mat and multi_val
+
+  // Whether *value* can be passed to isl_*_set_element_si.
+  inline bool fits_int(int64_t value)
+  {
+    return value >= std::numeric_limits<int>::min()
+      && value <= std::numeric_limits<int>::max();
+  }
+
+  isl_vec *vec_from_array(isl_ctx *ctx, int_array_reader const &array)
+  {
+    isl_vec *vec = isl_vec_alloc(ctx, array.shape(0));
+    for (size_t i = 0; vec && i < array.shape(0); ++i)
+    {
+      int64_t value;
+      if (array.get(i, 0, value) && fits_int(value))
+        vec = isl_vec_set_element_si(vec, i, int(value));
+      else
+        vec = isl_vec_set_element_val(vec, i, array.get_val(ctx, i, 0));
+    }
+    return vec;
+  }
+
+  isl_mat *mat_from_array(isl_ctx *ctx, int_array_reader const &array)
+  {
+    isl_mat *mat = isl_mat_alloc(ctx, array.shape(0), array.shape(1));
+    for (size_t i = 0; mat && i < array.shape(0); ++i)
+      for (size_t j = 0; mat && j < array.shape(1); ++j)
+      {
+        int64_t value;
+        if (array.get(i, j, value) && fits_int(value))
+          mat = isl_mat_set_element_si(mat, i, j, int(value));
+        else
+          mat = isl_mat_set_element_val(mat, i, j, array.get_val(ctx, i, j));
+      }
+    return mat;
+  }
+
+  isl_multi_val *multi_val_from_array(isl_space *space,
+      int_array_reader const &array)
+  {
+    isl_ctx *ctx = isl_space_get_ctx(space);
+    isl_multi_val *mv = isl_multi_val_zero(space);
+    for (size_t i = 0; mv && i < array.shape(0); ++i)
+      mv = isl_multi_val_set_at(mv, i, array.get_val(ctx, i, 0));
+    return mv;
+  }
+
+  // The array in *values*, which must have *ndim* dimensions.
+  any_array array_from(py::handle values, size_t ndim, const char *what)
+  {
+    any_array array;
+    if (!py::try_cast(values, array))
+      throw py::type_error(
+          (std::string(what) + ": expected an array of integers").c_str());
+    if (array.ndim() != ndim)
+      throw py::value_error((std::string(what) + ": expected an array "
+            "with " + std::to_string(ndim) + " dimension(s)").c_str());
+    return array;
+  }
+
+  void init_vec_from_array(isl::vec *t, py::handle values,
+      isl::ctx *ctx_wrapper)
+  {
+    any_array array = array_from(values, 1, "Vec");
+    int_array_reader reader(array, 1, "Vec");
+    isl::ctx_info *info = isl::ctx_info_or_default(ctx_wrapper,
+        "Vec constructor");
+    isl::ctx_lock lock(info);
+    isl_vec *result = vec_from_array(info->ctx, reader);
+    if (!result)
+      isl::handle_isl_error(info->ctx, "isl_vec_alloc");
+    new (t) isl::vec(result, info);
+  }
+
+  void init_mat_from_array(isl::mat *t, py::handle values,
+      isl::ctx *ctx_wrapper)
+  {
+    any_array array = array_from(values, 2, "Mat");
+    int_array_reader reader(array, 2, "Mat");
+    isl::ctx_info *info = isl::ctx_info_or_default(ctx_wrapper,
+        "Mat constructor");
+    isl::ctx_lock lock(info);
+    isl_mat *result = mat_from_array(info->ctx, reader);
+    if (!result)
+      isl::handle_isl_error(info->ctx, "isl_mat_alloc");
+    new (t) isl::mat(result, info);
+  }
+
+  void init_multi_val_from_array(isl::multi_val *t, isl::space const &space,
+      py::handle values)
+  {
+    if (!space.is_valid())
+      throw isl::error("passed invalid arg to MultiVal for space");
+    any_array array = array_from(values, 1, "MultiVal");
+    int_array_reader reader(array, 1, "MultiVal");
+
+    isl::ctx_info *info = space.m_ctx_info;
+    isl::ctx_lock lock(info);
+    isl_ctx_reset_error(info->ctx);
+    isl_size n = isl_space_dim(space.m_data, isl_dim_out);
+    if (n < 0)
+      isl::handle_isl_error(info->ctx, "isl_space_dim");
+    if (reader.shape(0) != size_t(n))
+      throw py::value_error(("MultiVal: expected " + std::to_string(n)
+            + " values").c_str());
+
+    isl_multi_val *result = multi_val_from_array(
+        isl_space_copy(space.m_data), reader);
+    if (!result)
+      isl::handle_isl_error(info->ctx, "isl_multi_val_set_at");
+    new (t) isl::multi_val(result, info);
+  }
+
+  bool append_entries(isl_vec *vec, int64_matrix &entries)
+  {
+    isl_size size = isl_vec_size(vec);
+    if (size < 0)
+      return false;
+    entries.n_cols = size;
+    for (isl_size i = 0; i < size; ++i)
+    {
+      owned<isl_val> v(isl_vec_get_element_val(vec, i));
+      if (!v)
+        return false;
+      entries.append(v.get());
+    }
+    entries.end_row();
+    return true;
+  }
+
+  bool append_entries(isl_mat *mat, int64_matrix &entries)
+  {
+    isl_size n_rows = isl_mat_rows(mat);
+    isl_size n_cols = isl_mat_cols(mat);
+    if (n_rows < 0 || n_cols < 0)
+      return false;
+    entries.n_cols = n_cols;
+    for (isl_size i = 0; i < n_rows; ++i)
+    {
+      for (isl_size j = 0; j < n_cols; ++j)
+      {
+        owned<isl_val> v(isl_mat_get_element_val(mat, i, j));
+        if (!v)
+          return false;
+        entries.append(v.get());
+      }
+      entries.end_row();
+    }
+    return true;
+  }
+
+  bool append_entries(isl_multi_val *mv, int64_matrix &entries)
+  {
+    isl_size size = isl_multi_val_size(mv);
+    if (size < 0)
+      return false;
+    entries.n_cols = size;
+    for (isl_size i = 0; i < size; ++i)
+    {
+      owned<isl_val> v(isl_multi_val_get_at(mv, i));
+      if (!v)
+        return false;
+      if (!isl_val_is_int(v.get()))
+        throw py::value_error("to_numpy: values must be integers");
+      entries.append(v.get());
+    }
+    entries.end_row();
+    return true;
+  }
+
+  // Returns (array, overflow) with a row of the entries of *self* (or a row
+  // for each row of a Mat), see int64_matrix::to_python.
+  template <class Wrapper>
+  py::tuple to_array(Wrapper const &self)
+  {
+    if (!self.is_valid())
+      throw isl::error("passed invalid arg to to_numpy for self");
+
+    int64_matrix entries(0);
+    {
+      isl::ctx_info *info = self.m_ctx_info;
+      isl::ctx_lock lock(info);
+      isl_ctx_reset_error(info->ctx);
+      if (!append_entries(self.m_data, entries))
+        isl::handle_isl_error(info->ctx, "to_numpy");
+    }
+    return entries.to_python();
+  }
+
+  // }}}
+
+  // {{{ points_array
+
+  struct point_collector
+  {
+    int64_matrix coords;
+    isl_size n_dims;
+    size_t max_points;
+    size_t n_points;
+    bool too_many_points;
+
+    point_collector(isl_size dims, size_t max)
+    : coords(dims), n_dims(dims), max_points(max), n_points(0),
+    too_many_points(false)
+    { }
+  };
+
+  isl_stat collect_point(isl_point *pnt, void *user)
+  {
+    auto *collector = static_cast<point_collector *>(user);
+
+    // called from isl, must not throw
+    isl_stat status = isl_stat_ok;
+    try
+    {
+      if (++collector->n_points > collector->max_points)
+      {
+        collector->too_many_points = true;
+        status = isl_stat_error;
+      }
+
+      for (isl_size i = 0; status == isl_stat_ok && i < collector->n_dims; ++i)
+      {
+        isl_val *v = isl_point_get_coordinate_val(pnt, isl_dim_set, i);
+        if (!v)
+        {
+          status = isl_stat_error;
+          break;
+        }
+        try
+        {
+          collector->coords.append(v);
+        }
+        catch (...)
+        {
+          isl_val_free(v);
+          throw;
+        }
+        isl_val_free(v);
+      }
+      if (status == isl_stat_ok)
+        collector->coords.end_row();
+    }
+    catch (...)
+    {
+      status = isl_stat_error;
+    }
+
+    isl_point_free(pnt);
+    return status;
+  }
+
+  py::tuple points_array(isl::set const &self, py::object max_points)
+  {
+    if (!self.is_valid())
+      throw isl::error("passed invalid arg to points_array for self");
+
+    size_t max = max_points.is_none()
+      ? std::numeric_limits<size_t>::max()
+      : py::cast<size_t>(max_points);
+
+    point_collector collector(0, max);
+    {
+      isl::ctx_info *info = self.m_ctx_info;
+      isl::ctx_lock lock(info);
+      isl_ctx_reset_error(info->ctx);
+
+      isl_size n_dims = isl_set_dim(self.m_data, isl_dim_set);
+      isl_size n_params = isl_set_dim(self.m_data, isl_dim_param);
+      if (n_dims < 0 || n_params < 0)
+        isl::handle_isl_error(info->ctx, "isl_set_dim");
+
+      isl_bool bounded = isl_set_is_bounded(self.m_data);
+      if (bounded < 0)
+        isl::handle_isl_error(info->ctx, "isl_set_is_bounded");
+      if (!bounded)
+        throw py::value_error("points_array: set is not bounded");
+
+      if (n_params)
+      {
+        // is_singleton only looks at the set dimensions
+        isl_set *params = isl_set_move_dims(
+            isl_set_params(isl_set_copy(self.m_data)),
+            isl_dim_set, 0, isl_dim_param, 0, n_params);
+        isl_bool fixed = isl_set_is_singleton(params);
+        if (fixed == isl_bool_false)
+          fixed = isl_set_is_empty(params);
+        isl_set_free(params);
+        if (fixed < 0)
+          isl::handle_isl_error(info->ctx, "isl_set_is_singleton");
+        if (!fixed)
+          throw py::value_error("points_array: the values of the parameters "
+              "must be fixed");
+      }
+
+      collector.n_dims = n_dims;
+      collector.coords.n_cols = n_dims;
+      isl_stat status;
+      {
+        py::gil_scoped_release release_gil;
+        status = isl_set_foreach_point(self.m_data, collect_point, &collector);
+      }
+
+      if (collector.too_many_points)
+        throw py::value_error(("points_array: set has more than "
+              + std::to_string(max) + " points").c_str());
+      if (status == isl_stat_error)
+        isl::handle_isl_error(info->ctx, "isl_set_foreach_point");
+    }
+
+    return collector.coords.to_python();
+  }
+
+  // }}}
+
+  // {{{ constraint matrices
+
+  // The number of columns of the constraint matrices of *bset*: the
+  // constant, each parameter, set dimension and div.
+  isl_size constraint_columns(isl_basic_set *bset)
+  {
+    isl_size n_param = isl_basic_set_dim(bset, isl_dim_param);
+    isl_size n_dim = isl_basic_set_dim(bset, isl_dim_set);
+    isl_size n_div = isl_basic_set_dim(bset, isl_dim_div);
+    if (n_param < 0 || n_dim < 0 || n_div < 0)
+      return isl_size_error;
+    return 1 + n_param + n_dim + n_div;
+  }
+
+  // Appends the equalities (or inequalities) of *bset* to *rows*, which is an
+  // int64_matrix or a class with the same append and end_row methods.
+  template <class Rows>
+  bool append_constraint_rows(isl_basic_set *bset, bool equalities,
+      Rows &rows)
+  {
+    owned<isl_mat> mat(equalities
+        ? isl_basic_set_equalities_matrix(bset,
+          isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div)
+        : isl_basic_set_inequalities_matrix(bset,
+          isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div));
+    isl_size n_rows = isl_mat_rows(mat.get());
+    isl_size n_cols = isl_mat_cols(mat.get());
+    if (n_rows < 0 || n_cols < 0)
+      return false;
+
+    for (isl_size i = 0; i < n_rows; ++i)
+    {
+      for (isl_size j = 0; j < n_cols; ++j)
+      {
+        owned<isl_val> v(isl_mat_get_element_val(mat.get(), i, j));
+        if (!v)
+          return false;
+        rows.append(v.get());
+      }
+      rows.end_row();
+    }
+    return true;
+  }
+
+  // Appends a row for each div of *bset* to *rows* (see
+  // append_constraint_rows): its denominator, followed by the coefficients
+  // of its numerator for each column of the constraint matrices. The rows
+  // of divs that are not known are zero.
+  template <class Rows>
+  bool append_div_rows(isl_basic_set *bset, Rows &rows)
+  {
+    isl_size n_param = isl_basic_set_dim(bset, isl_dim_param);
+    isl_size n_dim = isl_basic_set_dim(bset, isl_dim_set);
+    isl_size n_div = isl_basic_set_dim(bset, isl_dim_div);
+    owned<isl_local_space> ls(isl_basic_set_get_local_space(bset));
+    if (n_param < 0 || n_dim < 0 || n_div < 0 || !ls)
+      return false;
+
+    isl_ctx *ctx = isl_basic_set_get_ctx(bset);
+    owned<isl_val> zero(isl_val_zero(ctx));
+    if (!zero)
+      return false;
+
+    // Only fails for divs that are not known. The arguments of the known
+    // divs only refer to known divs, numbered among themselves.
+    std::vector<owned<isl_aff>> args;
+    std::vector<isl_size> known;
+    for (isl_size k = 0; k < n_div; ++k)
+    {
+      args.emplace_back(isl_local_space_get_div(ls.get(), k));
+      if (args.back())
+        known.push_back(k);
+    }
+    isl_ctx_reset_error(ctx);
+
+    for (isl_size k = 0; k < n_div; ++k)
+    {
+      if (!args[k])
+      {
+        for (isl_size j = 0; j < 2 + n_param + n_dim + n_div; ++j)
+          rows.append(zero.get());
+        rows.end_row();
+        continue;
+      }
+
+      if (isl_aff_dim(args[k].get(), isl_dim_div) != isl_size(known.size()))
+        return false;
+      owned<isl_val> den(isl_aff_get_denominator_val(args[k].get()));
+      if (!den)
+        return false;
+      rows.append(den.get());
+
+      // with integer coefficients
+      owned<isl_aff> arg(isl_aff_scale_val(args[k].release(), den.release()));
+      if (!arg)
+        return false;
+
+      std::vector<owned<isl_val>> row;
+      row.emplace_back(isl_aff_get_constant_val(arg.get()));
+      for (isl_size i = 0; i < n_param; ++i)
+        row.emplace_back(isl_aff_get_coefficient_val(
+              arg.get(), isl_dim_param, i));
+      for (isl_size i = 0; i < n_dim; ++i)
+        row.emplace_back(isl_aff_get_coefficient_val(
+              arg.get(), isl_dim_in, i));
+      size_t first_div = row.size();
+      for (isl_size j = 0; j < n_div; ++j)
+        row.emplace_back(isl_val_copy(zero.get()));
+      for (size_t j = 0; j < known.size(); ++j)
+        row[first_div + known[j]].reset(isl_aff_get_coefficient_val(
+              arg.get(), isl_dim_div, j));
+
+      for (owned<isl_val> const &v : row)
+      {
+        if (!v)
+          return false;
+        rows.append(v.get());
+      }
+      rows.end_row();
+    }
+    return true;
+  }
+
+  isl_basic_set *copy_as_basic_set(isl_basic_set *bset)
+  {
+    return isl_basic_set_copy(bset);
+  }
+
+  isl_basic_set *copy_as_basic_set(isl_basic_map *bmap)
+  {
+    // with the same columns, the input followed by the output dimensions
+    return isl_basic_map_wrap(isl_basic_map_copy(bmap));
+  }
+
+  // Returns the equalities, inequalities and divs of *self*, each as a
+  // tuple (array, overflow), see int64_matrix::to_python.
+  template <class Wrapper>
+  py::tuple constraint_arrays(Wrapper const &self)
+  {
+    if (!self.is_valid())
+      throw isl::error("passed invalid arg to constraint_arrays for self");
+
+    int64_matrix eq(0), ineq(0), divs(0);
+    {
+      isl::ctx_info *info = self.m_ctx_info;
+      isl::ctx_lock lock(info);
+      isl_ctx_reset_error(info->ctx);
+
+      owned<isl_basic_set> bset(copy_as_basic_set(self.m_data));
+      isl_size n_cols = bset ? constraint_columns(bset.get()) : isl_size_error;
+      if (n_cols < 0)
+        isl::handle_isl_error(info->ctx, "constraint_arrays");
+      eq.n_cols = ineq.n_cols = n_cols;
+      divs.n_cols = 1 + n_cols;
+
+      bool ok;
+      {
+        py::gil_scoped_release release_gil;
+        ok = append_constraint_rows(bset.get(), true, eq)
+          && append_constraint_rows(bset.get(), false, ineq)
+          && append_div_rows(bset.get(), divs);
+      }
+      if (!ok)
+        isl::handle_isl_error(info->ctx, "constraint_arrays");
+    }
+
+    return py::make_tuple(eq.to_python(), ineq.to_python(), divs.to_python());
+  }
+
+  // }}}
+
+  // {{{ from_constraint_arrays
+
+  // Returns a *Wrapper* of *from_matrices(space, eq, ineq)*, where *space*
+  // must satisfy *is_kind*.
+  template <class Wrapper, class FromMatrices>
+  py::object from_constraint_arrays(isl::space const &space,
+      any_array const &py_eq, any_array const &py_ineq,
+      isl_bool (*is_kind)(isl_space *), const char *kind,
+      FromMatrices from_matrices)
+  {
+    if (!space.is_valid())
+      throw isl::error(
+          "passed invalid arg to from_constraint_arrays for space");
+
+    int_array_reader eq(py_eq, 2, "from_constraint_arrays");
+    int_array_reader ineq(py_ineq, 2, "from_constraint_arrays");
+
+    isl::ctx_info *info = space.m_ctx_info;
+    decltype(Wrapper::m_data) result;
+    {
+      isl::ctx_lock lock(info);
+      isl_ctx_reset_error(info->ctx);
+
+      isl_bool is_right_kind = is_kind(space.m_data);
+      if (is_right_kind < 0)
+        isl::handle_isl_error(info->ctx, "from_constraint_arrays");
+      if (!is_right_kind)
+        throw py::value_error(("from_constraint_arrays: expected a "
+              + std::string(kind) + " space").c_str());
+
+      {
+        py::gil_scoped_release release_gil;
+        isl_mat *eq_mat = mat_from_array(info->ctx, eq);
+        isl_mat *ineq_mat = mat_from_array(info->ctx, ineq);
+        // Any additional columns become existentially quantified variables.
+        result = from_matrices(isl_space_copy(space.m_data),
+            eq_mat, ineq_mat);
+      }
+      if (!result)
+        isl::handle_isl_error(info->ctx, "from_constraint_arrays");
+    }
+
+    return handle_from_new_ptr(new Wrapper(result, info));
+  }
+
+  py::object basic_set_from_constraint_arrays(isl::space const &space,
+      any_array const &eq, any_array const &ineq)
+  {
+    return from_constraint_arrays<isl::basic_set>(space, eq, ineq,
+        isl_space_is_set, "set",
+        [](isl_space *space, isl_mat *eq, isl_mat *ineq)
+        {
+          return isl_basic_set_from_constraint_matrices(space, eq, ineq,
+              isl_dim_cst, isl_dim_param, isl_dim_set, isl_dim_div);
+        });
+  }
+
+  py::object basic_map_from_constraint_arrays(isl::space const &space,
+      any_array const &eq, any_array const &ineq)
+  {
+    return from_constraint_arrays<isl::basic_map>(space, eq, ineq,
+        isl_space_is_map, "map",
+        [](isl_space *space, isl_mat *eq, isl_mat *ineq)
+        {
+          return isl_basic_map_from_constraint_matrices(space, eq, ineq,
+              isl_dim_cst, isl_dim_param, isl_dim_in, isl_dim_out,
+              isl_dim_div);
+        });
+  }
+
+  // }}}
+
+  // {{{ contains_points
+
+  // acc += a*b, returns false on overflow
+  inline bool add_product(int64_t &acc, int64_t a, int64_t b)
+  {
+    const int64_t max = std::numeric_limits<int64_t>::max();
+    const int64_t min = std::numeric_limits<int64_t>::min();
+    if (a && b && (a > 0
+          ? (b > 0 ? a > max / b : b < min / a)
+          : (b > 0 ? a < min / b : b < max / a)))
+      return false;
+
+    int64_t product = a * b;
+    if (product > 0 ? acc > max - product : acc < min - product)
+      return false;
+    acc += product;
+    return true;
+  }
+
+  // floor(num / den) for den > 0
+  inline int64_t floor_div(int64_t num, int64_t den)
+  {
+    int64_t result = num / den;
+    if (num % den < 0)
+      --result;
+    return result;
+  }
+
+  // The constraints of a basic set with known divs, for evaluating them at
+  // many points. Each row has a column for the constant, each parameter,
+  // set dimension and div.
+  struct int64_basic_set
+  {
+    size_t n_cols;
+    size_t n_div;
+    std::vector<int64_t> eq;
+    std::vector<int64_t> ineq;
+    // the numerator of the argument of each div and its denominator, div k
+    // only depends on the divs before it
+    std::vector<int64_t> div_num;
+    std::vector<int64_t> div_den;
+
+    // Returns 1 if the point whose coordinates are in the leading
+    // n_cols - n_div entries of *x* (after a leading 1) satisfies the
+    // constraints, 0 if it does not, -1 if that cannot be decided in int64.
+    // Computes the divs into the remaining entries of *x*.
+    int contains(int64_t *x) const
+    {
+      size_t n_known = n_cols - n_div;
+      for (size_t k = 0; k < n_div; ++k)
+      {
+        const int64_t *row = &div_num[k * n_cols];
+        int64_t sum = 0;
+        for (size_t c = 0; c < n_known + k; ++c)
+          if (!add_product(sum, row[c], x[c]))
+            return -1;
+        x[n_known + k] = floor_div(sum, div_den[k]);
+      }
+
+      bool decided = true;
+      for (int is_eq = 1; is_eq >= 0; --is_eq)
+      {
+        std::vector<int64_t> const &rows = is_eq ? eq : ineq;
+        for (size_t r = 0; r < rows.size(); r += n_cols)
+        {
+          int64_t sum = 0;
+          bool fits = true;
+          for (size_t c = 0; fits && c < n_cols; ++c)
+            fits = add_product(sum, rows[r + c], x[c]);
+
+          if (!fits)
+            decided = false;
+          else if (is_eq ? sum != 0 : sum < 0)
+            return 0;
+        }
+      }
+      return decided ? 1 : -1;
+    }
+  };
+
+  // Collects the rows of int64_basic_set, see append_rows.
+  struct int64_rows
+  {
+    std::vector<int64_t> entries;
+    bool fits = true;
+
+    void append(isl_val *v)
+    {
+      int64_t value = 0;
+      fits = fits && int64_from_val(v, value);
+      entries.push_back(value);
+    }
+
+    void end_row()
+    { }
+  };
+
+  // Returns false if the constraints of *bset* do not fit into int64, or if
+  // its divs are not known (see isl_set_compute_divs) or not ordered.
+  bool int64_basic_set_from(isl_basic_set *bset, int64_basic_set &result)
+  {
+    isl_size n_div = isl_basic_set_dim(bset, isl_dim_div);
+    isl_size n_cols = constraint_columns(bset);
+    if (n_div < 0 || n_cols < 0)
+      return false;
+    result.n_cols = n_cols;
+    result.n_div = n_div;
+
+    int64_rows eq, ineq, divs;
+    if (!append_constraint_rows(bset, 1, eq)
+        || !append_constraint_rows(bset, 0, ineq)
+        || !append_div_rows(bset, divs)
+        || !eq.fits || !ineq.fits || !divs.fits)
+      return false;
+    result.eq = std::move(eq.entries);
+    result.ineq = std::move(ineq.entries);
+
+    size_t n_known = n_cols - n_div;
+    for (isl_size k = 0; k < n_div; ++k)
+    {
+      const int64_t *row = &divs.entries[k * (1 + n_cols)];
+      if (!row[0])
+        return false;
+      for (isl_size j = k; j < n_div; ++j)
+        if (row[1 + n_known + j])
+          return false;
+      result.div_den.push_back(row[0]);
+      result.div_num.insert(result.div_num.end(), row + 1, row + 1 + n_cols);
+    }
+    return true;
+  }
+
+  isl_stat collect_basic_set(isl_basic_set *bset, void *user)
+  {
+    // called from isl, must not throw
+    try
+    {
+      static_cast<std::vector<owned<isl_basic_set>> *>(user)
+        ->emplace_back(bset);
+      return isl_stat_ok;
+    }
+    catch (...)
+    {
+      isl_basic_set_free(bset);
+      return isl_stat_error;
+    }
+  }
+
+  // Decides whether the point in row *i* of *points* (with parameter values
+  // *params*) lies in *set* using isl, where that does not fit into int64.
+  isl_bool set_contains_point(isl_set *set,
+      int_array_reader const &points, int_array_reader const *params,
+      size_t i)
+  {
+    isl_ctx *ctx = isl_set_get_ctx(set);
+    isl_point *pnt = isl_point_zero(isl_set_get_space(set));
+    size_t n_param = params ? params->shape(0) : 0;
+    for (size_t j = 0; j < n_param; ++j)
+      pnt = isl_point_set_coordinate_val(pnt, isl_dim_param, j,
+          params->get_val(ctx, j, 0));
+    for (size_t j = 0; j < points.shape(1); ++j)
+      pnt = isl_point_set_coordinate_val(pnt, isl_dim_set, j,
+          points.get_val(ctx, i, j));
+
+    owned<isl_set> pnt_set(isl_set_from_point(pnt));
+    return isl_set_is_subset(pnt_set.get(), set);
+  }
+
+  // Returns false (in *contained*) for points that are not in *set*, true
+  // for those that are, or -1 where that cannot be decided in int64.
+  isl_stat int64_contains(isl_set *set, int_array_reader const &points,
+      int_array_reader const *params, std::vector<int8_t> &contained)
+  {
+    // with an explicit representation of all divs
+    owned<isl_set> set_with_divs(isl_set_compute_divs(isl_set_copy(set)));
+    std::vector<owned<isl_basic_set>> basic_sets;
+    if (!set_with_divs || isl_set_foreach_basic_set(set_with_divs.get(),
+          collect_basic_set, &basic_sets) < 0)
+      return isl_stat_error;
+
+    std::vector<int64_basic_set> int64_basic_sets(basic_sets.size());
+    size_t n_known = 1 + (params ? params->shape(0) : 0) + points.shape(1);
+    size_t max_cols = n_known;
+    for (size_t b = 0; b < basic_sets.size(); ++b)
+    {
+      if (!int64_basic_set_from(basic_sets[b].get(), int64_basic_sets[b]))
+      {
+        // not an error, the constraints just do not fit
+        isl_ctx_reset_error(isl_set_get_ctx(set));
+        std::fill(contained.begin(), contained.end(), -1);
+        return isl_stat_ok;
+      }
+      max_cols = std::max(max_cols, int64_basic_sets[b].n_cols);
+    }
+
+    std::vector<int64_t> x(max_cols);
+    x[0] = 1;
+    bool params_fit = true;
+    for (size_t j = 0; params && j < params->shape(0); ++j)
+      params_fit = params->get(j, 0, x[1 + j]) && params_fit;
+
+    size_t n_before = n_known - points.shape(1);
+    for (size_t i = 0; i < contained.size(); ++i)
+    {
+      bool fits = params_fit;
+      for (size_t j = 0; fits && j < points.shape(1); ++j)
+        fits = points.get(i, j, x[n_before + j]);
+
+      contained[i] = fits ? 0 : -1;
+      for (size_t b = 0; fits && b < int64_basic_sets.size(); ++b)
+      {
+        int bset_contains = int64_basic_sets[b].contains(x.data());
+        if (bset_contains == 1)
+        {
+          contained[i] = 1;
+          break;
+        }
+        if (bset_contains < 0)
+          contained[i] = -1;
+      }
+    }
+    return isl_stat_ok;
+  }
+
+  py::object contains_points(isl::set const &self,
+      any_array const &py_points, std::optional<any_array> const &py_params)
+  {
+    if (!self.is_valid())
+      throw isl::error("passed invalid arg to contains_points for self");
+
+    int_array_reader points(py_points, 2, "contains_points");
+    std::optional<int_array_reader> params;
+    if (py_params)
+      params.emplace(*py_params, 1, "contains_points");
+    const int_array_reader *params_ptr = params ? &*params : nullptr;
+
+    std::vector<int8_t> contained(points.shape(0));
+    {
+      isl::ctx_info *info = self.m_ctx_info;
+      isl::ctx_lock lock(info);
+      isl_ctx_reset_error(info->ctx);
+
+      isl_size n_param = isl_set_dim(self.m_data, isl_dim_param);
+      isl_size n_dim = isl_set_dim(self.m_data, isl_dim_set);
+      if (n_param < 0 || n_dim < 0)
+        isl::handle_isl_error(info->ctx, "isl_set_dim");
+      if (points.shape(1) != size_t(n_dim))
+        throw py::value_error(("contains_points: expected points with "
+              + std::to_string(n_dim) + " coordinates").c_str());
+      if ((params ? params->shape(0) : 0) != size_t(n_param))
+        throw py::value_error(("contains_points: expected "
+              + std::to_string(n_param) + " parameter values").c_str());
+
+      const char *failed = nullptr;
+      {
+        py::gil_scoped_release release_gil;
+        if (int64_contains(self.m_data, points, params_ptr, contained) < 0)
+          failed = "isl_set_compute_divs";
+
+        // decide the rest exactly
+        for (size_t i = 0; !failed && i < contained.size(); ++i)
+          if (contained[i] < 0)
+          {
+            isl_bool is_contained = set_contains_point(
+                self.m_data, points, params_ptr, i);
+            if (is_contained < 0)
+              failed = "isl_set_is_subset";
+            contained[i] = is_contained;
+          }
+      }
+
+      if (failed)
+        isl::handle_isl_error(info->ctx, failed);
+    }
+
+    std::vector<uint8_t> result(contained.begin(), contained.end());
+    return numpy_array(std::move(result), {contained.size()},
+        py::dtype<bool>());
+  }
+
+  // }}}
+}
+
+// }}}
+
+void islpy_expose_numpy(py::module_ &m)
+{
+  m.def("_points_array", islpy::points_array,
+      py::arg("set"), py::arg("max_points").none(),
+      py::sig("def _points_array(set: Set, max_points: int | None) "
+        "-> tuple[object, list[tuple[int, int]]]"));
+  m.def("_constraint_arrays", islpy::constraint_arrays<isl::basic_set>,
+      py::arg("bset"),
+      py::sig("def _constraint_arrays(bset: BasicSet) -> tuple[tuple[object, "
+        "list[tuple[int, int]]], tuple[object, list[tuple[int, int]]], "
+        "tuple[object, list[tuple[int, int]]]]"));
+  m.def("_constraint_arrays", islpy::constraint_arrays<isl::basic_map>,
+      py::arg("bmap"),
+      py::sig("def _constraint_arrays(bmap: BasicMap) -> tuple[tuple[object, "
+        "list[tuple[int, int]]], tuple[object, list[tuple[int, int]]], "
+        "tuple[object, list[tuple[int, int]]]]"));
+  m.def("_basic_set_from_constraint_arrays",
+      islpy::basic_set_from_constraint_arrays,
+      py::arg("space"), py::arg("eq"), py::arg("ineq"),
+      py::sig("def _basic_set_from_constraint_arrays(space: Space, "
+        "eq: object, ineq: object) -> BasicSet"));
+  m.def("_basic_map_from_constraint_arrays",
+      islpy::basic_map_from_constraint_arrays,
+      py::arg("space"), py::arg("eq"), py::arg("ineq"),
+      py::sig("def _basic_map_from_constraint_arrays(space: Space, "
+        "eq: object, ineq: object) -> BasicMap"));
+  m.def("_contains_points", islpy::contains_points,
+      py::arg("set"), py::arg("points"), py::arg("params").none(),
+      py::sig("def _contains_points(set: Set, points: object, "
+        "params: object | None) -> object"));
+
+  m.def("_to_array", islpy::to_array<isl::vec>, py::arg("vec"),
+      py::sig("def _to_array(vec: Vec) "
+        "-> tuple[object, list[tuple[int, int]]]"));
+  m.def("_to_array", islpy::to_array<isl::mat>, py::arg("mat"),
+      py::sig("def _to_array(mat: Mat) "
+        "-> tuple[object, list[tuple[int, int]]]"));
+  m.def("_to_array", islpy::to_array<isl::multi_val>, py::arg("mv"),
+      py::sig("def _to_array(mv: MultiVal) "
+        "-> tuple[object, list[tuple[int, int]]]"));
+}
@@ -18,6 +18,14 @@ namespace islpy
   {
     return self != other;
   }
+
+  isl::id *id_copy(isl::id const &self)
+  {
+    if (!self.is_valid())
+      throw isl::error("passed invalid arg to isl_id_copy for self");
+    isl::ctx_lock lock(self.m_ctx_info);
+    return new isl::id(isl_id_copy(self.m_data), self.m_ctx_info);
+  }
 }
 
 void islpy_expose_part1(py::module_ &m)
@@ -53,6 +61,47 @@ void islpy_expose_part1(py::module_ &m)
   wrap_ctx.def("_is_valid", &isl::ctx::is_valid);
   wrap_ctx.def("_reset_instance", &isl::ctx::reset_instance);
   wrap_ctx.def("_wraps_same_instance_as", &isl::ctx::wraps_same_instance_as);
+  // Consistent with __eq__, which compares the wrapped isl_ctx.
+  wrap_ctx.def("__hash__",
+      [](isl::ctx const &self)
+      {
+        return (size_t) self.m_data;
+      });
+  wrap_ctx.def("set_consume_temporaries",
+      [](isl::ctx &self, bool value)
+      {
+        self.m_ctx_info->consume_temporaries.store(value);
+      }, py::arg("value"),
+      "set_consume_temporaries(self, value: bool) -> None\n\n"
+      "Whether arguments that are unique temporaries may be consumed by "
+      "methods instead of copied. Disabled by default. "
+      "See :ref:`consuming-arguments`.");
+  wrap_ctx.def("get_consume_temporaries",
+      [](isl::ctx &self)
+      {
+        return self.m_ctx_info->consume_temporaries.load();
+      },
+      "get_consume_temporaries(self) -> bool");
+  wrap_ctx.def("set_parse_cache_size",
+      [](isl::ctx &self, size_t size)
+      {
+        isl::ctx_lock lock(self.m_ctx_info);
+        self.m_ctx_info->parsed.set_capacity(size);
+      }, py::arg("size"),
+      "set_parse_cache_size(self, size: int) -> None\n\n"
+      "Set the number of objects parsed from strings (e.g. by "
+      "``Set(\"{ [i] : 0 <= i < 10 }\")``) that are kept, so that "
+      "parsing the same string again only copies the object. "
+      "Objects parsed from strings longer than 4096 characters are not "
+      "kept. Pass 0 to disable the cache. Defaults to 256.\n\n"
+      ".. versionadded:: 2026.2");
+  wrap_ctx.def("get_parse_cache_size",
+      [](isl::ctx &self)
+      {
+        isl::ctx_lock lock(self.m_ctx_info);
+        return self.m_ctx_info->parsed.capacity();
+      },
+      "get_parse_cache_size(self) -> int");
 
   // {{{ lists
 
@@ -96,6 +145,7 @@ void islpy_expose_part1(py::module_ &m)
           ctx = isl::get_default_context();
         if (!ctx)
           throw isl::error("Val constructor: no context available");
+        isl::ctx_lock lock(ctx);
         isl_val *result = isl_val_int_from_si(ctx, i);
         if (result)
           new (t) isl::val(result);
@@ -105,8 +155,19 @@ void islpy_expose_part1(py::module_ &m)
       );
 
   MAKE_WRAP(multi_val, MultiVal);
+  wrap_multi_val.def("__init__", islpy::init_multi_val_from_array,
+      py::arg("space"), py::arg("values"),
+      py::sig("def __init__(self, space: Space, values: object) -> None"));
   MAKE_WRAP(vec, Vec);
+  wrap_vec.def("__init__", islpy::init_vec_from_array,
+      py::arg("values"), py::arg("context").none(true)=py::none(),
+      py::sig("def __init__(self, values: object, "
+        "context: Context | None = None) -> None"));
   MAKE_WRAP(mat, Mat);
+  wrap_mat.def("__init__", islpy::init_mat_from_array,
+      py::arg("values"), py::arg("context").none(true)=py::none(),
+      py::sig("def __init__(self, values: object, "
+        "context: Context | None = None) -> None"));
   MAKE_WRAP(fixed_box, FixedBox);
 
   MAKE_WRAP(aff, Aff);
@@ -143,6 +204,7 @@ void islpy_expose_part1(py::module_ &m)
           ctx = isl::get_default_context();
         if (!ctx)
           throw isl::error("Id constructor: no context available");
+        isl::ctx_lock lock(ctx);
         Py_INCREF(user.ptr());
         isl_id *result = isl_id_alloc(ctx, name, user.ptr());
         isl_id_set_free_user(result, isl::my_decref);
@@ -164,6 +226,14 @@ void islpy_expose_part1(py::module_ &m)
       ":param self: :class:`Id`\n"
       ":param other: :class:`Id`\n"
       ":return: bool ");
+  // isl_id_copy is not exposed by gen_wrap, but Ids are values like all
+  // other isl objects. See the __copy__ generated for those.
+  wrap_id.def("__copy__", islpy::id_copy,
+      py::sig("def __copy__(self) -> Id"));
+  wrap_id.def("__deepcopy__",
+      [](isl::id const &self, py::handle memo) { return islpy::id_copy(self); },
+      py::arg("memo"),
+      py::sig("def __deepcopy__(self, memo: dict[int, object]) -> Id"));
 
   MAKE_WRAP(constraint, Constraint);
 
@@ -173,4 +243,39 @@ void islpy_expose_part1(py::module_ &m)
   MAKE_TO_METHOD(space, local_space);
 
 #include "gen-expose-part1.inc"
+
+  // {{{ operators
+
+  wrap_val.def("__bool__",
+      [](isl::val const &self) { return !isl::val_is_zero(self); },
+      py::sig("def __bool__(self) -> bool"));
+
+  isl::def_arith_operators<isl::aff, isl::aff_add, isl::aff_sub,
+    isl::aff_mul, isl::aff_neg>(wrap_aff, "Aff");
+  isl::def_arith_operators<isl::pw_aff, isl::pw_aff_add, isl::pw_aff_sub,
+    isl::pw_aff_mul, isl::pw_aff_neg>(wrap_pw_aff, "PwAff");
+
+  // }}}
+
+  // {{{ decomposition
+
+  auto pw_aff_get_pieces = [](isl::pw_aff const &self)
+  {
+    return isl::foreach_piece_list<isl::aff, isl_aff, isl_aff_free,
+      isl::pw_aff, isl_pw_aff_foreach_piece>(
+          self, "isl_pw_aff_foreach_piece");
+  };
+  wrap_pw_aff.def("get_pieces", pw_aff_get_pieces,
+      py::sig("def get_pieces(self) -> list[tuple[Set, Aff]]"),
+      "get_pieces(self) -> list[tuple[Set, Aff]]\n\n"
+      ":return: list of (:class:`Set`, :class:`Aff`)");
+  wrap_aff.def("get_pieces", [pw_aff_get_pieces](isl::aff const &self)
+      {
+        return pw_aff_get_pieces(isl::pw_aff(self));
+      },
+      py::sig("def get_pieces(self) -> list[tuple[Set, Aff]]"),
+      "get_pieces(self) -> list[tuple[Set, Aff]]\n\n"
+      ":return: list of (:class:`Set`, :class:`Aff`)");
+
+  // }}}
 }
@@ -5,22 +5,46 @@ namespace isl
 #include "gen-wrap-part2.inc"
 }
 
+namespace islpy
+{
+  // Applies *Op* to *self* converted to its non-basic type *T*.
+  template <class Basic, class T, py::object (*Op)(T const &, T const &)>
+  py::object as_non_basic(Basic const &self, T const &other)
+  {
+    T non_basic_self(self);
+    // a temporary, hand it to isl
+    non_basic_self.m_consume = true;
+    return Op(non_basic_self, other);
+  }
+
+  template <class T, class Func>
+  void def_operator(py::class_<T> &cls, const char *name, Func func,
+      const char *type_sig)
+  {
+    cls.def(name, func, py::arg("other"), py::is_operator(),
+        py::sig(("def " + std::string(name) + type_sig).c_str()));
+  }
+}
+
 void islpy_expose_part2(py::module_ &m)
 {
   MAKE_WRAP(basic_set, BasicSet);
   wrap_basic_set.def("__hash__", [](isl::basic_set const &self) {
                        isl::set set_self(self);
+                       isl::ctx_lock lock(set_self.get_ctx());
                        return isl_set_get_hash(set_self.m_data);
                      });
   // used in align_dims
   wrap_basic_set.def("is_params", [](isl::basic_set const &self) {
                        isl::set set_self(self);
+                       isl::ctx_lock lock(set_self.get_ctx());
                        return bool(isl_set_is_params(set_self.m_data));
                      });
 
   MAKE_WRAP(basic_map, BasicMap);
   wrap_basic_map.def("__hash__", [](isl::basic_map const &self) {
                        isl::map map_self(self);
+                       isl::ctx_lock lock(map_self.get_ctx());
                        return isl_map_get_hash(map_self.m_data);
                      });
 
@@ -47,4 +71,112 @@ void islpy_expose_part2(py::module_ &m)
   MAKE_WRAP(stride_info, StrideInfo);
 
 #include "gen-expose-part2.inc"
+
+  // {{{ set-like operators
+
+  using islpy::as_non_basic;
+  using islpy::def_operator;
+
+  for (const char *name : {"__and__", "__rand__"})
+  {
+    def_operator(wrap_basic_set, name, isl::basic_set_intersect,
+        "(self, other: BasicSet) -> BasicSet");
+    def_operator(wrap_basic_set, name,
+        as_non_basic<isl::basic_set, isl::set, isl::set_intersect>,
+        "(self, other: Set) -> Set");
+    def_operator(wrap_set, name, isl::set_intersect,
+        "(self, other: Set | BasicSet) -> Set");
+
+    def_operator(wrap_basic_map, name, isl::basic_map_intersect,
+        "(self, other: BasicMap) -> BasicMap");
+    def_operator(wrap_basic_map, name,
+        as_non_basic<isl::basic_map, isl::map, isl::map_intersect>,
+        "(self, other: Map) -> Map");
+    def_operator(wrap_map, name, isl::map_intersect,
+        "(self, other: Map | BasicMap) -> Map");
+  }
+
+  for (const char *name : {"__or__", "__ror__"})
+  {
+    def_operator(wrap_basic_set, name, isl::basic_set_union,
+        "(self, other: BasicSet) -> Set");
+    def_operator(wrap_basic_set, name,
+        as_non_basic<isl::basic_set, isl::set, isl::set_union>,
+        "(self, other: Set) -> Set");
+    def_operator(wrap_set, name, isl::set_union,
+        "(self, other: Set | BasicSet) -> Set");
+
+    def_operator(wrap_basic_map, name,
+        as_non_basic<isl::basic_map, isl::map, isl::map_union>,
+        "(self, other: Map | BasicMap) -> Map");
+    def_operator(wrap_map, name, isl::map_union,
+        "(self, other: Map | BasicMap) -> Map");
+  }
+
+  def_operator(wrap_basic_set, "__sub__",
+      as_non_basic<isl::basic_set, isl::set, isl::set_subtract>,
+      "(self, other: Set | BasicSet) -> Set");
+  def_operator(wrap_set, "__sub__", isl::set_subtract,
+      "(self, other: Set | BasicSet) -> Set");
+  def_operator(wrap_basic_map, "__sub__",
+      as_non_basic<isl::basic_map, isl::map, isl::map_subtract>,
+      "(self, other: Map | BasicMap) -> Map");
+  def_operator(wrap_map, "__sub__", isl::map_subtract,
+      "(self, other: Map | BasicMap) -> Map");
+
+  // }}}
+
+  // {{{ decomposition
+
+  wrap_basic_set.def("get_constraints", [](isl::basic_set const &self)
+      {
+        return isl::foreach_list<isl::constraint, isl_constraint,
+          isl_constraint_free, isl::basic_set,
+          isl_basic_set_foreach_constraint>(
+              self, "isl_basic_set_foreach_constraint");
+      },
+      py::sig("def get_constraints(self) -> list[Constraint]"),
+      "get_constraints(self) -> list[Constraint]\n\n"
+      "Get a list of constraints.");
+  wrap_basic_map.def("get_constraints", [](isl::basic_map const &self)
+      {
+        return isl::foreach_list<isl::constraint, isl_constraint,
+          isl_constraint_free, isl::basic_map,
+          isl_basic_map_foreach_constraint>(
+              self, "isl_basic_map_foreach_constraint");
+      },
+      py::sig("def get_constraints(self) -> list[Constraint]"),
+      "get_constraints(self) -> list[Constraint]\n\n"
+      "Get a list of constraints.");
+
+  auto set_get_basic_sets = [](isl::set const &self)
+  {
+    return isl::foreach_list<isl::basic_set, isl_basic_set,
+      isl_basic_set_free, isl::set, isl_set_foreach_basic_set>(
+          self, "isl_set_foreach_basic_set");
+  };
+  wrap_set.def("get_basic_sets", set_get_basic_sets,
+      py::sig("def get_basic_sets(self) -> list[BasicSet]"),
+      "get_basic_sets(self) -> list[BasicSet]\n\n"
+      "Get the list of :class:`BasicSet` instances in this :class:`Set`.");
+  wrap_basic_set.def("get_basic_sets", [set_get_basic_sets](
+        isl::basic_set const &self)
+      {
+        return set_get_basic_sets(isl::set(self));
+      },
+      py::sig("def get_basic_sets(self) -> list[BasicSet]"),
+      "get_basic_sets(self) -> list[BasicSet]\n\n"
+      "Get the list of :class:`BasicSet` instances in this :class:`Set`.");
+
+  wrap_map.def("get_basic_maps", [](isl::map const &self)
+      {
+        return isl::foreach_list<isl::basic_map, isl_basic_map,
+          isl_basic_map_free, isl::map, isl_map_foreach_basic_map>(
+              self, "isl_map_foreach_basic_map");
+      },
+      py::sig("def get_basic_maps(self) -> list[BasicMap]"),
+      "get_basic_maps(self) -> list[BasicMap]\n\n"
+      "Get the list of :class:`BasicMap` instances in this :class:`Map`.");
+
+  // }}}
 }
@@ -32,4 +32,42 @@ void islpy_expose_part3(py::module_ &m)
   MAKE_WRAP(ast_print_options, AstPrintOptions);
 
 #include "gen-expose-part3.inc"
+
+  // {{{ operators
+
+  isl::def_arith_operators<isl::qpolynomial,
+    isl::qpolynomial_add, isl::qpolynomial_sub,
+    isl::qpolynomial_mul, isl::qpolynomial_neg>(wrap_qpolynomial, "QPolynomial");
+  isl::def_arith_operators<isl::pw_qpolynomial,
+    isl::pw_qpolynomial_add, isl::pw_qpolynomial_sub,
+    isl::pw_qpolynomial_mul, isl::pw_qpolynomial_neg>(
+        wrap_pw_qpolynomial, "PwQPolynomial");
+
+  // }}}
+
+  // {{{ decomposition
+
+  wrap_pw_qpolynomial.def("get_pieces", [](isl::pw_qpolynomial const &self)
+      {
+        return isl::foreach_piece_list<isl::qpolynomial, isl_qpolynomial,
+          isl_qpolynomial_free, isl::pw_qpolynomial,
+          isl_pw_qpolynomial_foreach_piece>(
+              self, "isl_pw_qpolynomial_foreach_piece");
+      },
+      py::sig("def get_pieces(self) -> list[tuple[Set, QPolynomial]]"),
+      "get_pieces(self) -> list[tuple[Set, QPolynomial]]\n\n"
+      ":return: list of (:class:`Set`, :class:`QPolynomial`)");
+
+  wrap_qpolynomial.def("get_terms", [](isl::qpolynomial const &self)
+      {
+        return isl::foreach_list<isl::term, isl_term, isl_term_free,
+          isl::qpolynomial, isl_qpolynomial_foreach_term>(
+              self, "isl_qpolynomial_foreach_term");
+      },
+      py::sig("def get_terms(self) -> list[Term]"),
+      "get_terms(self) -> list[Term]\n\n"
+      "Get the list of :class:`Term` instances in this "
+      ":class:`QPolynomial`.");
+
+  // }}}
 }
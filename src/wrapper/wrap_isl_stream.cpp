@@ -0,0 +1,258 @@
+#include "wrap_isl.hpp"
+
+#include <isl/stream.h>
+#include <cstdio>
+#include <cstdlib>
+#include <unistd.h>
+
+// {{{ reading objects from a stream
+//
+// Backs islpy.iter_read, which reads a sequence of objects (separated by
+// whitespace and/or semicolons) from a file (given as a file descriptor)
+// or a string, one object at a time, using isl's stream parser.
+//
+// Reading from a file may block for an arbitrary amount of time, so each
+// reader parses in a private context, without holding the lock of the
+// target context. Each object is then moved to the target context by
+// printing it and parsing the text again, which only needs that lock while
+// parsing from memory.
+
+namespace islpy
+{
+  struct stream_type
+  {
+    const char *name;
+    void *(*read)(isl_stream *);
+    // Frees the object.
+    char *(*to_str)(void *);
+    void *(*read_from_str)(isl_ctx *, const char *);
+    py::object (*wrap)(void *, isl::ctx_info *);
+  };
+
+  template <class Wrapper, class T, T *(*Read)(isl_stream *),
+           char *(*ToStr)(T *), T *(*ReadFromStr)(isl_ctx *, const char *),
+           T *(*Free)(T *)>
+  stream_type make_stream_type(const char *name)
+  {
+    return stream_type{
+      name,
+      [](isl_stream *s) -> void * { return Read(s); },
+      [](void *obj)
+      {
+        char *text = ToStr((T *) obj);
+        Free((T *) obj);
+        return text;
+      },
+      [](isl_ctx *ctx, const char *text) -> void *
+      { return ReadFromStr(ctx, text); },
+      [](void *obj, isl::ctx_info *info)
+      {
+        return handle_from_new_ptr(new Wrapper((T *) obj, info));
+      }};
+  }
+
+#define MAKE_STREAM_TYPE(NAME) \
+  make_stream_type<isl::NAME, isl_##NAME, isl_stream_read_##NAME, \
+    isl_##NAME##_to_str, isl_##NAME##_read_from_str, isl_##NAME##_free>(#NAME)
+
+  const stream_type stream_types[] = {
+    MAKE_STREAM_TYPE(basic_set),
+    MAKE_STREAM_TYPE(set),
+    MAKE_STREAM_TYPE(map),
+    MAKE_STREAM_TYPE(union_set),
+    MAKE_STREAM_TYPE(union_map),
+    MAKE_STREAM_TYPE(pw_qpolynomial),
+    MAKE_STREAM_TYPE(multi_aff),
+    MAKE_STREAM_TYPE(multi_val),
+    MAKE_STREAM_TYPE(val),
+    MAKE_STREAM_TYPE(schedule),
+  };
+
+#undef MAKE_STREAM_TYPE
+
+  class stream_reader
+  {
+    private:
+      isl::ctx_info *m_ctx_info;
+      // Only used by this reader, so it needs no lock.
+      isl_ctx *m_private_ctx;
+      const stream_type *m_type;
+      FILE *m_file;
+      // Backs the stream if it reads from a string.
+      std::string m_text;
+      isl_stream *m_stream;
+      size_t m_index;
+
+      [[noreturn]] void handle_read_error(isl_ctx *ctx,
+          std::string const &func_name)
+      {
+        try
+        {
+          isl::handle_isl_error(ctx, func_name);
+        }
+        catch (isl::error &e)
+        {
+          throw isl::error("object at index " + std::to_string(m_index)
+              + ": " + e.what());
+        }
+      }
+
+    public:
+      stream_reader(isl::ctx const &ctx, const char *type_name)
+      : m_ctx_info(nullptr), m_private_ctx(nullptr), m_type(nullptr),
+      m_file(nullptr), m_stream(nullptr), m_index(0)
+      {
+        for (stream_type const &type : stream_types)
+          if (std::string_view(type_name) == type.name)
+            m_type = &type;
+
+        if (!m_type)
+          throw py::type_error(
+              ("cannot read objects of type '" + std::string(type_name)
+               + "' from a stream").c_str());
+
+        m_private_ctx = isl_ctx_alloc();
+        if (!m_private_ctx)
+          throw isl::error("failed to create context");
+        // We implement our own error handling, see Context.__init__.
+        isl_options_set_on_error(m_private_ctx, ISL_ON_ERROR_CONTINUE);
+
+        m_ctx_info = isl::ref_ctx(ctx.m_ctx_info);
+      }
+
+      stream_reader(stream_reader const &) = delete;
+      stream_reader &operator=(stream_reader const &) = delete;
+
+      ~stream_reader()
+      {
+        close();
+        isl_ctx_free(m_private_ctx);
+        isl::unref_ctx(m_ctx_info);
+      }
+
+      // Takes ownership of the file descriptor *fd*: it is closed along
+      // with the reader, or right away if this fails.
+      void open_fd(int fd)
+      {
+        FILE *file = fdopen(fd, "r");
+        if (!file)
+        {
+          ::close(fd);
+          throw isl::error("failed to open file descriptor "
+              + std::to_string(fd));
+        }
+
+        isl_stream *stream = isl_stream_new_file(m_private_ctx, file);
+        if (!stream)
+        {
+          fclose(file);
+          isl::handle_isl_error(m_private_ctx, "isl_stream_new_file");
+        }
+        m_file = file;
+        m_stream = stream;
+      }
+
+      void open_str(std::string_view text)
+      {
+        m_text = text;
+
+        isl_stream *stream = isl_stream_new_str(m_private_ctx, m_text.c_str());
+        if (!stream)
+        {
+          m_text.clear();
+          isl::handle_isl_error(m_private_ctx, "isl_stream_new_str");
+        }
+        m_stream = stream;
+      }
+
+      // Returns the next object, or None at the end of the stream.
+      py::object read_next()
+      {
+        if (!m_stream)
+          return py::none();
+
+        void *obj = nullptr;
+        char *text = nullptr;
+        bool at_end = false;
+        {
+          py::gil_scoped_release release_gil;
+          while (isl_stream_eat_if_available(m_stream, ';'))
+            ;
+          at_end = isl_stream_is_empty(m_stream);
+          if (!at_end)
+          {
+            obj = m_type->read(m_stream);
+            if (obj)
+              text = m_type->to_str(obj);
+          }
+        }
+
+        if (at_end)
+        {
+          close();
+          return py::none();
+        }
+        if (!obj)
+          handle_read_error(m_private_ctx,
+              std::string("isl_stream_read_") + m_type->name);
+        if (!text)
+          handle_read_error(m_private_ctx,
+              std::string("isl_") + m_type->name + "_to_str");
+
+        void *result;
+        {
+          isl::ctx_lock lock(m_ctx_info);
+          {
+            py::gil_scoped_release release_gil;
+            result = m_type->read_from_str(m_ctx_info->ctx, text);
+          }
+          free(text);
+
+          if (!result)
+            handle_read_error(m_ctx_info->ctx,
+                std::string("isl_") + m_type->name + "_read_from_str");
+        }
+
+        ++m_index;
+        return m_type->wrap(result, m_ctx_info);
+      }
+
+      void close()
+      {
+        if (m_stream)
+        {
+          isl_stream_free(m_stream);
+          m_stream = nullptr;
+        }
+        if (m_file)
+        {
+          fclose(m_file);
+          m_file = nullptr;
+        }
+        m_text.clear();
+      }
+  };
+}
+
+// }}}
+
+void islpy_expose_stream(py::module_ &m)
+{
+  py::class_<islpy::stream_reader>(m, "_StreamReader")
+    .def(py::init<isl::ctx const &, const char *>(),
+        py::arg("context"), py::arg("type_name"))
+    .def("open_fd", &islpy::stream_reader::open_fd, py::arg("fd"))
+    .def("open_str",
+        [](islpy::stream_reader &self, py::str text)
+        {
+          Py_ssize_t size;
+          const char *data = PyUnicode_AsUTF8AndSize(text.ptr(), &size);
+          if (!data)
+            throw py::python_error();
+          self.open_str(std::string_view(data, size));
+        }, py::arg("text"))
+    .def("read_next", &islpy::stream_reader::read_next)
+    .def("close", &islpy::stream_reader::close);
+}
+
+// vim: foldmethod=marker
@@ -23,6 +23,7 @@ THE SOFTWARE.
 import pytest
 
 import islpy as isl
+from islpy import _monkeypatch
 
 
 def test_basics():
@@ -53,6 +54,22 @@ def test_basics():
     assert len(points) == 17
 
 
+def test_downcast_deprecation():
+    import warnings
+
+    bset = isl.BasicSet("{ [i] : 0 <= i < 10 }")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        bset.intersect(bset)
+
+    with pytest.warns(DeprecationWarning,
+            match=r"BasicSet.intersect with implicit conversion of self to Set "
+            r".* using .to_set\(\)") as record:
+        result = bset.intersect(bset.to_set())
+    assert isinstance(result, isl.Set)
+    assert record[0].filename == __file__
+
+
 def test_error_on_invalid_index():
     ctx = isl.Context()
     my_set = isl.Set("{ [k, l] : 3l >= -k and 3l <= 10 - k "
@@ -141,6 +158,557 @@ def test_apostrophes_during_pickling():
     assert initial_map == unpickled_map
 
 
+def test_binary_pickling():
+    from pickle import dumps, loads
+
+    big = 3**80
+    instances = [
+        isl.BasicSet("[n] -> { [i, j] : exists k : i = 3k + 1 and 0 <= j < n }"),
+        isl.Set("{ [i] : i mod 5 = 2 or 10 <= i < 20 }"),
+        isl.Set(f"{{ [i] : -{big} <= i <= {big} }}"),
+        isl.Set("[n] -> { A[i] : 0 <= i < n; }").set_dim_name(
+            isl.dim_type.set, 0, "i'"),
+        isl.Set("{ [] : false }"),
+        isl.Map("[n] -> { A[i] -> [[j] -> B[k]] : 0 <= i < n and k = 2j and i < j }"),
+        isl.UnionSet("{ A[i] : 0 <= i < 10; B[] }"),
+        isl.UnionMap("[n] -> { A[i] -> B[i + 1] : i < n; C[] -> D[x, y] : x > y }"),
+        isl.UnionMap("{ }"),
+        ]
+
+    for inst in instances:
+        data = dumps(inst)
+        assert b"ISLB" in data
+
+        inst2 = loads(data)
+        assert type(inst2) is type(inst)
+        assert inst.get_space() == inst2.get_space()
+        assert inst.is_equal(inst2)
+
+    affs = [
+        isl.Aff("[n] -> { [i, j] -> [(floor((i + n)/3) + floor(j/2) - 7/2)] }"),
+        isl.Aff(f"{{ [i] -> [({big}i)] }}"),
+        ]
+    for aff in affs:
+        aff2 = loads(dumps(aff))
+        assert aff.get_space() == aff2.get_space()
+        assert aff.plain_is_equal(aff2)
+
+    qps = [
+        isl.PwQPolynomial(
+            "[n] -> { [i, j] -> (1/2 * i^2 * j + floor(i/3) * n) : 0 <= i < n; "
+            "[i, j] -> (n^3) : i >= n }"),
+        isl.PwQPolynomial("[n] -> { [i] -> 0 }"),
+        isl.PwQPolynomial(
+            "[n] -> { A[i, j] -> (floor((i + floor(j/2))/3)^2 * n - 2/3 * j) "
+            ": 0 <= i < n }"),
+        ]
+    for qp in qps:
+        qp2 = loads(dumps(qp))
+        assert qp.get_space() == qp2.get_space()
+        assert qp.sub(qp2).is_zero()
+
+        for _, piece in qp.get_pieces():
+            piece2 = loads(dumps(piece))
+            assert piece.sub(piece2).is_zero()
+
+    # Rational sets cannot be represented, those fall back to text.
+    rational = isl.Set("{ rat: [i] : 0 <= 2i <= 1 }")
+    assert isl._isl._encode_binary(rational) is None
+    assert loads(dumps(rational)).is_equal(rational)
+
+    # So do polynomials of high degree, which would be slow to decode.
+    high_degree = isl.PwQPolynomial("{ [i] -> (i^100) }")
+    assert isl._isl._encode_binary(high_degree) is None
+    assert loads(dumps(high_degree)).sub(high_degree).is_zero()
+
+    with pytest.raises(isl.Error):
+        isl._isl._decode_binary(isl.DEFAULT_CONTEXT, b"ISLB\x01\x02\x01")
+
+    # Corrupted data that would take long to decode is rejected.
+    qp_data = isl._isl._encode_binary(isl.PwQPolynomial("{ [i] -> (i^2) }"))
+    assert qp_data.endswith(b"\x02\x02\x02")  # coefficient 1, exponent 2
+    for bad in [
+            qp_data[:-1] + b"\xff\xff\x03",
+            b"ISLB\x01\x0a\x01\x00" + b"\x02" * 10**5,
+            b"ISLB\x01\x01\x01\x00\x00\x00\xff\xff\x0f\x00\x00" + b"\x00" * 10**5,
+            ]:
+        with pytest.raises(isl.Error):
+            isl._isl._decode_binary(isl.DEFAULT_CONTEXT, bad)
+
+
+def test_pickler_shares_spaces():
+    import io
+    from pickle import dumps, loads
+
+    prefix = "[size_n, size_m] -> { statement[outer, inner]"
+    space = isl.Set(f"{prefix} }}").get_space()
+    bsets = [
+        isl.BasicSet(f"{prefix} : 0 <= outer < size_n + {k} and inner = size_m }}")
+        for k in range(100)]
+    objs = [*bsets,
+            isl.Set("[size_n, size_m] -> { statement[x, y] : x = y }"), space,
+            isl.Id("a", [1]), isl.Id("a", [1])]
+    user = [2]
+    shared_ids = [isl.Id("b", user), isl.Id("b", user)]
+
+    buf = io.BytesIO()
+    isl.Pickler(buf).dump((objs, shared_ids))
+    data = buf.getvalue()
+    assert len(data) < len(dumps((objs, shared_ids))) / 2
+
+    objs2, shared_ids2 = loads(data)
+    for obj, obj2 in zip(objs[:-3], objs2[:-3], strict=True):
+        assert obj.get_space() == obj2.get_space()
+        assert obj.is_equal(obj2)
+    # dimension names are not part of space equality
+    assert objs2[-4].get_var_dict() == objs[-4].get_var_dict()
+    assert objs2[-3].is_equal(space)
+
+    id1, id2 = objs2[-2:]
+    assert id1.name == id2.name == "a"
+    assert id1.user == id2.user == [1]
+    assert id1.user is not id2.user
+
+    id1, id2 = shared_ids2
+    assert id1 is id2
+    assert id1.name == "b"
+    assert id1.user == user
+
+
+def test_stable_hash():
+    import subprocess
+    import sys
+
+    set_str = "[n] -> { A[i, j] : 0 <= i < n and j = floor(i/3) }"
+    sched_str = ('{ domain: "[n] -> { S[i] : 0 <= i < n; T[i] : 0 <= i < n }", '
+            'child: { schedule: "[{ S[i] -> [(i)]; T[i] -> [(i + 1)] }]", '
+            'permutable: 1 } }')
+    code = (
+        "import islpy as isl; "
+        f"print(isl.Set({set_str!r}).stable_hash()); "
+        f"print(isl.Schedule({sched_str!r}).stable_hash())")
+    other_process = subprocess.check_output(
+            [sys.executable, "-c", code], text=True).split()
+
+    s = isl.Set(set_str)
+    assert other_process == [
+        s.stable_hash(), isl.Schedule(sched_str).stable_hash()]
+
+    # only the names of ids matter
+    s_id = s.set_tuple_id(isl.Id("A", user=[1]))
+    assert s_id.stable_hash() == s.stable_hash()
+
+    # names matter
+    assert s.set_dim_name(isl.dim_type.set, 0, "k").stable_hash() \
+            != s.stable_hash()
+
+    # representation order does not matter
+    assert (isl.UnionMap("{ A[i] -> B[i]; C[i] -> D[i] : i > 0 }").stable_hash()
+            == isl.UnionMap("{ C[i] -> D[i] : i > 0; A[i] -> B[i] }").stable_hash())
+    assert (isl.Set("{ [i] : i = 0 or i = 5 }").stable_hash()
+            == isl.Set("{ [i] : i = 5 or i = 0 }").stable_hash())
+
+    assert isl.Schedule(sched_str.replace("permutable: 1", "permutable: 0")) \
+            .stable_hash() != isl.Schedule(sched_str).stable_hash()
+
+    pwaff = isl.PwAff("[n] -> { [i] -> [(i)] : i < n; [i] -> [(n)] : i >= n }")
+    assert pwaff.stable_hash() == pwaff.copy().stable_hash()
+
+
+def test_result_cache():
+    uncached_coalesce = isl.Set.coalesce
+    s = isl.Set("[n] -> { [i] : 0 <= i < n or n <= i < 2n }")
+
+    isl.enable_result_cache(max_entries=3)
+    try:
+        coalesced = s.coalesce()
+        assert s.coalesce() is coalesced
+        assert s.copy().coalesce() is not coalesced
+        assert s.dim_max(0) is s.dim_max(0)
+        # keyword arguments bypass the cache
+        assert s.dim_max(pos=0) == s.dim_max(0)
+        assert s.is_empty() is False
+        assert s.lexmin() is s.lexmin()
+
+        # evicted, since at most three results are kept
+        assert s.coalesce() is not coalesced
+
+        # consumed results are recomputed
+        s.lexmin().consume()
+        assert s.lexmin()._is_valid()
+
+        # results of objects that have died do not count towards max_entries
+        coalesced = s.coalesce()
+        for _ in range(3):
+            s.copy().coalesce()
+        assert s.coalesce() is coalesced
+    finally:
+        isl.disable_result_cache()
+
+    assert isl.Set.coalesce is uncached_coalesce
+    assert s.coalesce() is not s.coalesce()
+
+
+def test_context_intern():
+    import gc
+
+    ctx = isl.Context()
+    s = ctx.intern(isl.Set("[n] -> { [i] : 0 <= i < n }", context=ctx))
+    assert ctx.intern(s) is s
+    assert ctx.intern(
+        isl.Set("[n] -> { [i] : i >= 0 and n - i > 0 }", context=ctx)) is s
+    assert isl.Context.intern(s.get_ctx(), s.copy()) is s
+
+    # different names, type or set
+    assert ctx.intern(isl.Set("[n] -> { [j] : 0 <= j < n }", context=ctx)) is not s
+    assert ctx.intern(
+        isl.BasicSet("[n] -> { [i] : 0 <= i < n }", context=ctx)) is not s
+    assert ctx.intern(isl.Set("[n] -> { [i] : 0 <= i <= n }", context=ctx)) is not s
+
+    um = isl.UnionMap("{ A[i] -> B[i]; C[] -> D[] }", context=ctx)
+    assert ctx.intern(um) is um
+    assert ctx.intern(
+        isl.UnionMap("{ C[] -> D[]; A[i] -> B[i] }", context=ctx)) is um
+
+    # entries are weak
+    del s
+    gc.collect()
+    s2 = isl.Set("[n] -> { [i] : 0 <= i < n }", context=ctx)
+    assert ctx.intern(s2) is s2
+
+    with pytest.raises(TypeError):
+        ctx.intern(isl.Space.set_alloc(ctx, 0, 1))
+    with pytest.raises(ValueError):
+        isl.DEFAULT_CONTEXT.intern(s2)
+
+
+def test_context_intern_no_warnings():
+    import warnings
+
+    ctx = isl.Context()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for cls, src in [
+                (isl.Aff, "[n] -> { [i] -> [(2i + n)] }"),
+                (isl.PwAff, "[n] -> { [i] -> [(2i + n)] : i >= 0 }"),
+                (isl.MultiPwAff, "[n] -> { [i] -> [(i), (n)] }"),
+                (isl.BasicMap, "{ [i] -> [i + 1] }"),
+                ]:
+            obj = ctx.intern(cls(src, context=ctx))
+            assert ctx.intern(cls(src, context=ctx)) is obj
+
+
+def test_parse_cache():
+    ctx = isl.Context()
+    assert ctx.get_parse_cache_size() == 256
+
+    src = "[n] -> { [i] : 0 <= i < n }"
+    s1 = isl.Set(src, context=ctx)
+    s2 = isl.Set(src, context=ctx)
+    assert s1 is not s2
+    assert s1.is_equal(s2)
+    assert isl.BasicSet(src, context=ctx).to_set().is_equal(s1)
+
+    # Objects from the cache are independent of each other.
+    s1.consume().set_dim_name(isl.dim_type.set, 0, "j")
+    assert s2.get_dim_name(isl.dim_type.set, 0) == "i"
+    assert isl.Set(src, context=ctx).get_dim_name(isl.dim_type.set, 0) == "i"
+
+    with pytest.raises(isl.Error):
+        isl.Set("{ [i] : ", context=ctx)
+    with pytest.raises(isl.Error):
+        isl.Set("{ [i] : ", context=ctx)
+
+    # Objects parsed from long strings are not cached, but parsed as usual.
+    long_src = "{ [i] : " + " or ".join(f"i = {k}" for k in range(500)) + " }"
+    assert len(long_src) > 4096
+    assert isl.Set(long_src, context=ctx).is_equal(isl.Set(long_src, context=ctx))
+
+    ctx.set_parse_cache_size(1)
+    assert isl.Map("{ [i] -> [i + 1] }", context=ctx).is_equal(
+        isl.Map("{ [j] -> [j + 1] }", context=ctx))
+    ctx.set_parse_cache_size(0)
+    assert isl.Set(src, context=ctx).is_equal(s2)
+
+
+def test_read_many():
+    ctx = isl.Context()
+    srcs = [f"[n] -> {{ [i] : 0 <= i < n + {k} }}" for k in range(10)]
+    sets = isl.Set.read_many(srcs, context=ctx)
+    assert len(sets) == len(srcs)
+    for src, s in zip(srcs, sets, strict=True):
+        assert type(s) is isl.Set
+        assert s.get_ctx() == ctx
+        assert s.is_equal(isl.Set(src, context=ctx))
+
+    assert isl.Set.read_many([]) == []
+    maps = isl.Map.read_many(iter(["{ [i] -> [i + 1] }", "{ [i] -> [2i] }"]))
+    assert maps[1].is_equal(isl.Map("{ [j] -> [2j] }"))
+    umap, = isl.UnionMap.read_many(["{ A[i] -> B[i]; C[] -> D[] }"])
+    assert umap.is_equal(isl.UnionMap("{ A[i] -> B[i]; C[] -> D[] }"))
+    pwaffs = isl.PwAff.read_many(["[n] -> { [(n)] }", "[n] -> { [(2n)] }"])
+    assert pwaffs[0].add(pwaffs[0]).is_equal(pwaffs[1])
+
+    with pytest.raises(isl.Error, match="index 1"):
+        isl.Set.read_many(["{ [i] }", "{ [i] : ", "{ [j] }"])
+    with pytest.raises(TypeError):
+        isl.Set.read_many("{ [i] }")
+    with pytest.raises(TypeError):
+        isl.Set.read_many(["{ [i] }", 17])
+
+
+def test_iter_read(tmp_path):
+    import io
+
+    srcs = [f"[n] -> {{ [i] : 0 <= i < n + {k} }}" for k in range(50)]
+    path = tmp_path / "sets.isl"
+    path.write_text("# domains\n" + ";\n".join(srcs[:25]) + "\n"
+            + "\n".join(srcs[25:]) + "\n")
+
+    ctx = isl.Context()
+    sets = list(isl.iter_read(path, isl.Set, context=ctx))
+    assert len(sets) == len(srcs)
+    for src, s in zip(srcs, sets, strict=True):
+        assert s.get_ctx() == ctx
+        assert s.is_equal(isl.Set(src, context=ctx))
+
+    with open(path, "rb") as inf:
+        inf.readline()
+        assert len(list(isl.iter_read(inf, isl.Set))) == len(srcs)
+    with open(path) as inf:
+        inf.readline()
+        sets = list(isl.iter_read(inf, isl.Set))
+        assert len(sets) == len(srcs)
+        assert sets[-1].is_equal(isl.Set(srcs[-1]))
+
+    # compressed, read in chunks
+    import gzip
+    gz_path = tmp_path / "sets.isl.gz"
+    with gzip.open(gz_path, "wt") as outf:
+        outf.write(";\n".join(srcs * 100))
+    with gzip.open(gz_path, "rb") as inf:
+        n_sets = 0
+        for s in isl.iter_read(inf, isl.Set):
+            assert s.is_equal(isl.Set(srcs[n_sets % len(srcs)]))
+            n_sets += 1
+        assert n_sets == 100 * len(srcs)
+    with gzip.open(gz_path, "rt") as inf:
+        it = isl.iter_read(inf, isl.Set)
+        assert next(it).is_equal(isl.Set(srcs[0]))
+        # stops reading
+        it.close()
+
+    umaps = list(isl.iter_read(
+        io.StringIO("{ A[i] -> B[i] }  { C[] -> D[] }"), isl.UnionMap))
+    assert umaps[1].is_equal(isl.UnionMap("{ C[] -> D[] }"))
+
+    # The source may use the context while objects are being read.
+    class SetSource:
+        def __init__(self):
+            self.remaining = list(srcs)
+
+        def read(self, size=-1):
+            if not self.remaining:
+                return ""
+            return str(isl.Set(self.remaining.pop(0)).coalesce()) + ";"
+
+    sets = list(isl.iter_read(SetSource(), isl.Set))
+    assert len(sets) == len(srcs)
+    assert sets[-1].is_equal(isl.Set(srcs[-1]))
+
+    # objects are read lazily, so errors surface once they are reached
+    it = isl.iter_read(io.BytesIO(b"{ [i] }; { [i] : ; { [j] }"), isl.Set)
+    assert next(it).is_equal(isl.Set("{ [i] }"))
+    with pytest.raises(isl.Error, match="index 1"):
+        next(it)
+
+    with pytest.raises(TypeError):
+        next(isl.iter_read(path, isl.Constraint))
+
+
+def test_str_cache():
+    s = isl.Set("[n] -> { [i] : 0 <= i < n }")
+    text = str(s)
+    assert str(s) is text
+    assert repr(s) == f'Set("{text}")'
+
+    big = isl.Set("[n] -> { [i] : "
+            + " or ".join(f"i = {k}n" for k in range(1000)) + " }")
+    assert len(str(big)) > _monkeypatch.STR_CACHE_MAX_LENGTH
+    assert _monkeypatch._STR_CACHE_ATTR not in big.__dict__
+    assert _monkeypatch._STR_CACHE_ATTR in s.__dict__
+
+    # consumed objects still cannot be printed
+    s.consume().coalesce()
+    with pytest.raises(isl.Error):
+        str(s)
+
+
+def test_printer_print_many():
+    objs = [isl.Set("{ [i] : 0 <= i < 10 }"), isl.Map("{ [i] -> [i + 1] }"),
+            isl.Aff("{ [i] -> [(2i)] }")]
+    prn = isl.Printer.to_str(isl.DEFAULT_CONTEXT)
+    assert prn.print_many(objs, separator="; ") is prn
+    assert prn.get_str() == "; ".join(str(obj) for obj in objs)
+
+
+def test_operators():
+    bset = isl.BasicSet("{ [i] : 0 <= i < 10 }")
+    bset2 = isl.BasicSet("{ [i] : 5 <= i < 15 }")
+    s = bset.to_set()
+    s2 = bset2.to_set()
+
+    assert isinstance(bset & bset2, isl.BasicSet)
+    for a, b in [(bset, bset2), (bset, s2), (s, bset2), (s, s2)]:
+        assert (a & b) == s.intersect(s2)
+        assert (a | b) == s.union(s2)
+        assert (a - b) == s.subtract(s2)
+    assert bset == s
+    assert s != s2
+    assert s != "{ [i] : 0 <= i < 10 }"
+
+    bmap = isl.BasicMap("{ [i] -> [i + 1] }")
+    m = isl.Map("{ [i] -> [j] : j > i }")
+    assert (bmap & m) == bmap
+    assert (bmap | m) == m
+    assert (m - bmap).is_disjoint(bmap)
+
+    with pytest.raises(TypeError):
+        s & isl.UnionSet(s)
+
+    with pytest.raises(AssertionError):
+        assert s == isl.Set("{ [i] : 0 <= i < 10 }", context=isl.Context())
+
+    aff = isl.PwAff("{ [i] -> [(2i)] }")
+    one = isl.PwAff("{ [i] -> [(1)] }")
+    assert (aff + 1).is_equal(aff.add(one))
+    assert (1 + aff).is_equal(aff.add(one))
+    assert (1 - aff).is_equal(one.sub(aff))
+    assert (aff - isl.Val(1)).is_equal(aff.sub(one))
+    assert (aff * 3).is_equal(aff.add(aff).add(aff))
+    assert (aff - aff.get_pieces()[0][1]).is_equal(aff.sub(aff))
+    with pytest.raises(TypeError):
+        aff + 1.5
+
+    qp = isl.QPolynomial.from_aff(isl.Aff("{ [i] -> [(i)] }"))
+    assert (qp * qp - 1).plain_is_equal(
+            qp.mul(qp).sub(isl.QPolynomial.one_on_domain(qp.get_domain_space())))
+
+    assert not isl.Val(0)
+    assert isl.Val(5)
+
+
+def test_disk_cache(tmp_path):
+    import os
+
+    from islpy.cache import DiskCache, memoize
+
+    cache = DiskCache(str(tmp_path))
+    calls = []
+
+    @memoize(cache=cache)
+    def lexmin(s, dt=isl.dim_type.set):
+        calls.append(s)
+        return s.lexmin(), s.dim(dt)
+
+    s = isl.Set("[n] -> { [i, j] : 0 <= i < n and i <= j < 10 }")
+    result = lexmin(s)
+    assert lexmin(s.copy()) == result
+    assert len(calls) == 1
+
+    # a new cache on the same directory, as after a restart
+    ctx = isl.Context()
+    s_ctx = isl.Set(str(s), context=ctx)
+    lexmin_restarted = memoize(lexmin.__wrapped__, cache=DiskCache(str(tmp_path)),
+            name=f"{lexmin.__module__}.{lexmin.__qualname__}")
+    lexmin_min, dim = lexmin_restarted(s_ctx)
+    assert len(calls) == 1
+    assert dim == 2
+    assert lexmin_min.get_ctx() == ctx
+    assert lexmin_min == s_ctx.lexmin()
+
+    lexmin(s, isl.dim_type.param)
+    assert len(calls) == 2
+
+    # eviction
+    small_cache = DiskCache(str(tmp_path / "small"), max_size=1)
+    small_cache.put(small_cache.make_key("a"), s)
+    small_cache.put(small_cache.make_key("b"), s)
+    with pytest.raises(KeyError):
+        small_cache.get(small_cache.make_key("a"))
+
+    # once over the bound, room is made for further entries
+    medium_cache = DiskCache(str(tmp_path / "medium"))
+    medium_cache.put(medium_cache.make_key("0"), s)
+    medium_cache.max_size = 4 * os.path.getsize(
+            os.path.join(medium_cache.directory, medium_cache.make_key("0") + ".pkl"))
+    for i in range(1, 5):
+        medium_cache.put(medium_cache.make_key(str(i)), s)
+    assert len(os.listdir(medium_cache.directory)) == 3
+
+    with pytest.raises(TypeError):
+        cache.make_key("f", (object(),))
+
+    # entries that cannot be loaded are discarded
+    for data in [b"", b"cno_such_module\nf\n.", b"cislpy\nNoSuchClass\n."]:
+        key = cache.make_key("corrupt")
+        with open(os.path.join(cache.directory, key + ".pkl"), "wb") as outf:
+            outf.write(data)
+        with pytest.raises(KeyError):
+            cache.get(key)
+        assert not os.path.exists(os.path.join(cache.directory, key + ".pkl"))
+
+
+def test_disk_cache_compute_flow(tmp_path):
+    import os
+
+    from islpy.cache import DiskCache, compute_flow
+
+    cache = DiskCache(str(tmp_path))
+    sink = isl.UnionMap("[n] -> { R[i] -> A[i - 1] : 0 < i < n }")
+    source = isl.UnionMap("[n] -> { W[i] -> A[i] : 0 <= i < n }")
+    schedule = isl.UnionMap("[n] -> { W[i] -> [i, 0]; R[i] -> [i, 1] }")
+
+    flow = compute_flow(sink, schedule, must_source=source, cache=cache)
+    expected = (isl.UnionAccessInfo.from_sink(sink)
+            .set_must_source(source)
+            .set_schedule_map(schedule)
+            .compute_flow())
+    assert flow.get_must_dependence() == expected.get_must_dependence()
+    assert flow.get_may_no_source() == expected.get_may_no_source()
+    assert len(os.listdir(tmp_path)) == 1
+
+    ctx = isl.Context()
+    cached = compute_flow(
+            isl.UnionMap(str(sink), context=ctx),
+            isl.UnionMap(str(schedule), context=ctx),
+            must_source=isl.UnionMap(str(source), context=ctx), cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
+    assert cached.get_must_dependence().get_ctx() == ctx
+    assert (str(cached.get_must_dependence())
+            == str(expected.get_must_dependence()))
+
+    with pytest.raises(TypeError):
+        cache.make_key("f", (isl.UnionAccessInfo.from_sink(sink),))
+
+
+def test_copy():
+    import copy
+
+    user = [1, 2]
+    id_a = isl.Id("a", user)
+    s = isl.Set("[n] -> { [i] : 0 <= i < n }").set_dim_id(isl.dim_type.set, 0, id_a)
+
+    for s2 in [copy.copy(s), copy.deepcopy(s)]:
+        assert s2 is not s
+        assert s2 == s
+        assert s2.get_dim_id(isl.dim_type.set, 0).user is user
+
+    data = copy.deepcopy({"s": s, "id": id_a, "again": s})
+    assert data["s"] is data["again"]
+    assert data["id"].user is user
+
+
 def test_get_id_dict():
     id_dict = isl.Set("[a] -> {[b]}").get_id_dict(isl.dim_type.param)
     print(id_dict)
@@ -491,6 +1059,399 @@ def test_polynomial_var_names():
         poly.get_var_names(isl.dim_type.param)
 
 
+def _simplify_triangle(n: int, ctx: isl.Context) -> str:
+    s = isl.Set(
+        f"[m] -> {{ [i, j] : 0 <= i < {n} and 0 <= j <= i and j < m }}",
+        context=ctx)
+    return str(s.coalesce().lexmax())
+
+
+def test_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    ns = list(range(1, 33))
+    expected = [_simplify_triangle(n, isl.DEFAULT_CONTEXT) for n in ns]
+
+    with ThreadPoolExecutor(4) as pool:
+        # one context per task
+        assert list(pool.map(
+            lambda n: _simplify_triangle(n, isl.Context()), ns)) == expected
+
+        # shared context, serialized by its lock
+        assert list(pool.map(
+            lambda n: _simplify_triangle(n, isl.DEFAULT_CONTEXT), ns)) == expected
+
+
+def test_threads_context_lifetime():
+    from concurrent.futures import ThreadPoolExecutor
+
+    def churn(i: int) -> int:
+        # contexts and their objects get freed on whichever thread
+        # drops the last reference
+        total = 0
+        for _ in range(50):
+            ctx = isl.Context()
+            bset = isl.BasicSet(f"{{ [i] : 0 <= i < {i} }}", context=ctx)
+            total += len(bset.get_constraints())
+            del ctx
+        return total
+
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(churn, range(2, 18))) == [100]*16
+
+
+def test_consume():
+    ctx = isl.Context()
+    space = isl.Space.create_from_names(ctx, set=["i", "j"])
+    cns = isl.Constraint.ineq_from_names(space, {1: 5, "i": -1})
+    ref = isl.BasicSet.universe(space).add_constraint(cns)
+
+    bset = isl.BasicSet.universe(space)
+    result = bset.consume().add_constraint(cns)
+    assert result == ref
+    assert not bset._is_valid()
+    assert cns._is_valid()
+
+    # The mark only applies to the next call, even if that keeps bset.
+    bset = isl.BasicSet.universe(space)
+    assert not bset.consume().is_empty()
+    assert bset.add_constraint(cns) == ref
+    assert bset._is_valid()
+
+    assert not ctx.get_consume_temporaries()
+    ctx.set_consume_temporaries(True)
+    assert ctx.get_consume_temporaries()
+
+    # named objects are not temporaries
+    bset = isl.BasicSet.universe(space)
+    assert bset.add_constraint(cns) == ref
+    assert bset._is_valid()
+    assert cns._is_valid()
+
+    result = isl.BasicSet.universe(space)
+    for i in range(10):
+        result = (result
+                  .add_constraint(isl.Constraint.ineq_from_names(
+                      space, {1: 10 + i, "j": -1}))
+                  .add_constraint(isl.Constraint.ineq_from_names(
+                      space, {1: i, "i": 1})))
+    assert result == isl.BasicSet("{ [i, j] : i >= 0 and j <= 10 }",
+                                  context=ctx)
+
+
+def test_builders():
+    ctx = isl.Context()
+    space = isl.Space.create_from_names(ctx, set=["i", "j"], params=["n"])
+    ref = isl.BasicSet("[n] -> { [i, j] : 0 <= i < n and j = 2i }", context=ctx)
+
+    start = isl.BasicSet.universe(space)
+    builder = isl.BasicSetBuilder(start)
+    bset = (builder
+            .add_ineq({"i": 1})
+            .add_ineq({"n": 1, "i": -1, 1: -1})
+            .add_eq([("j", 1), ("i", -2)])
+            .build())
+    assert bset == ref
+    assert start._is_valid()
+    assert start.is_universe()
+
+    with pytest.raises(RuntimeError):
+        builder.add_ineq({"i": 1})
+
+    assert isl.BasicSetBuilder(space).add_constraints(
+            ref.get_constraints()).build() == ref
+    assert isl.BasicSet.universe(space).add_constraints(
+            ref.get_constraints()) == ref
+
+    bmap = (isl.BasicMapBuilder(isl.BasicMap("{ [i] -> [j] }", context=ctx))
+            .add_eq({"i": 1, "j": -1, 1: 1})
+            .build())
+    assert bmap == isl.BasicMap("{ [i] -> [i + 1] }", context=ctx)
+
+    aff = (isl.AffBuilder(space)
+           .set_coefficients(isl.dim_type.in_, [1, 2])
+           .set_coefficients_by_name({"n": 3, 1: 4})
+           .build())
+    assert aff.plain_is_equal(
+            isl.Aff("[n] -> { [i, j] -> [(i + 2j + 3n + 4)] }", context=ctx))
+
+    base = isl.Aff("[n] -> { [i, j] -> [(i)] }", context=ctx)
+    assert isl.AffBuilder(base).set_constant(5).build().plain_is_equal(base + 5)
+    assert base.set_coefficients_by_name({"j": 7}).plain_is_equal(
+            isl.Aff("[n] -> { [i, j] -> [(i + 7j)] }", context=ctx))
+    assert base.plain_is_equal(
+            isl.Aff("[n] -> { [i, j] -> [(i)] }", context=ctx))
+
+
+def test_decomposition():
+    s = isl.Set("{ [i] : 0 <= i < 10 or 20 <= i < 30 }")
+    bsets = s.get_basic_sets()
+    assert len(bsets) == 2
+    assert all(isinstance(bset, isl.BasicSet) for bset in bsets)
+    assert isl.Set.from_union_set(isl.UnionSet(bsets[0]).union(bsets[1])) == s
+
+    assert isl.BasicSet("{ [i] : 0 <= i < 10 }").get_basic_sets()[0].n_constraint() == 2
+    assert isl.BasicSet("{ [i] : 1 = 0 }").get_basic_sets() == []
+    assert len(isl.Map("{ [i] -> [i] ; [i] -> [i + 1] }").get_basic_maps()) == 2
+    assert len(isl.BasicMap("{ [i] -> [j] : 0 <= i < j }").get_constraints()) == 2
+
+    pwaff = isl.PwAff("{ [i] -> [(i)] : i < 0; [i] -> [(2i)] : i >= 0 }")
+    pieces = pwaff.get_pieces()
+    assert [type(p) for p in pieces[0]] == [isl.Set, isl.Aff]
+    assert sorted(str(aff) for _, aff in pieces) == [
+            "{ [i] -> [(2i)] }", "{ [i] -> [(i)] }"]
+    (dom, _aff), = isl.Aff("{ [i] -> [(i)] }").get_pieces()
+    assert dom.plain_is_universe()
+
+    qpoly = isl.PwQPolynomial("{ [i] -> i^2 + 3 }").get_pieces()[0][1]
+    assert len(qpoly.get_terms()) == 2
+
+    consumed = isl.Set("{ [i] : 0 <= i }")
+    consumed.consume().complement()
+    with pytest.raises(isl.Error):
+        consumed.get_basic_sets()
+
+
+def test_points_array():
+    np = pytest.importorskip("numpy")
+
+    s = isl.Set("{ [i, j] : 0 <= i < 3 and 0 <= j <= i }")
+    points = s.points_array()
+    assert points.dtype == np.int64
+    assert points.tolist() == [[0, 0], [1, 0], [1, 1], [2, 0], [2, 1], [2, 2]]
+    assert isl.BasicSet("{ [i] : 0 <= i < 3 }").points_array(
+            dtype=np.int32).dtype == np.int32
+
+    # sorted, although isl does not enumerate them in this order
+    union = isl.Set("{ [i, j] : (0 <= i < 3 and 0 <= j < 2) or (i = -1 and j = 5) }")
+    expected = [[-1, 5], [0, 0], [0, 1], [1, 0], [1, 1], [2, 0], [2, 1]]
+    assert union.points_array().tolist() == expected
+    assert union.points_array(dtype=object).tolist() == expected
+
+    assert isl.Set("{ [i] : 1 = 0 }").points_array().shape == (0, 1)
+    assert isl.Set("{ [] }").points_array().shape == (1, 0)
+    assert isl.Set("[n] -> { [i] : n = 2 and 0 <= i < n }").points_array(
+            ).tolist() == [[0], [1]]
+
+    big = isl.Set(f"{{ [i] : {2**70} <= i <= {2**70 + 1} }}")
+    assert big.points_array(dtype=object).tolist() == [[2**70], [2**70 + 1]]
+    with pytest.raises(OverflowError):
+        big.points_array()
+    assert isl.Set(f"{{ [i] : i = {-2**63} }}").points_array().tolist() == [
+            [-2**63]]
+
+    with pytest.raises(ValueError, match="more than 5 points"):
+        s.points_array(max_points=5)
+    assert s.points_array(max_points=6).shape == (6, 2)
+    with pytest.raises(ValueError, match="bounded"):
+        isl.Set("{ [i] : i >= 0 }").points_array()
+    with pytest.raises(ValueError, match="parameters"):
+        isl.Set("[n] -> { [i] : 0 <= i < n <= 10 }").points_array()
+
+
+def test_constraint_arrays():
+    np = pytest.importorskip("numpy")
+
+    bset = isl.BasicSet("[n] -> { [i, j] : 0 <= i <= n and j = 2i + 1 and "
+            "exists a : i = 3a + 1 }").remove_redundancies()
+    eq, ineq, labels, divs = bset.constraint_arrays()
+    n_div = bset.dim(isl.dim_type.div)
+    assert labels == [1, "n", "i", "j"] + [None] * n_div
+
+    for matrix, is_eq in [(eq, True), (ineq, False)]:
+        assert matrix.dtype == np.int64
+        constraints = [c for c in bset.get_constraints() if c.is_equality() == is_eq]
+        assert len(matrix) == len(constraints)
+        for row, cns in zip(matrix, constraints, strict=True):
+            coeffs = cns.get_coefficients_by_name()
+            for label, entry in zip(labels[:4], row[:4], strict=True):
+                assert entry == coeffs.get(label, 0)
+
+    # the divs reproduce the points of the set
+    assert divs.shape == (n_div, 1 + len(labels))
+    for i in range(-5, 10):
+        x = [1, 9, i, 2*i + 1] + [0] * n_div
+        for k in range(n_div):
+            x[4 + k] = int(divs[k, 1:] @ x) // int(divs[k, 0])
+        satisfied = ((eq @ x == 0).all() and (ineq @ x >= 0).all())
+        assert satisfied == (0 <= i <= 9 and i % 3 == 1)
+
+    bmap = isl.BasicMap("{ [i] -> [o] : o = 2i and i >= 5 }")
+    eq, ineq, labels, divs = bmap.constraint_arrays(dtype=np.int32)
+    assert labels == [1, "i", "o"]
+    assert eq.dtype == np.int32
+    assert sorted(abs(eq).tolist()) == [[0, 2, 1]]
+    assert ineq.tolist() == [[-5, 1, 0]]
+    assert divs.shape == (0, 4)
+
+    big = 2**70
+    bset = isl.BasicSet(f"{{ [i] : i >= {big} }}")
+    with pytest.raises(OverflowError):
+        bset.constraint_arrays()
+    _, ineq, _, _ = bset.constraint_arrays(dtype=object)
+    assert ineq.tolist() == [[-big, 1]]
+
+
+def test_from_constraint_arrays():
+    np = pytest.importorskip("numpy")
+
+    bset = isl.BasicSet("[n] -> { [i, j] : 0 <= i <= n and j = 2i + 1 and "
+            "exists a : i = 3a + 1 }")
+    eq, ineq, _, _ = bset.constraint_arrays()
+    for dtype in [np.int64, np.int8, np.int32]:
+        result = isl.BasicSet.from_constraint_arrays(
+                bset.get_space(), eq.astype(dtype), ineq.astype(dtype))
+        assert result == bset
+
+    space = isl.Space.create_from_names(isl.DEFAULT_CONTEXT, set=["i"])
+    assert (isl.BasicSet.from_constraint_arrays(
+                space, [], np.array([[2**64 - 1, 1]], dtype=np.uint64))
+            == isl.BasicSet(f"{{ [i] : i >= {-(2**64 - 1)} }}"))
+
+    # not contiguous, Python ints, empty
+    space = isl.Space.create_from_names(isl.DEFAULT_CONTEXT, set=["i", "j"])
+    mat = np.array([[0, 1, 0, 99], [5, -1, 0, 99], [0, 0, 1, 99]])
+    assert (isl.BasicSet.from_constraint_arrays(space, [], mat[:, :3])
+            == isl.BasicSet("{ [i, j] : 0 <= i <= 5 and j >= 0 }"))
+    assert (isl.BasicSet.from_constraint_arrays(space, [[2**40, 0, -1]], [])
+            == isl.BasicSet(f"{{ [i, j] : j = {2**40} }}"))
+    assert isl.BasicSet.from_constraint_arrays(space, [], []).is_universe()
+
+    space = isl.Space.create_from_names(isl.DEFAULT_CONTEXT,
+            in_=["i"], out=["o"], params=["n"])
+    bmap = isl.BasicMap.from_constraint_arrays(
+            space, np.array([[0, 0, 2, -1]], dtype=np.int16), [[-1, 1, 0, 0]])
+    assert bmap == isl.BasicMap("[n] -> { [i] -> [2i] : n >= 1 }")
+    assert isl.BasicMap.from_constraint_arrays(
+            space, *bmap.constraint_arrays()[:2]) == bmap
+
+    with pytest.raises(ValueError, match="expected a set space"):
+        isl.BasicSet.from_constraint_arrays(space, [], [])
+    with pytest.raises(isl.Error):
+        isl.BasicMap.from_constraint_arrays(space, [[1, 2]], [])
+    with pytest.raises(OverflowError):
+        isl.BasicMap.from_constraint_arrays(space, [[2**70, 0, 0, 0]], [])
+
+
+def test_vec_mat_numpy():
+    np = pytest.importorskip("numpy")
+
+    values = np.arange(12, dtype=np.int16).reshape(3, 4) - 5
+    mat = isl.Mat(values)
+    assert (mat.rows(), mat.cols()) == (3, 4)
+    assert mat.get_element_val(2, 1).to_python() == values[2, 1]
+    result = mat.to_numpy()
+    assert result.dtype == np.int64
+    assert (result == values).all()
+    assert (np.asarray(isl.Mat(values.T)) == values.T).all()
+    assert mat.to_numpy(dtype=np.int8).dtype == np.int8
+
+    vec = isl.Vec(np.array([3, -1, 2**40]))
+    assert vec.get_element_val(2).to_python() == 2**40
+    assert vec.to_numpy().tolist() == [3, -1, 2**40]
+    assert isl.Vec(np.zeros(0, dtype=np.int32)).to_numpy().shape == (0,)
+
+    # integers that do not fit into int64
+    big = [2**70, -(2**65), 7]
+    vec = isl.Vec.from_numpy(big)
+    assert vec.get_element_val(0).to_python() == 2**70
+    result = vec.to_numpy()
+    assert result.dtype == object
+    assert result.tolist() == big
+    with pytest.raises(OverflowError):
+        vec.to_numpy(dtype=np.int64)
+
+    mat = isl.Mat.from_numpy(np.array([[1, 2**64], [3, 4]], dtype=object))
+    assert mat.get_element_val(0, 1).to_python() == 2**64
+    assert mat.to_numpy().tolist() == [[1, 2**64], [3, 4]]
+    hermite, _, _ = isl.Mat.from_numpy([[1, 2], [3, 4]]).left_hermite(0)
+    assert hermite.to_numpy().tolist() == [[1, 0], [1, 2]]
+
+    space = isl.Space.create_from_names(isl.DEFAULT_CONTEXT, set=["i", "j"])
+    mv = isl.MultiVal(space, np.array([5, -3], dtype=np.int8))
+    assert mv == isl.MultiVal("{ [5, -3] }")
+    assert mv.to_numpy().tolist() == [5, -3]
+    assert isl.MultiVal.from_numpy(space, [1, 2**80]).to_numpy().tolist() == [
+            1, 2**80]
+
+    with pytest.raises(TypeError, match="integers"):
+        isl.Vec(np.array([0.5]))
+    with pytest.raises(TypeError, match="integers"):
+        isl.Vec.from_numpy(np.array([0.5], dtype=object))
+    with pytest.raises(ValueError, match="dimension"):
+        isl.Mat(np.zeros(3, dtype=np.int64))
+    with pytest.raises(ValueError, match="2 values"):
+        isl.MultiVal(space, np.zeros(3, dtype=np.int64))
+    with pytest.raises(ValueError, match="integers"):
+        isl.MultiVal("{ [1/2] }").to_numpy()
+
+
+def test_contains_points():
+    np = pytest.importorskip("numpy")
+
+    s = isl.Set("{ [i, j] : 0 <= i < 10 and 0 <= j <= i and "
+            "exists a : i = 2a; [i, j] : i = -1 and j = 5 }")
+    points = np.array([[x, y] for x in range(-3, 12) for y in range(-2, 12)])
+    expected = [isl.Set(f"{{ [{x}, {y}] }}").is_subset(s) for x, y in points]
+
+    for dtype in [np.int64, np.int8, np.uint32]:
+        mask = s.contains_points(points.astype(dtype))
+        if dtype == np.uint32:
+            # negative coordinates wrap around
+            mask = mask[(points >= 0).all(axis=1)]
+            assert list(mask) == [
+                e for e, p in zip(expected, points, strict=True) if (p >= 0).all()]
+        else:
+            assert mask.dtype == bool
+            assert list(mask) == expected
+
+    # not contiguous
+    assert list(s.contains_points(points.T.copy().T[::2])) == expected[::2]
+
+    # integers that do not fit into int64 in the constraints or the points
+    big = 2**62
+    s = isl.Set(f"{{ [i] : {big} <= 4i <= {big} + 8 }}")
+    assert list(s.contains_points([[2**60 - 1], [2**60], [2**60 + 2],
+                                   [2**60 + 3]])) == [False, True, True, False]
+    assert list(s.contains_points(np.array([[2**63 + 1]], dtype=np.uint64))
+                ) == [False]
+
+    s = isl.Set("[n, m] -> { [i] : 0 <= i < n }")
+    assert list(s.contains_points([[0], [4], [5]], params=[5, 0])) == [
+        True, True, False]
+    assert list(s.contains_points([[0], [4], [5]], params={"m": 1, "n": 1})) == [
+        True, False, False]
+    assert s.contains_points([], params=[0, 0]).shape == (0,)
+
+    with pytest.raises(ValueError, match="parameters"):
+        s.contains_points([[0]])
+    with pytest.raises(ValueError, match="1 coordinates"):
+        s.contains_points([[0, 0]], params=[0, 0])
+    with pytest.raises(TypeError, match="integers"):
+        s.contains_points([[0.5]], params=[0, 0])
+
+
+def test_version():
+    # looked up lazily on first access
+    assert isinstance(isl.__version__, str)
+    assert isl.VERSION_TEXT == isl.__version__
+    assert isinstance(isl.VERSION, tuple)
+    assert all(isinstance(part, int) for part in isl.VERSION)
+
+    with pytest.raises(AttributeError):
+        _ = isl.no_such_attribute
+
+
+def test_pickler_import():
+    import subprocess
+    import sys
+
+    # pickle is only imported once Pickler is used
+    code = ("import sys, islpy; assert 'pickle' not in sys.modules; "
+            "assert islpy.Pickler.__name__ == 'Pickler'")
+    subprocess.check_call([sys.executable, "-c", code])
+
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1: